@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按歌曲自适应CRF
+固定的crf对纯色背景浪费码率，对细节丰富的照片背景又画质不足。
+生成前用这首歌实际的背景和字幕渲染一小段（歌词最密集处），在几个探测crf下编码并与无损片段比较SSIM，
+得到 crf-画质 曲线后插值出刚好达到目标画质的crf，正式视频只按这个crf编码一次。
+曲线按背景内容和样式缓存到 cache/crf_curves.json，同一背景的歌曲不再重复探测。
+"""
+
+import hashlib
+import json
+import logging
+import math
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.encoder_capabilities import build_encoder_args
+from utils.json_store import JsonFileStore, LazySingleton
+from core.ass_writer import STYLE_CONFIG_KEYS, lyric_lines_from_bytes
+from core.encoder_tuner import LOSSLESS_ARGS, measure_quality, pick_segment, render_clip
+
+logger = logging.getLogger(__name__)
+
+CRF_CURVES_VERSION = 1
+
+PROBE_CRFS = (18, 24, 30)
+CRF_MIN = 16
+CRF_MAX = 32
+DEFAULT_TARGET_SSIM = 0.985
+SAMPLE_SECONDS = 2
+
+
+def interpolate_crf(points, target, crf_min=CRF_MIN, crf_max=CRF_MAX):
+    """由 [(crf, SSIM), ...] 求画质刚好不低于 target 的最大crf
+
+    测量噪声可能让曲线不单调，先按crf递增取累计最小值；
+    目标超出探测范围时按两端的斜率外推，结果限制在 [crf_min, crf_max]
+    """
+    points = sorted(points)
+    monotone = []
+    for crf, quality in points:
+        monotone.append((crf, min(quality, monotone[-1][1]) if monotone else quality))
+    if not monotone:
+        return None
+
+    def solve(p0, p1):
+        (c0, q0), (c1, q1) = p0, p1
+        if q0 <= q1:
+            return None
+        return c0 + (q0 - target) / (q0 - q1) * (c1 - c0)
+
+    crf = None
+    if len(monotone) == 1:
+        crf = crf_min if monotone[0][1] < target else monotone[0][0]
+    elif monotone[0][1] < target:
+        crf = solve(monotone[0], monotone[1])
+    elif monotone[-1][1] >= target:
+        crf = solve(monotone[-2], monotone[-1])
+        if crf is None:
+            crf = crf_max
+    else:
+        for p0, p1 in zip(monotone, monotone[1:]):
+            if p0[1] >= target > p1[1]:
+                crf = solve(p0, p1)
+                break
+    if crf is None:
+        crf = crf_min
+    # 向下取整，保证不低于目标画质
+    return int(max(crf_min, min(crf_max, math.floor(crf + 1e-9))))
+
+
+def _background_digest(bg_image_path, config):
+    """背景内容的哈希：图片按文件内容（封面每首歌写到不同的临时文件），纯色按颜色"""
+    if bg_image_path and Path(bg_image_path).exists():
+        digest = hashlib.sha1()
+        with open(bg_image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    return config.get('background_color', '#000000')
+
+
+def curve_key(bg_image_path, config):
+    """曲线缓存键：背景内容 + 分辨率 + 字幕样式 + 编码预设/tune + 探测参数"""
+    key = {
+        'background': _background_digest(bg_image_path, config),
+        'size': [config.get('width', 1920), config.get('height', 1080)],
+        'style': {name: config.get(name) for name in STYLE_CONFIG_KEYS},
+        'preset': config.get('preset', 'medium'),
+        'tune': config.get('tune', 'film'),
+        'probe': [list(PROBE_CRFS), SAMPLE_SECONDS],
+    }
+    raw = json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class CrfCurveCache:
+    """crf-画质 曲线缓存（线程安全），条目数超过上限时淘汰最久未使用的"""
+
+    def __init__(self, cache_file="cache/crf_curves.json", max_entries=2000):
+        self.cache_file = Path(cache_file)
+        self.max_entries = max_entries
+        self._store = JsonFileStore(self.cache_file, version=CRF_CURVES_VERSION, label="CRF曲线缓存")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._load()
+
+    def _load(self):
+        data = self._store.load()
+        if data is not None:
+            self._entries = OrderedDict(data.get("entries", []))
+
+    def get(self, key):
+        with self._lock:
+            points = self._entries.get(key)
+            if points is not None:
+                self._entries.move_to_end(key)
+            return points
+
+    def set(self, key, points):
+        with self._lock:
+            self._entries[key] = points
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self.save()
+
+    def _snapshot(self):
+        with self._lock:
+            return {"entries": list(self._entries.items())}
+
+    def save(self):
+        """写入磁盘"""
+        self._store.save(self._snapshot)
+
+
+_crf_curve_cache = LazySingleton(CrfCurveCache)
+
+
+def get_crf_curve_cache():
+    """获取全局CRF曲线缓存"""
+    return _crf_curve_cache.get()
+
+
+def measure_crf_curve(generator, bg_image_path, config, ass_path, time_offset, work_dir):
+    """渲染无损样本后在各探测crf下编码，返回 [(crf, SSIM), ...]；失败时返回None"""
+    reference = Path(work_dir) / 'reference.mkv'
+    _, error = render_clip(generator, bg_image_path, config, ass_path, LOSSLESS_ARGS, reference,
+                           SAMPLE_SECONDS, time_offset)
+    if error:
+        logger.warning(f"⚠️ 自适应CRF渲染样本失败: {error}")
+        return None
+    points = []
+    for crf in PROBE_CRFS:
+        sample = Path(work_dir) / f'crf{crf}.mp4'
+        encoder_args = build_encoder_args('none', config.get('preset', 'medium'), config.get('tune', 'film'), crf)
+        _, error = render_clip(generator, bg_image_path, config, ass_path, encoder_args, sample,
+                               SAMPLE_SECONDS, time_offset)
+        quality = None if error else measure_quality(sample, reference, 'ssim')
+        if quality is None:
+            logger.warning(f"⚠️ 自适应CRF探测 crf{crf} 失败: {error or '无法计算SSIM'}")
+            return None
+        points.append((crf, quality))
+    return points
+
+
+def predict_crf(generator, bg_image_path, config, ass_path, lrc_bytes, duration=None):
+    """预测这首歌达到目标SSIM（config['adaptive_crf_target']）所需的crf
+
+    Args:
+        generator: VideoGenerator，用于生成与正式渲染相同的滤镜图
+        bg_image_path: 背景图片，None为纯色背景
+        config: 已准备好字体的样式与编码配置
+        ass_path: 这首歌的ASS字幕
+        lrc_bytes: 歌词内容，用于选取样本位置
+        duration: 音频时长（秒）
+
+    Returns:
+        int crf；无法探测时返回None，调用方使用配置中的crf
+    """
+    target = config.get('adaptive_crf_target', DEFAULT_TARGET_SSIM)
+    cache = get_crf_curve_cache()
+    key = curve_key(bg_image_path, config)
+    points = cache.get(key)
+    if points is None:
+        lyric_lines = lyric_lines_from_bytes(lrc_bytes)
+        duration_ms = int(duration * 1000) if duration else lyric_lines.duration
+        sample_ms = SAMPLE_SECONDS * 1000
+        offset = pick_segment(lyric_lines, duration_ms, sample_ms) / 1000 if lyric_lines else 0
+        Path('temp').mkdir(exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix='adaptive_crf_', dir='temp')
+        try:
+            points = measure_crf_curve(generator, bg_image_path, config, ass_path, offset, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if points is None:
+            return None
+        cache.set(key, points)
+        logger.info("📈 CRF曲线: " + ", ".join(f"crf{crf}={quality:.4f}" for crf, quality in points))
+    return interpolate_crf(points, target)
@@ -0,0 +1,127 @@
+"""
+ASS字幕写入器
+把歌词时间轴和样式配置直接拼成ASS文本，一次完成样式和淡入淡出效果，
+不经过 pysubs2 的加载、对象构造和保存。输出格式与 pysubs2 保存的文件一致。
+"""
+
+import re
+
+from core.lyric_timeline import LyricTimeline
+
+# 输出格式或样式字段变化时递增，供字幕缓存判断是否失效
+ASS_WRITER_VERSION = 2
+
+# ASS时间戳能表示的最大值 9:59:59.99
+MAX_ASS_TIME = ((9 * 60 + 59) * 60 + 59) * 1000 + 990
+
+ASS_HEADER = """[Script Info]
+; Script generated by Lrc2Video
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+Collisions: Normal
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+{style}
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+# 样式中参与输出的配置项，字幕缓存用它们计算样式哈希
+STYLE_CONFIG_KEYS = (
+    'font_family', 'font_size', 'font_color', 'outline_color', 'shadow_color',
+    'outline_width', 'shadow_offset', 'bold', 'italic',
+    'margin_bottom', 'margin_left', 'margin_right', 'fade_in', 'fade_out',
+    'fallback_font_family',
+)
+
+# 中日韩字符（含全角标点），主字体不支持时切换到后备字体
+CJK_RUN_PATTERN = re.compile(r'[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef]+')
+
+
+def hex_to_ass_color(hex_color):
+    """#RRGGBB -> &H00BBGGRR（前两位为透明度，00为不透明）"""
+    hex_color = hex_color.lstrip('#')
+    r, g, b = (int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+    return f"&H00{b:02X}{g:02X}{r:02X}"
+
+
+def format_ass_time(ms):
+    """毫秒 -> H:MM:SS.cc（与Aegisub/pysubs2相同的四舍五入到厘秒）"""
+    ms = min(max(0, int(ms)), MAX_ASS_TIME)
+    ms = (ms + 5) - (ms + 5) % 10
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:01d}:{minutes:02d}:{seconds:02d}.{ms // 10:02d}"
+
+
+def _format_number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def build_style_line(config):
+    """根据样式配置生成 Default 样式行"""
+    fields = [
+        'Default',
+        config.get('font_family', 'Arial'),
+        _format_number(config.get('font_size', 36)),
+        hex_to_ass_color(config.get('font_color', '#FFFFFF')),
+        '&H000000FF',
+        hex_to_ass_color(config.get('outline_color', '#000000')),
+        hex_to_ass_color(config.get('shadow_color', '#000000')),
+        '-1' if config.get('bold', True) else '0',
+        '-1' if config.get('italic', False) else '0',
+        '0', '0', '100', '100', '0', '0', '1',
+        _format_number(config.get('outline_width', 3)),
+        _format_number(config.get('shadow_offset', 2)),
+        '2',  # 底部居中
+        str(config.get('margin_left', 10)),
+        str(config.get('margin_right', 10)),
+        str(config.get('margin_bottom', 50)),
+        '1',
+    ]
+    return "Style: " + ",".join(fields)
+
+
+def load_lyric_lines(lrc_path):
+    """解析LRC文件，返回 LyricTimeline（迭代得到 (开始毫秒, 结束毫秒, 歌词)）"""
+    return LyricTimeline.from_lrc_file(lrc_path)
+
+
+def lyric_lines_from_bytes(data):
+    """解析LRC文件内容（字节），返回 LyricTimeline"""
+    return LyricTimeline.from_lrc_bytes(data)
+
+
+def apply_font_fallback(text, fallback_family, family):
+    """把歌词中的中日韩字符段包在 \\fn 覆盖标签中，使用后备字体显示"""
+    return CJK_RUN_PATTERN.sub(lambda m: f"{{\\fn{fallback_family}}}{m.group(0)}{{\\fn{family}}}", text)
+
+
+def build_ass(lyric_lines, config):
+    """生成完整的ASS文本
+
+    Args:
+        lyric_lines: LyricTimeline 或 [(开始毫秒, 结束毫秒, 歌词), ...]
+        config: 样式配置；有 fallback_font_family 时中日韩字符使用该字体
+    """
+    effect = f"{{\\an2\\fad({config.get('fade_in', 500)},{config.get('fade_out', 500)})}}"
+    fallback_family = config.get('fallback_font_family')
+    family = config.get('font_family', 'Arial')
+    parts = [ASS_HEADER.format(style=build_style_line(config))]
+    parts.extend(
+        f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Default,,0,0,0,,{effect}"
+        f"{apply_font_fallback(text, fallback_family, family) if fallback_family else text}\n"
+        for start, end, text in lyric_lines
+    )
+    return "".join(parts)
+
+
+def write_ass_file(ass_path, lyric_lines, config):
+    """写入ASS字幕文件"""
+    with open(ass_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(build_ass(lyric_lines, config))
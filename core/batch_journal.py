@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量任务日志 - 以JSON Lines格式记录每个任务的处理结果
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJournal:
+    """批次日志（线程安全，追加写入）
+
+    每行一条记录，编码线程和校验线程都可以直接写入，
+    便于事后汇总或对接上传流程。
+    """
+
+    def __init__(self, journal_path=None, log_dir="logs"):
+        if journal_path is None:
+            log_dir = Path(log_dir)
+            log_dir.mkdir(exist_ok=True)
+            journal_path = log_dir / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self.path = Path(journal_path)
+        self._lock = threading.Lock()
+        self._records = []
+
+    def record(self, event, **fields):
+        """追加一条记录"""
+        entry = {
+            "time": datetime.now().isoformat(timespec='seconds'),
+            "event": event,
+        }
+        entry.update({key: str(value) if isinstance(value, Path) else value
+                      for key, value in fields.items()})
+        with self._lock:
+            self._records.append(entry)
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.warning(f"写入批次日志失败: {e}")
+
+    def get_records(self, event=None):
+        """获取已记录的条目，可按事件类型过滤"""
+        with self._lock:
+            return [r for r in self._records if event is None or r["event"] == event]
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编码参数自动调优
+截取一首歌中歌词最密集的一小段，先无损渲染为参考片段，再用各组候选编码参数（编码器/预设/tune/crf）
+渲染同一段，记录编码速度、码率以及与参考片段相比的画质（SSIM或PSNR），
+在满足画质下限的参数中选出编码最快的一组写入配置。
+歌词视频画面大部分静止，最合适的参数与电影类内容差别很大，需要用自己的内容实测。
+"""
+
+import logging
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from utils.encoder_capabilities import FPS_PATTERN, build_encoder_args
+from utils.ffmpeg_tools import get_ffmpeg_cmd
+from utils.file_utils import extract_cover_image, get_audio_duration
+from core.ass_writer import load_lyric_lines, write_ass_file
+
+logger = logging.getLogger(__name__)
+
+# 默认候选参数；硬件编码器不使用crf/tune，映射后相同的参数只测一次
+DEFAULT_PRESETS = ('ultrafast', 'veryfast', 'faster', 'medium')
+DEFAULT_TUNES = ('film', 'animation', 'stillimage')
+DEFAULT_CRFS = (20, 23, 26)
+
+# 各画质指标的默认下限
+DEFAULT_FLOORS = {'ssim': 0.985, 'psnr': 40.0}
+
+FRAME_RATE = 25
+
+# 参考片段使用无损编码
+LOSSLESS_ARGS = ['-c:v', 'libx264', '-preset', 'ultrafast', '-qp', '0']
+
+# 速度差在这个比例内视为测量误差
+SPEED_TOLERANCE = 0.05
+
+# [Parsed_ssim_0 @ 0x...] SSIM Y:0.99 U:0.99 V:0.99 All:0.991 (20.5)
+SSIM_PATTERN = re.compile(r'SSIM .*All:([\d.]+)')
+# [Parsed_psnr_0 @ 0x...] PSNR y:45.1 u:47.0 v:47.3 average:45.8 min:43.2 max:48.9
+PSNR_PATTERN = re.compile(r'PSNR .*average:([\d.]+|inf)')
+
+
+class TuneCandidate(NamedTuple):
+    """一组候选编码参数"""
+    hwaccel: str
+    preset: str
+    tune: str
+    crf: int
+
+    def encoder_args(self):
+        return build_encoder_args(self.hwaccel, self.preset, self.tune, self.crf)
+
+    def label(self):
+        if self.hwaccel == 'none':
+            return f"libx264 {self.preset}/{self.tune}/crf{self.crf}"
+        return f"{self.hwaccel} {' '.join(self.encoder_args()[2:])}"
+
+
+class TuneResult(NamedTuple):
+    """一组参数的实测结果；error 不为None表示编码或画质计算失败"""
+    candidate: TuneCandidate
+    fps: float = 0.0
+    kbps: float = 0.0
+    quality: Optional[float] = None
+    error: Optional[str] = None
+
+
+def build_candidates(encoders=('none',), presets=DEFAULT_PRESETS, tunes=DEFAULT_TUNES, crfs=DEFAULT_CRFS):
+    """候选参数组合，实际编码参数相同的只保留一组"""
+    candidates = []
+    seen = set()
+    for hwaccel in encoders:
+        for preset in presets:
+            for tune in tunes:
+                for crf in crfs:
+                    candidate = TuneCandidate(hwaccel, preset, tune, crf)
+                    key = tuple(candidate.encoder_args())
+                    if key not in seen:
+                        seen.add(key)
+                        candidates.append(candidate)
+    return candidates
+
+
+def choose_best(results, floor, speed_tolerance=SPEED_TOLERANCE):
+    """满足画质下限的结果中编码最快的，都不满足时返回None
+
+    crf 对编码速度影响很小，速度与最快的相差不超过 speed_tolerance 的视为一样快，其中选码率最小的
+    """
+    passed = [result for result in results
+              if result.error is None and result.quality is not None and result.quality >= floor]
+    if not passed:
+        return None
+    fastest = max(result.fps for result in passed)
+    close = [result for result in passed if result.fps >= fastest * (1 - speed_tolerance)]
+    return min(close, key=lambda result: (result.kbps, -result.fps))
+
+
+def pick_segment(lyric_lines, duration_ms, segment_ms):
+    """歌词换行最密集的一段，返回开始时间（毫秒）
+
+    字幕切换和淡入淡出是歌词视频中画面变化最多的部分，用这一段测试最有代表性
+    """
+    starts = [start for start, _, _ in lyric_lines]
+    best_start, best_count = 0, -1
+    for i, start in enumerate(starts):
+        count = bisect_left(starts, start + segment_ms) - i
+        if count > best_count:
+            best_start, best_count = start, count
+    # 提前半秒开始，包含第一行的淡入
+    best_start = max(0, best_start - 500)
+    if duration_ms:
+        best_start = max(0, min(best_start, duration_ms - segment_ms))
+    return best_start
+
+
+def build_segment_lines(lyric_lines, start_ms, segment_ms):
+    """截取 [start_ms, start_ms + segment_ms) 内的歌词，时间平移到从0开始"""
+    end_ms = start_ms + segment_ms
+    return [(max(start, start_ms) - start_ms, min(end, end_ms) - start_ms, text)
+            for start, end, text in lyric_lines if start < end_ms and end > start_ms]
+
+
+def render_clip(generator, bg_image_path, config, ass_path, encoder_args, output_path, seconds, time_offset=0):
+    """用正式生成时的背景和字幕滤镜渲染一小段无声视频
+
+    Returns:
+        (编码速度fps, 错误信息)：成功时错误信息为None。
+        速度取ffmpeg自己统计的fps（不含进程启动和读取输入的时间），没有输出时按总耗时估算
+    """
+    frames = int(seconds * FRAME_RATE)
+    video_inputs, filter_graph = generator.build_video_source(bg_image_path, config, ass_path, time_offset)
+    cmd = get_ffmpeg_cmd() + ['-hide_banner', '-nostdin', '-y'] + video_inputs + [
+        '-filter_complex', filter_graph, '-map', '[v]', '-an',
+        '-frames:v', str(frames),
+    ] + list(encoder_args) + [str(output_path)]
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8',
+                                errors='replace', timeout=max(120, seconds * 30))
+    except subprocess.TimeoutExpired:
+        return None, "编码超时"
+    except OSError as e:
+        return None, str(e)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        error_lines = result.stderr.strip().splitlines()
+        return None, error_lines[-1] if error_lines else f"返回码 {result.returncode}"
+    matches = FPS_PATTERN.findall(result.stderr)
+    fps = float(matches[-1]) if matches else 0.0
+    if fps <= 0:
+        fps = frames / max(elapsed, 1e-6)
+    return fps, None
+
+
+def measure_quality(distorted_path, reference_path, metric='ssim', timeout=300):
+    """用ffmpeg的ssim/psnr滤镜比较两个视频，返回画质分数，失败时返回None"""
+    pattern = SSIM_PATTERN if metric == 'ssim' else PSNR_PATTERN
+    try:
+        result = subprocess.run(get_ffmpeg_cmd() + [
+            '-hide_banner', '-nostdin', '-i', str(distorted_path), '-i', str(reference_path),
+            '-lavfi', f'[0:v][1:v]{metric}', '-f', 'null', '-'
+        ], capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"⚠️ 计算{metric.upper()}失败: {e}")
+        return None
+    matches = pattern.findall(result.stderr)
+    if result.returncode != 0 or not matches:
+        return None
+    # 完全相同时PSNR为inf
+    return float('inf') if matches[-1] == 'inf' else float(matches[-1])
+
+
+class EncoderTuner:
+    """在一首歌的代表性片段上比较候选编码参数"""
+
+    def __init__(self, audio_path, lrc_path, config, bg_image_path=None, segment_seconds=10,
+                 metric='ssim', work_dir='temp/tune', runs=1):
+        # 延迟导入，避免与 core.video_generator 循环导入
+        from core.video_generator import VideoGenerator
+        self.audio_path = Path(audio_path)
+        self.lrc_path = Path(lrc_path)
+        self.generator = VideoGenerator()
+        self.config = self.generator.prepare_fonts(dict(config))
+        self.bg_image_path = bg_image_path
+        self.segment_seconds = segment_seconds
+        self.metric = metric
+        self.runs = max(1, runs)
+        self.work_dir = Path(work_dir)
+        self.segment_start = 0.0
+        self.ass_path = self.work_dir / 'segment.ass'
+        self.reference_path = self.work_dir / 'reference.mkv'
+
+    def prepare(self):
+        """截取片段、生成片段字幕并无损渲染参考片段"""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        lyric_lines = load_lyric_lines(self.lrc_path)
+        if not lyric_lines:
+            raise ValueError(f"LRC文件中没有找到有效的歌词: {self.lrc_path}")
+        duration = get_audio_duration(self.audio_path) or lyric_lines.duration / 1000
+        segment_ms = int(self.segment_seconds * 1000)
+        start_ms = pick_segment(lyric_lines, int(duration * 1000), segment_ms)
+        self.segment_start = start_ms / 1000
+        write_ass_file(self.ass_path, build_segment_lines(lyric_lines, start_ms, segment_ms), self.config)
+
+        # 与正式生成一致：没有指定背景时使用音频封面
+        if not self.bg_image_path:
+            cover_path = self.work_dir / 'cover.jpg'
+            if extract_cover_image(self.audio_path, cover_path):
+                self.bg_image_path = cover_path
+
+        logger.info(f"🎯 测试片段: {self.audio_path.name} {self.segment_start:.1f}s 起 {self.segment_seconds}s")
+        _, error = self.render(LOSSLESS_ARGS, self.reference_path)
+        if error:
+            raise RuntimeError(f"渲染参考片段失败: {error}")
+
+    def render(self, encoder_args, output_path):
+        """渲染测试片段，返回 (编码速度fps, 错误信息)"""
+        return render_clip(self.generator, self.bg_image_path, self.config, self.ass_path,
+                           encoder_args, output_path, self.segment_seconds)
+
+    def measure(self, candidate):
+        """用一组参数渲染测试片段并测量速度、码率和画质"""
+        output_path = self.work_dir / 'candidate.mp4'
+        # 多次渲染时取速度的中位数，排除偶发的系统负载
+        speeds = []
+        for _ in range(self.runs):
+            fps, error = self.render(candidate.encoder_args(), output_path)
+            if error:
+                return TuneResult(candidate, error=error)
+            speeds.append(fps)
+        fps = statistics.median(speeds)
+        kbps = os.path.getsize(output_path) * 8 / 1000 / self.segment_seconds
+        quality = measure_quality(output_path, self.reference_path, self.metric)
+        if quality is None:
+            return TuneResult(candidate, fps, kbps, error=f"无法计算{self.metric.upper()}")
+        return TuneResult(candidate, round(fps, 1), round(kbps, 1), quality)
+
+    def run(self, candidates, progress=None):
+        """依次测量所有候选参数
+
+        Args:
+            candidates: [TuneCandidate, ...]
+            progress: 可选回调 progress(已完成数, 总数, TuneResult)
+        """
+        results = []
+        for i, candidate in enumerate(candidates, 1):
+            result = self.measure(candidate)
+            results.append(result)
+            if progress:
+                progress(i, len(candidates), result)
+        return results
+
+    def cleanup(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def save_tuned_settings(result, metric, floor, song=None):
+    """把选出的参数写入配置（video.hwaccel/preset/tune/crf），并记录调优结果"""
+    from utils.config_manager import get_config
+    config = get_config()
+    candidate = result.candidate
+    config.set('video.hwaccel', candidate.hwaccel)
+    config.set('video.preset', candidate.preset)
+    config.set('video.tune', candidate.tune)
+    config.set('video.crf', candidate.crf)
+    config.set('video.auto_tune', {
+        'metric': metric,
+        'floor': floor,
+        'quality': result.quality,
+        'fps': result.fps,
+        'kbps': result.kbps,
+        'song': str(song) if song else None,
+        'tuned_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    config.save_config()
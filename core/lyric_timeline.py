@@ -0,0 +1,102 @@
+"""
+歌词时间轴
+用平行数组保存每行的开始/结束时间和歌词索引，
+按时间查询当前显示的歌词行为 O(log n)，供字幕生成、预览和叠加层共用。
+"""
+
+from array import array
+from bisect import bisect_right
+
+from utils.lrc_parser import parse_lrc_bytes
+
+# 歌词最后一行的显示时长（毫秒）
+LAST_LINE_DURATION = 3000
+
+
+class LyricTimeline:
+    """紧凑的歌词时间轴
+
+    starts/ends 为毫秒数组（按开始时间排序），text_index 指向去重后的 texts，
+    重复的副歌只保存一份文本。
+    """
+
+    __slots__ = ('starts', 'ends', 'text_index', 'texts')
+
+    def __init__(self, starts=(), ends=None, text_index=(), texts=()):
+        self.starts = array('q', starts)
+        self.text_index = array('l', text_index)
+        self.texts = list(texts)
+        self.ends = array('q', ends) if ends is not None else self.normalized_ends(self.starts)
+
+    @staticmethod
+    def normalized_ends(starts, last_duration=LAST_LINE_DURATION):
+        """每行显示到下一行开始，最后一行显示 last_duration 毫秒"""
+        if not starts:
+            return array('q')
+        # 整体切片代替逐行赋值
+        ends = starts[1:]
+        ends.append(starts[-1] + last_duration)
+        return ends
+
+    @classmethod
+    def from_lines(cls, lines, last_duration=LAST_LINE_DURATION):
+        """从按时间排序的 [(开始毫秒, 歌词), ...] 构建"""
+        index_of = {}
+        texts = []
+        text_index = array('l')
+        for _, text in lines:
+            index = index_of.get(text)
+            if index is None:
+                index = index_of[text] = len(texts)
+                texts.append(text)
+            text_index.append(index)
+        starts = array('q', [start for start, _ in lines])
+        return cls(starts, cls.normalized_ends(starts, last_duration), text_index, texts)
+
+    @classmethod
+    def from_lrc_bytes(cls, data):
+        return cls.from_lines(parse_lrc_bytes(data).lines)
+
+    @classmethod
+    def from_lrc_file(cls, lrc_path):
+        with open(lrc_path, 'rb') as f:
+            return cls.from_lrc_bytes(f.read())
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __bool__(self):
+        return len(self.starts) > 0
+
+    def __getitem__(self, i):
+        return self.starts[i], self.ends[i], self.texts[self.text_index[i]]
+
+    def __iter__(self):
+        texts = self.texts
+        for start, end, index in zip(self.starts, self.ends, self.text_index):
+            yield start, end, texts[index]
+
+    def index_at(self, time_ms):
+        """time_ms 时正在显示的行号，没有则返回-1"""
+        i = bisect_right(self.starts, time_ms) - 1
+        if i >= 0 and time_ms < self.ends[i]:
+            return i
+        return -1
+
+    def at(self, time_ms):
+        """time_ms 时正在显示的歌词，没有则返回None"""
+        i = self.index_at(time_ms)
+        return self.texts[self.text_index[i]] if i >= 0 else None
+
+    def between(self, start_ms, end_ms):
+        """与 [start_ms, end_ms) 有重叠的行号范围"""
+        first = max(0, bisect_right(self.starts, start_ms) - 1)
+        if first < len(self.ends) and self.ends[first] <= start_ms:
+            first += 1
+        last = bisect_right(self.starts, end_ms - 1) if end_ms > start_ms else first
+        return range(first, max(first, last))
+
+    @property
+    def duration(self):
+        """最后一行结束的时间（毫秒）"""
+        return self.ends[-1] if self.ends else 0
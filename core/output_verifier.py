@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成结果校验 - 检查容器完整性、音视频流和时长
+"""
+
+import json
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.ffmpeg_tools import get_ffmpeg_cmd, get_ffprobe_cmd
+
+logger = logging.getLogger(__name__)
+
+
+def probe_media(media_path):
+    """用ffprobe读取容器和流信息，失败返回None"""
+    try:
+        result = subprocess.run(get_ffprobe_cmd() + [
+            '-v', 'error',
+            '-show_entries', 'format=duration:stream=codec_type,duration',
+            '-of', 'json', str(media_path)
+        ], capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=30)
+        if result.returncode != 0:
+            return None
+        return json.loads(result.stdout or '{}')
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def get_media_duration(media_path):
+    """获取媒体时长（秒），无法获取时返回None"""
+    info = probe_media(media_path)
+    try:
+        return float(info['format']['duration'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def decode_sample_frames(video_path, duration, sample_count):
+    """在均匀分布的时间点各解码一帧，返回解码失败的时间点列表"""
+    failed = []
+    for i in range(sample_count):
+        position = duration * (i + 1) / (sample_count + 1)
+        try:
+            result = subprocess.run(get_ffmpeg_cmd() + [
+                '-v', 'error', '-ss', f"{position:.2f}", '-i', str(video_path),
+                '-frames:v', '1', '-f', 'null', '-'
+            ], capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=30)
+            if result.returncode != 0 or result.stderr.strip():
+                failed.append(round(position, 2))
+        except (OSError, subprocess.TimeoutExpired):
+            failed.append(round(position, 2))
+    return failed
+
+
+def verify_output(output_path, expected_duration=None, tolerance=1.0, sample_frames=0):
+    """校验生成的视频文件
+
+    Args:
+        output_path: 视频文件路径
+        expected_duration: 期望时长（秒），通常为音频时长
+        tolerance: 允许的时长误差（秒）
+        sample_frames: 抽样解码的帧数，0表示不解码
+
+    Returns:
+        dict: {'ok': bool, 'errors': [...], 'duration': float, ...}
+    """
+    report = {'ok': False, 'errors': [], 'duration': None,
+              'expected_duration': expected_duration,
+              'has_video': False, 'has_audio': False}
+    output_path = Path(output_path)
+
+    if not output_path.exists() or output_path.stat().st_size == 0:
+        report['errors'].append("输出文件不存在或为空")
+        return report
+
+    info = probe_media(output_path)
+    if info is None:
+        report['errors'].append("容器损坏，ffprobe无法读取")
+        return report
+
+    codec_types = {stream.get('codec_type') for stream in info.get('streams', [])}
+    report['has_video'] = 'video' in codec_types
+    report['has_audio'] = 'audio' in codec_types
+    if not report['has_video']:
+        report['errors'].append("缺少视频流")
+    if not report['has_audio']:
+        report['errors'].append("缺少音频流")
+
+    try:
+        report['duration'] = float(info['format']['duration'])
+    except (KeyError, ValueError):
+        report['errors'].append("无法读取视频时长（文件可能被截断）")
+
+    if report['duration'] is not None and expected_duration:
+        if abs(report['duration'] - expected_duration) > tolerance:
+            report['errors'].append(
+                f"时长不匹配: 视频 {report['duration']:.2f}s, 音频 {expected_duration:.2f}s")
+
+    if sample_frames > 0 and report['has_video'] and report['duration']:
+        failed = decode_sample_frames(output_path, report['duration'], sample_frames)
+        if failed:
+            report['errors'].append(f"抽样帧解码失败: {failed}")
+
+    report['ok'] = not report['errors']
+    return report
+
+
+class OutputVerifier:
+    """独立线程池中的校验阶段，不占用编码并发名额"""
+
+    def __init__(self, max_workers=2, tolerance=1.0, sample_frames=0, journal=None):
+        self.tolerance = tolerance
+        self.sample_frames = sample_frames
+        self.journal = journal
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='verify')
+
+    def submit(self, output_path, audio_path=None):
+        """提交校验任务，返回Future（结果为校验报告）"""
+        return self._executor.submit(self._verify, output_path, audio_path)
+
+    def _verify(self, output_path, audio_path):
+        expected = get_media_duration(audio_path) if audio_path else None
+        report = verify_output(output_path, expected, self.tolerance, self.sample_frames)
+        if report['ok']:
+            logger.info(f"✅ 校验通过: {Path(output_path).name}")
+        else:
+            logger.warning(f"⚠️ 校验未通过: {Path(output_path).name} - {'; '.join(report['errors'])}")
+        if self.journal is not None:
+            self.journal.record('verify', output=output_path, audio=audio_path, **report)
+        return report
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,139 @@
+"""
+字幕缓存
+按 歌词内容哈希 + 样式哈希 + 字幕写入器版本 缓存生成好的ASS文件，
+只改编码参数的重新渲染、同一首歌的样式A/B对比都能跳过解析和样式阶段。
+缓存目录总大小超过上限时，淘汰最久未使用的文件。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from core.ass_writer import ASS_WRITER_VERSION, STYLE_CONFIG_KEYS
+from utils.config_manager import get_config
+
+logger = logging.getLogger(__name__)
+
+
+def style_hash(config):
+    """只对影响字幕输出的样式字段求哈希，编码参数变化不影响缓存"""
+    style = {key: config.get(key) for key in STYLE_CONFIG_KEYS}
+    raw = json.dumps(style, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class SubtitleCache:
+    """ASS字幕文件缓存（线程安全，多个批量任务共用）"""
+
+    def __init__(self, cache_dir="cache/subtitles", max_bytes=64 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # 首次写入时统计
+
+    @staticmethod
+    def make_key(lrc_bytes, config):
+        digest = hashlib.sha1()
+        digest.update(hashlib.sha1(lrc_bytes).digest())
+        digest.update(style_hash(config).encode('ascii'))
+        digest.update(f"v{ASS_WRITER_VERSION}".encode('ascii'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.ass"
+
+    def get(self, key, dest_path):
+        """命中时把缓存的字幕复制到 dest_path 并返回True"""
+        path = self._path(key)
+        try:
+            shutil.copyfile(path, dest_path)
+        except OSError:
+            return False
+        try:
+            # 更新修改时间，作为最近使用时间
+            os.utime(path)
+        except OSError:
+            pass
+        return True
+
+    def put(self, key, src_path):
+        """把生成好的字幕文件存入缓存"""
+        path = self._path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"写入字幕缓存失败: {e}")
+            return
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                   if entry.is_file() and entry.name.endswith('.ass'))
+
+    def _evict(self):
+        # 调用方需持有锁；淘汰到上限的90%，避免每次写入都触发
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.ass'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        self._total_bytes = total
+        logger.info(f"字幕缓存超过上限，淘汰 {removed} 个文件")
+
+    def clear(self):
+        """清空缓存，返回删除的文件数"""
+        with self._lock:
+            removed = 0
+            if self.cache_dir.exists():
+                for entry in os.scandir(self.cache_dir):
+                    if entry.is_file():
+                        try:
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            continue
+            self._total_bytes = 0
+            return removed
+
+
+_subtitle_cache = None
+_subtitle_cache_lock = threading.Lock()
+
+
+def get_subtitle_cache():
+    """获取全局字幕缓存；video.subtitle_cache_mb 为0时禁用，返回None"""
+    global _subtitle_cache
+    max_mb = get_config().get("video.subtitle_cache_mb", 64)
+    if not max_mb:
+        return None
+    with _subtitle_cache_lock:
+        if _subtitle_cache is None:
+            _subtitle_cache = SubtitleCache(max_bytes=int(max_mb * 1024 * 1024))
+        return _subtitle_cache
@@ -7,18 +7,103 @@
 import os
 import logging
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
-import pysubs2
-from utils.file_utils import parse_lrc_manually, extract_cover_image, get_audio_duration
-from utils.ai_title_generator import generate_video_title
+from utils.file_utils import extract_cover_image, get_audio_duration
+from utils.ffmpeg_tools import get_ffmpeg_cmd, get_ffprobe_cmd
+from utils.media_probe import get_track_info
+from utils.font_resolver import get_font_resolver
+from utils.encoder_capabilities import build_encoder_args
+from core.ass_writer import load_lyric_lines, lyric_lines_from_bytes, write_ass_file
+from core.subtitle_cache import SubtitleCache, get_subtitle_cache
 
 logger = logging.getLogger(__name__)
 
+# FFmpeg错误分类
+FFMPEG_ERROR_ENCODER = 'encoder'    # 编码器/驱动故障，可切换编码器重试
+FFMPEG_ERROR_INPUT = 'input'        # 输入文件问题，换编码器也无济于事
+FFMPEG_ERROR_UNKNOWN = 'unknown'
+
+# 编码器运行时故障特征（会话数上限、驱动重置、设备丢失等）
+ENCODER_ERROR_PATTERNS = (
+    'openencodesessionex failed',
+    'no nvenc capable devices found',
+    'incompatible client key',
+    'cannot load nvcuda',
+    'cannot load libnvidia-encode',
+    'driver does not support the required nvenc api version',
+    'cuda_error',
+    'mfx session',
+    'failed to create videotoolbox session',
+    'amf failed',
+    'device creation failed',
+    'failed to initialise',
+    'error while opening encoder',
+    'error initializing output stream',
+    'could not open encoder before eof',
+    'unknown encoder',
+    'hardware device setup failed',
+)
+
+# 输入问题特征
+INPUT_ERROR_PATTERNS = (
+    'no such file or directory',
+    'invalid data found when processing input',
+    'could not find codec parameters',
+    'unable to open',
+    'permission denied',
+    'no space left on device',
+)
+
+
+def classify_ffmpeg_error(error_output):
+    """根据FFmpeg的stderr输出判断失败类型"""
+    text = (error_output or '').lower()
+    if any(pattern in text for pattern in INPUT_ERROR_PATTERNS):
+        return FFMPEG_ERROR_INPUT
+    if any(pattern in text for pattern in ENCODER_ERROR_PATTERNS):
+        return FFMPEG_ERROR_ENCODER
+    return FFMPEG_ERROR_UNKNOWN
+
+
+class EncoderHealth:
+    """编码器健康状态 - 在一个批次内的所有任务间共享（线程安全）
+
+    某个硬件编码器出现运行时故障后被标记为不可用，
+    本批次后续任务直接跳过它，不再重复踩坑。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._unhealthy = {}
+
+    def is_healthy(self, hwaccel):
+        with self._lock:
+            return hwaccel not in self._unhealthy
+
+    def mark_unhealthy(self, hwaccel, reason=""):
+        # 软件编码是最后的退路，永远不标记
+        if hwaccel == 'none':
+            return
+        with self._lock:
+            if hwaccel not in self._unhealthy:
+                self._unhealthy[hwaccel] = reason
+                logger.warning(f"⚠️ 编码器 {hwaccel} 已标记为不可用: {reason}")
+
+    def get_unhealthy(self):
+        """返回 {编码器: 原因} 的副本"""
+        with self._lock:
+            return dict(self._unhealthy)
+
+
 class VideoGenerator:
-    def __init__(self, progress_callback=None):
+    def __init__(self, progress_callback=None, encoder_health=None):
         self.progress_callback = progress_callback
         self.stop_flag = False
         self.current_process = None
+        # 未传入时使用独立实例，单个任务内同样可以故障转移
+        self.encoder_health = encoder_health or EncoderHealth()
         logger.info("🎬 视频生成器初始化完成")
     
     def set_stop_flag(self, stop=True):
@@ -38,57 +123,14 @@ class VideoGenerator:
             logger.debug(f"进度: {current}% - {message}")
             
 
-    def hex_to_ass_color(self, hex_color):
-        hex_color = hex_color.lstrip('#')
-        r, g, b = (int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        # ASS颜色格式是BGR顺序的十六进制整数，包含透明度(FF)
-        color_int = int(f"00{b:02x}{g:02x}{r:02x}", 16)
-        print(f"原始颜色: {hex_color}, 转换后: {color_int} (&H00{b:02x}{g:02x}{r:02x})")  # 调试日志
-        return color_int
-
-    def apply_subtitle_style(self, subs, config):
-        print(f"接收到的颜色配置: {config.get('font_color')}")  # 调试日志
-        """应用字幕样式"""
-        # 获取默认样式，如果不存在则创建
-        if 'Default' not in subs.styles:
-            subs.styles['Default'] = pysubs2.SSAStyle()
+    def generate_video(self, audio_path, lrc_path, config, bg_image_path=None, output_path=None, use_ai_title=True, title=None,
+                       track_info=None):
+        """生成单个视频 - 带详细调试
         
-        style = subs.styles['Default']
-        
-        # 设置字体和大小
-        style.fontname = config.get('font_family', 'Arial')
-        style.fontsize = config.get('font_size', 36)
-        
-        # 设置对齐方式（中心对齐）
-        style.alignment = 2  # 底部中心对齐
-        
-        # 设置边距
-        style.marginv = config.get('margin_bottom', 50)  # 底部边距
-        style.marginl = config.get('margin_left', 10)
-        style.marginr = config.get('margin_right', 10)
-        
-        # 设置描边和阴影
-        style.outline = config.get('outline_width', 3)
-        style.shadow = config.get('shadow_offset', 2)
-        
-        # 设置字体样式
-        style.bold = -1 if config.get('bold', True) else 0
-        style.italic = -1 if config.get('italic', False) else 0
-        
-        # 设置颜色
-        style.primarycolor = self.hex_to_ass_color(config.get('font_color', '#FFFFFF'))
-        style.outlinecolor = self.hex_to_ass_color(config.get('outline_color', '#000000'))
-        style.backcolor = self.hex_to_ass_color(config.get('shadow_color', '#000000'))
-        
-        # 为每个字幕事件添加特效
-        for event in subs:
-            # 添加淡入淡出效果和对齐方式
-            fade_in = config.get('fade_in', 500)
-            fade_out = config.get('fade_out', 500)
-            event.text = f"{{\\an2\\fad({fade_in},{fade_out})}}" + event.text
-    
-    def generate_video(self, audio_path, lrc_path, config, bg_image_path=None, output_path=None, use_ai_title=True):
-        """生成单个视频 - 带详细调试"""
+        标题只用于在未指定 output_path 时命名输出文件；
+        已提前生成标题时通过 title 传入，避免重复调用AI。
+        track_info 为扫描阶段读取的曲目信息，未传入时按需读取。
+        """
         logger.info(f"🎬 开始生成视频: {audio_path}")
         logger.info(f"📄 歌词文件: {lrc_path}")
         logger.info(f"🎨 配置: {config}")
@@ -110,65 +152,63 @@ class VideoGenerator:
                 
             logger.info("✅ 文件检查通过")
                 
-            # 生成AI标题
-            song_name = Path(audio_path).stem
-            artist = config.get('artist', None)
-            
-            if use_ai_title:
-                print("🤖 AI标题生成中...")
-                from utils.ai_title_generator import generate_video_title
-                ai_title = generate_video_title(song_name, artist, use_ai=True)
-                if ai_title and ai_title.strip():
-                    print(f"✅ AI标题: {ai_title}")
-                    final_title = ai_title
-                else:
-                    print("⚠️ AI生成失败，使用默认标题")
-                    final_title = f"{artist} - {song_name}" if artist else f"{song_name} - 音乐MV"
-            else:
-                final_title = f"{artist} - {song_name}" if artist else f"{song_name} - 音乐MV"
-                print(f"📄 默认标题: {final_title}")
-            
             if output_path is None:
-                # 使用AI生成的标题作为输出文件名
+                # 使用标题作为输出文件名
+                final_title = title or self.resolve_title(audio_path, config, use_ai_title,
+                                                          track_info or get_track_info(audio_path, lrc_path))
                 safe_title = "".join(c for c in final_title if c.isalnum() or c in (' ', '-', '_', '.', '《', '》', '【', '】', '（', '）', '！', '？', '~')).rstrip()
                 output_path = Path(f"{safe_title}.mp4")
+            output_path = Path(output_path)
             
             self.update_progress(0, 100, "解析歌词文件...")
             # 简化日志输出
             print(f"📄 解析歌词: {Path(lrc_path).name}")
             
-            # 解析歌词文件
+            # 字幕文件 - 使用音频文件名作为临时文件名，保存到temp目录
+            audio_name = Path(audio_path).stem
+            temp_dir = Path('temp')
+            temp_dir.mkdir(exist_ok=True)
+            ass_path = temp_dir / f'temp_{audio_name}_ass.ass'
+            
+            # 同样的歌词和样式已生成过时直接复用字幕，跳过解析和样式阶段
             try:
-                subs = pysubs2.load(str(lrc_path), format_='lrc', encoding='utf-8')
-            except:
+                with open(lrc_path, 'rb') as f:
+                    lrc_bytes = f.read()
+            except OSError as e:
+                logger.error(f"💥 LRC文件读取失败: {e}")
+                return False, f"LRC文件读取失败: {str(e)}"
+            config = self.prepare_fonts(config)
+            subtitle_cache = get_subtitle_cache()
+            cache_key = SubtitleCache.make_key(lrc_bytes, config) if subtitle_cache else None
+            
+            if subtitle_cache and subtitle_cache.get(cache_key, ass_path):
+                print("✅ 歌词: 使用缓存的字幕")
+                logger.info(f"✅ 字幕缓存命中，临时文件: {ass_path}")
+            else:
+                # 解析歌词文件
                 try:
-                    subs = parse_lrc_manually(lrc_path)
+                    lyric_lines = lyric_lines_from_bytes(lrc_bytes)
                 except Exception as e:
                     logger.error(f"💥 LRC文件解析失败: {e}")
                     return False, f"LRC文件解析失败: {str(e)}"
-            
-            if not subs:
-                logger.error("💥 LRC文件中没有找到有效的歌词")
-                return False, "LRC文件中没有找到有效的歌词"
                 
-            print(f"✅ 歌词: {len(subs)}行")
-            
-            if self.stop_flag:
-                return False, "操作已取消"
-            
-            self.update_progress(20, 100, "应用字幕样式...")
-            logger.info("🎨 应用字幕样式...")
-            
-            # 应用字幕样式
-            self.apply_subtitle_style(subs, config)
-            
-            # 保存字幕文件 - 使用音频文件名作为临时文件名，保存到temp目录
-            audio_name = Path(audio_path).stem
-            temp_dir = Path('temp')
-            temp_dir.mkdir(exist_ok=True)
-            ass_path = temp_dir / f'temp_{audio_name}_ass.ass'
-            subs.save(str(ass_path), encoding='utf-8')
-            logger.info(f"✅ 字幕样式应用完成，临时文件: {ass_path}")
+                if not lyric_lines:
+                    logger.error("💥 LRC文件中没有找到有效的歌词")
+                    return False, "LRC文件中没有找到有效的歌词"
+                    
+                print(f"✅ 歌词: {len(lyric_lines)}行")
+                
+                if self.stop_flag:
+                    return False, "操作已取消"
+                
+                self.update_progress(20, 100, "应用字幕样式...")
+                logger.info("🎨 应用字幕样式...")
+                
+                # 直接生成带样式的字幕文件
+                write_ass_file(ass_path, lyric_lines, config)
+                if subtitle_cache:
+                    subtitle_cache.put(cache_key, ass_path)
+                logger.info(f"✅ 字幕样式应用完成，临时文件: {ass_path}")
             
             if self.stop_flag:
                 return False, "操作已取消"
@@ -205,58 +245,32 @@ class VideoGenerator:
             
             self.update_progress(60, 100, "生成视频...")
             
-            # 生成FFmpeg命令
-            cmd = self.build_ffmpeg_command(audio_path, bg_image_path, config, duration, audio_bitrate, ass_path, output_path)
-            print(f"🎬 生成: {output_path.name}")
-            
-            # 执行FFmpeg命令
-            self.current_process = subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace'
-                    )
-            
-            # 实时进度监控 - 简化为单行输出
-            logger.info("🎬 FFmpeg处理中...")
-            last_logged_progress = -1
-            start_time = None
-            
-            while True:
-                if self.stop_flag:
-                    logger.warning("⚠️  用户取消操作")
-                    self.terminate_ffmpeg_process()
-                    return False, "操作已取消"
+            # 按故障转移链依次尝试编码器
+            encoder_chain = self.get_encoder_chain(config)
+            if config.get('adaptive_crf') and encoder_chain[0] == 'none':
+                config = self.apply_adaptive_crf(config, bg_image_path, ass_path, lrc_bytes, duration)
+            for attempt, hwaccel in enumerate(encoder_chain):
+                attempt_config = dict(config, hwaccel=hwaccel)
+                cmd = self.build_ffmpeg_command(audio_path, bg_image_path, attempt_config, duration, audio_bitrate, ass_path, output_path)
+                print(f"🎬 生成: {output_path.name} (编码器: {hwaccel})")
                 
-                output = self.current_process.stderr.readline()
-                if output == '' and self.current_process.poll() is not None:
+                returncode, error_output = self.run_ffmpeg(cmd, duration)
+                if returncode is None:
+                    return False, "操作已取消"
+                if returncode == 0:
                     break
                 
-                if output and 'time=' in output:
-                    progress = self.parse_ffmpeg_progress(output, duration)
-                    if progress is not None:
-                        current_step = int(60 + (progress * 0.35))
-                        # 每10%记录一次，使用单行更新
-                        rounded_progress = int(progress // 10) * 10
-                        if rounded_progress != last_logged_progress and rounded_progress % 10 == 0:
-                            self.update_progress(current_step, 100, f"视频生成中... {rounded_progress}%")
-                            # 使用回车符在同一行更新进度
-                            print(f"\r🎬 视频进度: {rounded_progress}% [{'█' * (rounded_progress//10)}{'░' * (10-rounded_progress//10)}]", end="", flush=True)
-                            last_logged_progress = rounded_progress
-                        else:
-                            self.update_progress(current_step, 100, f"视频生成中... {progress:.1f}%")
-                            # 只在文件中记录详细进度，不输出到控制台
-                            logger.debug(f"FFmpeg详细进度: {progress:.1f}%")
-            
-            # 完成后的换行
-            print()  # 换行
-            
-            if self.current_process.returncode != 0:
-                error_output = self.current_process.stderr.read()
-                logger.error(f"💥 FFmpeg错误: {error_output}")
-                return False, f"FFmpeg错误: {error_output}"
+                error_kind = classify_ffmpeg_error(error_output)
+                logger.error(f"💥 FFmpeg错误({hwaccel}, {error_kind}): {error_output}")
+                is_last = attempt == len(encoder_chain) - 1
+                if error_kind == FFMPEG_ERROR_INPUT or is_last:
+                    return False, f"FFmpeg错误: {error_output}"
+                
+                if error_kind == FFMPEG_ERROR_ENCODER:
+                    error_lines = error_output.strip().splitlines()
+                    self.encoder_health.mark_unhealthy(hwaccel, error_lines[-1] if error_lines else "")
+                logger.warning(f"🔁 编码器 {hwaccel} 失败，切换到 {encoder_chain[attempt + 1]} 重试")
+                self.update_progress(60, 100, f"编码器 {hwaccel} 失败，切换重试...")
             
             print(f"✅ 完成: {output_path.name}")
             
@@ -278,19 +292,171 @@ class VideoGenerator:
             self.cleanup_temp_files(temp_ass_path)
             return False, f"生成失败: {str(e)}"
             
-    def parse_lrc(self, lrc_path):
-        """解析LRC文件（用于调试日志）"""
+    def resolve_title(self, audio_path, config, use_ai_title=True, track_info=None):
+        """生成视频标题（AI失败时使用默认标题）
+        
+        歌名和歌手优先取自歌词/音频标签，其次是文件名和配置中的歌手。
+        """
+        song_name = track_info.title if track_info else Path(audio_path).stem
+        artist = (track_info.artist if track_info else None) or config.get('artist', None)
+        
+        if use_ai_title:
+            # AI模块（asyncio、openai等）只在需要生成标题时才导入
+            from utils.ai_title_generator import generate_video_title
+            print("🤖 AI标题生成中...")
+            ai_title = generate_video_title(song_name, artist, use_ai=True)
+            if ai_title and ai_title.strip():
+                print(f"✅ AI标题: {ai_title}")
+                return ai_title
+            print("⚠️ AI生成失败，使用默认标题")
+        
+        final_title = f"{artist} - {song_name}" if artist else f"{song_name} - 音乐MV"
+        print(f"📄 默认标题: {final_title}")
+        return final_title
+    
+    def prepare_fonts(self, config):
+        """预先解析样式字体并准备字体目录（同一样式只做一次）
+
+        返回补充了 fonts_dir / fallback_font_family 的配置；关闭或失败时原样返回，
+        由libass自行查找字体。
+        """
+        if not config.get('stage_fonts', True):
+            return config
         try:
-            subs = pysubs2.load(str(lrc_path), format_='lrc', encoding='utf-8')
-            return [(line.start, line.end, line.text) for line in subs]
-        except:
-            return parse_lrc_manually(lrc_path)
+            fonts = get_font_resolver().resolve(config.get('font_family', 'Arial'),
+                                                config.get('cjk_fallback_font'))
+        except Exception as e:
+            logger.warning(f"⚠️ 字体解析失败，由libass自行查找字体: {e}")
+            return config
+        if fonts is None:
+            return config
+        logger.info(f"🔤 字体目录: {fonts.fonts_dir}（后备字体: {fonts.fallback_family or '无'}）")
+        return dict(config, fonts_dir=fonts.fonts_dir, fallback_font_family=fonts.fallback_family)
+    
+    def apply_adaptive_crf(self, config, bg_image_path, ass_path, lrc_bytes, duration):
+        """按这首歌的背景和字幕预测达到目标画质的crf（仅libx264），失败时保持原crf"""
+        from core.adaptive_crf import predict_crf
+        self.update_progress(55, 100, "自适应CRF...")
+        try:
+            crf = predict_crf(self, bg_image_path, config, ass_path, lrc_bytes, duration)
+        except Exception as e:
+            logger.warning(f"⚠️ 自适应CRF失败，使用配置的crf: {e}")
+            return config
+        if crf is None:
+            return config
+        print(f"🎚️ 自适应CRF: {crf}（配置值 {config.get('crf', 23)}）")
+        return dict(config, crf=crf)
+    
+    def build_video_source(self, bg_image_path, config, ass_path, time_offset=0):
+        """背景画面的输入参数和叠加字幕的滤镜图（输出标签为 [v]）
+
+        time_offset 大于0时字幕从歌曲的第 time_offset 秒开始显示，用于渲染歌曲中间的片段
+        """
+        width = config.get("width", 1920)
+        height = config.get("height", 1080)
+        subtitles_filter = self.build_subtitles_filter(ass_path, config)
+        if time_offset:
+            subtitles_filter = f'setpts=PTS+{time_offset:.3f}/TB,{subtitles_filter}'
+        if bg_image_path and Path(bg_image_path).exists():
+            # 有背景图片的情况
+            inputs = ['-loop', '1', '-i', str(bg_image_path)]
+            filter_graph = (f'[0:v]scale={width}:{height}:force_original_aspect_ratio=increase,'
+                            f'crop={width}:{height},{subtitles_filter}[v]')
+        else:
+            # 纯色背景的情况
+            bg_color = config.get('background_color', '#000000').lstrip('#')
+            inputs = ['-f', 'lavfi', '-i', f'color=c={bg_color}:s={width}x{height}:r=25']
+            filter_graph = f'[0:v]{subtitles_filter}[v]'
+        return inputs, filter_graph
+    
+    def build_subtitles_filter(self, ass_path, config):
+        """subtitles 滤镜参数；有预先准备的字体目录时通过 fontsdir 传给libass"""
+        # 处理字幕路径中的反斜杠问题
+        subtitles_filter = 'subtitles=' + str(ass_path).replace('\\', '/')
+        if config.get('fonts_dir'):
+            subtitles_filter += ':fontsdir=' + str(config['fonts_dir']).replace('\\', '/')
+        return subtitles_filter
+    
+    def get_encoder_chain(self, config):
+        """获取本次任务的编码器故障转移链（以libx264软件编码结尾）"""
+        hwaccel = config.get('hwaccel', 'none')
+        chain = config.get('encoder_fallback_chain') or [hwaccel]
+        
+        encoders = []
+        for encoder in list(chain) + ['none']:
+            if encoder in encoders:
+                continue
+            if encoder != 'none' and not self.encoder_health.is_healthy(encoder):
+                logger.info(f"⏭️ 跳过不可用的编码器: {encoder}")
+                continue
+            encoders.append(encoder)
+        return encoders
+    
+    def run_ffmpeg(self, cmd, duration):
+        """执行FFmpeg命令并监控进度
+        
+        Returns:
+            (returncode, error_output): 用户取消时 returncode 为 None
+        """
+        self.current_process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    encoding='utf-8',
+                    errors='replace'
+                )
+        
+        # 实时进度监控 - 简化为单行输出
+        logger.info("🎬 FFmpeg处理中...")
+        last_logged_progress = -1
+        # 只保留最近的输出用于错误诊断
+        stderr_tail = deque(maxlen=30)
+        
+        while True:
+            if self.stop_flag:
+                logger.warning("⚠️  用户取消操作")
+                self.terminate_ffmpeg_process()
+                return None, ""
+            
+            output = self.current_process.stderr.readline()
+            if output == '' and self.current_process.poll() is not None:
+                break
+            
+            if output and 'time=' in output:
+                progress = self.parse_ffmpeg_progress(output, duration)
+                if progress is not None:
+                    current_step = int(60 + (progress * 0.35))
+                    # 每10%记录一次，使用单行更新
+                    rounded_progress = int(progress // 10) * 10
+                    if rounded_progress != last_logged_progress and rounded_progress % 10 == 0:
+                        self.update_progress(current_step, 100, f"视频生成中... {rounded_progress}%")
+                        # 使用回车符在同一行更新进度
+                        print(f"\r🎬 视频进度: {rounded_progress}% [{'█' * (rounded_progress//10)}{'░' * (10-rounded_progress//10)}]", end="", flush=True)
+                        last_logged_progress = rounded_progress
+                    else:
+                        self.update_progress(current_step, 100, f"视频生成中... {progress:.1f}%")
+                        # 只在文件中记录详细进度，不输出到控制台
+                        logger.debug(f"FFmpeg详细进度: {progress:.1f}%")
+            elif output.strip():
+                stderr_tail.append(output.rstrip())
+        
+        # 完成后的换行
+        print()  # 换行
+        
+        returncode = self.current_process.returncode
+        self.current_process = None
+        return returncode, "\n".join(stderr_tail)
+    
+    def parse_lrc(self, lrc_path):
+        """解析LRC文件（用于调试日志），返回 LyricTimeline，可用 at(毫秒) 查询当前歌词"""
+        return load_lyric_lines(lrc_path)
     
     def get_audio_bitrate(self, audio_path):
         """获取音频码率"""
         try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+            result = subprocess.run(get_ffprobe_cmd() + [
+                '-v', 'error', '-select_streams', 'a:0',
                 '-show_entries', 'stream=bit_rate', '-of', 'csv=p=0', str(audio_path)
             ], capture_output=True, text=True)
             bitrate = int(result.stdout.strip())
@@ -308,65 +474,25 @@ class VideoGenerator:
         thread_count = config.get('thread_count', 0)  # 0表示自动
         
         # 基础命令
-        cmd = ['ffmpeg', '-y']
+        cmd = get_ffmpeg_cmd() + ['-y']
         
         # 添加线程配置（仅软件编码有效）
         if hwaccel == 'none' and thread_count > 0:
             cmd.extend(['-threads', str(thread_count)])
         
-        if bg_image_path and Path(bg_image_path).exists():
-            # 有背景图片的情况
-            # 处理字幕路径中的反斜杠问题
-            subtitles_path = str(ass_path).replace('\\', '/')
-            cmd.extend([
-                '-loop', '1', '-i', str(bg_image_path),
-                '-i', str(audio_path),
-                '-filter_complex', 
-                f'[0:v]scale={config.get("width",1920)}:{config.get("height",1080)}:force_original_aspect_ratio=increase,crop={config.get("width",1920)}:{config.get("height",1080)},subtitles={subtitles_path}[v]',
-                '-map', '[v]', '-map', '1:a',
-                '-c:a', 'copy',
-                '-t', str(duration),
-                '-shortest'
-            ])
-        else:
-            # 纯色背景的情况
-            bg_color = config.get('background_color', '#000000').lstrip('#')
-            # 处理字幕路径中的反斜杠问题
-            subtitles_path = str(ass_path).replace('\\', '/')
-            cmd.extend([
-                '-f', 'lavfi',
-                '-i', f'color=c={bg_color}:s={config.get("width", 1920)}x{config.get("height", 1080)}:r=25',
-                '-i', str(audio_path),
-                '-filter_complex', f'[0:v]subtitles={subtitles_path}[v]',
-                '-map', '[v]', '-map', '1:a',
-                '-c:a', 'copy',
-                '-t', str(duration),
-                '-shortest'
-            ])
+        video_inputs, filter_graph = self.build_video_source(bg_image_path, config, ass_path)
+        cmd.extend(video_inputs)
+        cmd.extend([
+            '-i', str(audio_path),
+            '-filter_complex', filter_graph,
+            '-map', '[v]', '-map', '1:a',
+            '-c:a', 'copy',
+            '-t', str(duration),
+            '-shortest'
+        ])
         
         # 根据硬件加速类型配置编码器
-        if hwaccel == 'nvenc':
-            # NVIDIA NVENC
-            nvenc_preset = 'fast' if preset in ['ultrafast', 'superfast', 'veryfast', 'faster'] else 'slow'
-            cmd.extend(['-c:v', 'h264_nvenc', '-preset', nvenc_preset])
-            
-        elif hwaccel == 'qsv':
-            # Intel Quick Sync Video
-            qsv_preset = 'veryfast' if preset in ['ultrafast', 'superfast', 'veryfast'] else 'medium'
-            cmd.extend(['-c:v', 'h264_qsv', '-preset', qsv_preset])
-            
-        elif hwaccel == 'amf':
-            # AMD AMF
-            amf_usage = 'lowlatency' if preset in ['ultrafast', 'superfast', 'veryfast'] else 'balanced'
-            cmd.extend(['-c:v', 'h264_amf', '-usage', amf_usage])
-            
-        elif hwaccel == 'videotoolbox':
-            # macOS VideoToolbox
-            cmd.extend(['-c:v', 'h264_videotoolbox', '-allow_sw', '1'])
-            
-        else:
-            # 软件编码 (libx264)
-            cmd.extend(['-c:v', 'libx264', '-preset', preset, '-tune', tune, '-crf', str(crf)])
+        cmd.extend(build_encoder_args(hwaccel, preset, tune, crf))
         
         # 添加输出路径
         cmd.append(str(output_path))
@@ -388,28 +514,19 @@ class VideoGenerator:
     def cleanup_temp_files(self, ass_path):
         """清理临时文件"""
         try:
-            # 清理指定路径的临时文件
-            if ass_path.exists(): 
-                ass_path.unlink()
-            
-            # 清理temp目录下的所有临时文件
-            temp_dir = Path('temp')
-            if temp_dir.exists():
-                # 清理字幕文件
-                for temp_file in temp_dir.glob('temp_*_ass.ass'):
-                    if temp_file.exists():
-                        temp_file.unlink()
-                
-                # 清理封面文件
-                for temp_file in temp_dir.glob('temp_*_pic.jpg'):
-                    if temp_file.exists():
-                        temp_file.unlink()
-                        
-                # 如果temp目录为空，也删除目录
-                try:
-                    temp_dir.rmdir()
-                except:
-                    pass  # 目录不为空，保留
+            # 只清理本任务的字幕和封面文件，并发任务的临时文件可能仍在使用
+            ass_path = Path(ass_path)
+            cover_path = ass_path.with_name(ass_path.name.replace('_ass.ass', '_pic.jpg'))
+            for temp_file in (ass_path, cover_path):
+                if temp_file.exists():
+                    temp_file.unlink()
+            
+            # 如果temp目录为空，也删除目录
+            temp_dir = ass_path.parent
+            try:
+                temp_dir.rmdir()
+            except OSError:
+                pass  # 目录不为空，保留
                     
         except Exception as e:
             logger.debug(f"清理临时文件时出错: {e}")
@@ -194,7 +194,10 @@ class AIConfigDialog(tk.Toplevel):
         cancel_btn.pack(side=tk.LEFT, padx=(0, 10))
         
         reset_btn = ttk.Button(button_frame, text="重置", command=self.reset_config)
-        reset_btn.pack(side=tk.LEFT)
+        reset_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        clear_cache_btn = ttk.Button(button_frame, text="清除标题缓存", command=self.clear_title_cache)
+        clear_cache_btn.pack(side=tk.LEFT)
         
         # 主框架列权重
         main_frame.columnconfigure(1, weight=1)
@@ -348,6 +351,12 @@ class AIConfigDialog(tk.Toplevel):
             # 保存配置
             config.save_config()
             
+            # 配置变化后立即允许重新请求AI，不必等熔断冷却结束；
+            # 关闭按旧参数创建的客户端（各自占用一个事件循环线程和连接池），下次请求按新配置创建
+            from utils.ai_client import close_ai_clients, get_circuit_breaker
+            get_circuit_breaker().reset()
+            close_ai_clients()
+            
             messagebox.showinfo("成功", "配置已保存")
             self.destroy()
             
@@ -371,6 +380,16 @@ class AIConfigDialog(tk.Toplevel):
             except Exception as e:
                 messagebox.showerror("错误", f"重置配置失败: {e}")
 
+    def clear_title_cache(self):
+        """清空AI标题缓存"""
+        if messagebox.askyesno("确认", "确定要清除所有已缓存的AI标题吗？\n下次生成时将重新调用AI。"):
+            try:
+                from utils.ai_title_generator import invalidate_title_cache
+                removed = invalidate_title_cache()
+                messagebox.showinfo("成功", f"已清除 {removed} 条标题缓存")
+            except Exception as e:
+                messagebox.showerror("错误", f"清除缓存失败: {e}")
+
 if __name__ == "__main__":
     root = tk.Tk()
     root.withdraw()
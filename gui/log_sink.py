@@ -0,0 +1,95 @@
+"""
+日志输出 - 缓冲、批量写入、行数受限的日志视图
+"""
+
+import logging
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from tkinter import END
+
+
+class BufferedLogSink:
+    """GUI日志接收器
+
+    任意线程都可以调用 write()，消息先进入缓冲队列，
+    由主线程定时批量插入文本框；文本框只保留最近 max_lines 行，
+    完整日志写入滚动日志文件。
+    """
+
+    def __init__(self, root, text_widget, max_lines=2000, flush_interval_ms=200,
+                 log_file="logs/gui.log", max_bytes=5 * 1024 * 1024, backup_count=5):
+        self.root = root
+        self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.flush_interval_ms = flush_interval_ms
+        self._pending = deque()
+        self._running = False
+        self._file_logger = self._create_file_logger(log_file, max_bytes, backup_count)
+
+    @staticmethod
+    def _create_file_logger(log_file, max_bytes, backup_count):
+        """创建只写文件的独立logger，避免重复输出到控制台"""
+        file_logger = logging.getLogger('lrc2video.gui_log')
+        file_logger.propagate = False
+        file_logger.setLevel(logging.INFO)
+        if not file_logger.handlers and log_file:
+            try:
+                Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                              backupCount=backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s'))
+                file_logger.addHandler(handler)
+            except OSError as e:
+                logging.getLogger(__name__).warning(f"无法创建GUI日志文件: {e}")
+        return file_logger
+
+    def write(self, message):
+        """写入一条日志（线程安全）"""
+        # deque的append是原子操作，不需要额外加锁
+        self._pending.append(message)
+        self._file_logger.info(message)
+
+    def start(self):
+        """开始定时刷新（主线程调用）"""
+        if not self._running:
+            self._running = True
+            self.root.after(self.flush_interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        self.flush()
+        if self._running:
+            try:
+                self.root.after(self.flush_interval_ms, self._tick)
+            except Exception:
+                # 窗口已销毁
+                self._running = False
+
+    def flush(self):
+        """把缓冲的消息一次性写入文本框（主线程调用）"""
+        if not self._pending:
+            return
+
+        lines = []
+        try:
+            while True:
+                lines.append(self._pending.popleft())
+        except IndexError:
+            pass
+
+        # 只插入最后 max_lines 行，之前的反正会被裁掉
+        if len(lines) > self.max_lines:
+            lines = lines[-self.max_lines:]
+
+        widget = self.text_widget
+        widget.insert(END, "\n".join(lines) + "\n")
+
+        # 裁剪到最多 max_lines 行（末尾总有一个空行）
+        line_count = int(widget.index('end-1c').split('.')[0]) - 1
+        excess = line_count - self.max_lines
+        if excess > 0:
+            widget.delete('1.0', f'{excess + 1}.0')
+        widget.see(END)
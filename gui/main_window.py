@@ -13,13 +13,28 @@ from tkinter import *
 from tkinter import ttk, filedialog, messagebox, colorchooser
 from tkinter.scrolledtext import ScrolledText
 from .modern_theme import COLORS, FONTS, create_modern_button, create_modern_entry, create_modern_label, create_modern_frame
+from .progress_aggregator import ProgressAggregator
+from .log_sink import BufferedLogSink
+from .virtual_file_list import FileListModel, VirtualFileList
 
-from core.video_generator import VideoGenerator
-from utils.file_utils import scan_folder_for_files
+from core.video_generator import VideoGenerator, EncoderHealth
+from core.batch_journal import BatchJournal
+from core.output_verifier import OutputVerifier
+from utils.file_utils import iter_folder_files
+from utils.title_prefetcher import TitlePrefetcher
+from utils.media_probe import get_track_info, probe_tracks
+from utils.lrc_linter import lint_pairs
+from utils.font_index import get_font_index
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 由界面控件决定的视频配置项；其余项以配置文件为准
+WIDGET_VIDEO_KEYS = frozenset({
+    'font_family', 'font_size', 'font_color', 'outline_width', 'outline_color', 'background_color',
+    'bold', 'italic', 'width', 'height', 'resolution', 'margin_bottom', 'fade_in', 'fade_out', 'concurrency',
+})
+
 class LyricsVideoGenerator:
     def __init__(self, root):
         self.root = root
@@ -36,6 +51,11 @@ class LyricsVideoGenerator:
         
         # 存储文件列表
         self.file_pairs = []  # [(audio_path, lrc_path), ...]
+        self.file_list_model = FileListModel()
+        self.scan_generation = 0  # 每次扫描递增，用于丢弃过期扫描的结果
+        self.title_prefetcher = TitlePrefetcher()  # AI标题在编码前预生成
+        self.track_info = {}  # 扫描阶段读取的曲目信息 {音频路径: TrackInfo}
+        self.broken_lyrics = {}  # 检查不通过的歌词 {歌词路径: LintResult}，批量生成时跳过
         self.debug_files_loaded = 0
         self.output_dir = Path("output")
         self.output_dir.mkdir(exist_ok=True)
@@ -72,6 +92,7 @@ class LyricsVideoGenerator:
         self.current_file_progress = 0
         self.total_files_progress = 0
         self.current_file_name = ""
+        self.progress_aggregator = None
         
         # 配置管理器
         from utils.config_manager import get_config
@@ -94,6 +115,9 @@ class LyricsVideoGenerator:
         self.setup_debug_status_bar()
         logger.info("🎨 主窗口初始化完成")
         
+        # 进入事件循环、窗口显示后再加载较重的模块
+        self.root.after(100, self.deferred_init)
+        
     def setup_ui(self):
         # 设置主题样式
         self.setup_styles()
@@ -172,6 +196,7 @@ class LyricsVideoGenerator:
         settings_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="设置", menu=settings_menu)
         settings_menu.add_command(label="AI标题配置", command=self.open_ai_config)
+        settings_menu.add_command(label="重新检测编码器", command=self.refresh_encoders)
         settings_menu.add_separator()
         settings_menu.add_command(label="首选项", command=self.open_preferences)
         
@@ -372,6 +397,82 @@ class LyricsVideoGenerator:
         )
         self.file_count_label.pack(side=RIGHT, padx=5)
         
+        # AI服务状态（熔断器）
+        self.ai_status_label = Label(
+            status_frame, 
+            text="AI: 正常", 
+            bg='#f0f0f0', 
+            fg='#4CAF50', 
+            font=('Segoe UI', 9)
+        )
+        self.ai_status_label.pack(side=RIGHT, padx=5)
+        
+    def deferred_init(self):
+        """窗口显示之后再做的初始化（主线程）
+
+        AI客户端模块在后台线程预先导入，第一次生成标题时不用再等待；
+        熔断器监听在导入完成后注册。
+        """
+        def warm_up():
+            try:
+                from utils.ai_client import get_circuit_breaker
+                get_circuit_breaker().add_listener(self.on_ai_circuit_state)
+                import utils.ai_title_generator  # noqa: F401
+            except Exception as e:
+                logger.warning(f"⚠️ 预加载AI模块失败: {e}")
+        
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+        threading.Thread(target=self.detect_encoders, name="encoder-probe", daemon=True).start()
+        
+    def detect_encoders(self, refresh=False):
+        """检测可用的编码器（后台线程）
+
+        结果按ffmpeg可执行文件缓存，只有第一次启动、更换ffmpeg或失败结果过期后才会试编码；
+        refresh=True 时忽略缓存（安装驱动、关闭占用显卡的程序后手动重新检测）
+        """
+        try:
+            from utils.encoder_capabilities import get_encoder_capabilities
+            capabilities = get_encoder_capabilities(refresh=refresh)
+        except Exception as e:
+            logger.warning(f"⚠️ 编码器检测失败: {e}")
+            return
+        hardware = [encoder for encoder in capabilities.usable if encoder != 'none']
+        message = f"🎞️ FFmpeg {capabilities.ffmpeg_version or '未知版本'}，可用硬件编码器: {', '.join(hardware) or '无'}"
+        if capabilities.transient:
+            message += f"（{', '.join(capabilities.transient)} 暂时不可用，稍后会重新检测）"
+        try:
+            self.root.after(0, lambda: self.log(message))
+        except Exception:
+            # 窗口已销毁
+            pass
+        
+    def refresh_encoders(self):
+        """菜单：忽略缓存重新检测编码器"""
+        self.log("🔍 正在重新检测编码器...")
+        threading.Thread(target=self.detect_encoders, args=(True,), name="encoder-probe", daemon=True).start()
+        
+    def on_ai_circuit_state(self, state):
+        """熔断器状态变化（可能来自AI客户端线程）"""
+        from utils.ai_client import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CIRCUIT_STATE_NAMES
+        
+        def update():
+            colors = {
+                CIRCUIT_CLOSED: '#4CAF50',
+                CIRCUIT_HALF_OPEN: '#FF9800',
+                CIRCUIT_OPEN: '#F44336',
+            }
+            self.ai_status_label.config(text=f"AI: {CIRCUIT_STATE_NAMES[state]}",
+                                        fg=colors[state])
+        try:
+            self.root.after(0, update)
+        except Exception:
+            # 窗口已销毁
+            return
+        if state == CIRCUIT_OPEN:
+            self.log("⚡ AI服务暂时不可用，已切换为本地标题，冷却后自动重试")
+        elif state == CIRCUIT_CLOSED:
+            self.log("✅ AI服务已恢复")
+        
     def update_debug_status(self, message, level="info"):
         """更新调试状态信息"""
         colors = {
@@ -538,11 +639,14 @@ class LyricsVideoGenerator:
     def save_user_preferences(self):
         """保存用户偏好设置"""
         try:
+            # 先读入其他程序写入配置文件的项，避免用窗口打开时的旧值覆盖
+            self.reload_video_preferences()
+            
             # 获取当前配置
             current_config = self.get_config()
             
-            # 更新用户偏好
-            self.user_preferences['video'] = current_config
+            # 合并到原有的视频配置：界面不管理的项（ffmpeg_path、subtitle_cache_mb、auto_tune 等）不能丢
+            self.user_preferences.setdefault('video', {}).update(current_config)
             
             # 更新会话设置
             self.user_preferences['app']['last_session'] = {
@@ -563,6 +667,21 @@ class LyricsVideoGenerator:
         except Exception as e:
             print(f"保存用户偏好失败: {e}")
 
+    def reload_video_preferences(self):
+        """从配置文件重新读取界面控件不管理的视频配置项
+
+        编码参数（preset/tune/crf/hwaccel/auto_tune 等）没有对应的控件，可能在窗口打开期间
+        被 scripts/tune_encoder.py 写入配置文件；以文件中的值为准，控件管理的项以界面为准
+        """
+        from utils.config_manager import get_config
+        saved = get_config().read_saved('video')
+        if not isinstance(saved, dict):
+            return
+        video = self.user_preferences.setdefault('video', {})
+        for key, value in saved.items():
+            if key not in WIDGET_VIDEO_KEYS:
+                video[key] = value
+
     def auto_save_preferences(self):
         """自动保存偏好设置（延迟保存，避免频繁操作）"""
         if hasattr(self, '_save_timer'):
@@ -647,9 +766,13 @@ class LyricsVideoGenerator:
         create_modern_button(folder_btn_frame, "浏览", self.select_folder).pack(side=LEFT, padx=2)
         create_modern_button(folder_btn_frame, "🔍 扫描", self.scan_folder).pack(side=LEFT, padx=2)
         
-        # 文件列表
-        tree_frame = Frame(batch_frame, bg=COLORS['surface'])
-        tree_frame.pack(fill=BOTH, expand=True, pady=(10, 0))
+        # 文件列表过滤
+        filter_row = Frame(batch_frame, bg=COLORS['surface'])
+        filter_row.pack(fill=X, pady=(10, 0))
+        create_modern_label(filter_row, "🔎 过滤:").pack(side=LEFT)
+        self.file_filter_var = StringVar()
+        create_modern_entry(filter_row, textvariable=self.file_filter_var, width=30).pack(side=LEFT, padx=(10, 5))
+        self.file_filter_var.trace_add('write', lambda *args: self.file_list.set_filter(self.file_filter_var.get()))
         
         # 创建Treeview样式
         style = ttk.Style()
@@ -665,21 +788,10 @@ class LyricsVideoGenerator:
                        relief='flat',
                        font=FONTS['body'])
         
-        self.file_tree = ttk.Treeview(tree_frame, columns=('audio', 'lrc', 'background'), 
-                                    show='headings', height=6, style='Modern.Treeview')
-        self.file_tree.heading('audio', text='🎵 音频文件')
-        self.file_tree.heading('lrc', text='📝 歌词文件')
-        self.file_tree.heading('background', text='🖼️ 背景图片')
-        self.file_tree.column('audio', width=200)
-        self.file_tree.column('lrc', width=200)
-        self.file_tree.column('background', width=150)
-        
-        # 滚动条
-        tree_scroll = ttk.Scrollbar(tree_frame, orient=VERTICAL, command=self.file_tree.yview)
-        self.file_tree.configure(yscrollcommand=tree_scroll.set)
-        
-        self.file_tree.pack(side=LEFT, fill=BOTH, expand=True)
-        tree_scroll.pack(side=RIGHT, fill=Y)
+        # 文件列表（虚拟化，只渲染可见行；点击列标题排序）
+        self.file_list = VirtualFileList(batch_frame, self.file_list_model, visible_rows=6,
+                                         style='Modern.Treeview', bg=COLORS['surface'])
+        self.file_list.pack(fill=BOTH, expand=True, pady=(10, 0))
         
         # 输出目录
         output_frame = self.create_modern_frame(parent, "📤 输出设置")
@@ -694,45 +806,28 @@ class LyricsVideoGenerator:
         create_modern_button(output_row, "浏览", self.select_output_dir).pack(side=LEFT)
         
     def get_system_fonts(self):
-        """获取系统中已安装的字体列表"""
-        try:
-            import matplotlib.font_manager as fm
-            print(f"Fonts: {fm.findSystemFonts()}")
-            # 获取系统中所有字体
-            font_list = fm.findSystemFonts(fontpaths=None, fontext='ttf')
-            
-            # 提取字体名称（去除路径和扩展名）
-            fonts = []
-            for font_path in font_list:
-                try:
-                    font_prop = fm.FontProperties(fname=font_path)
-                    font_name = font_prop.get_name()
-                    if font_name and font_name not in fonts:
-                        fonts.append(font_name)
-                except:
-                    # 如果无法获取字体信息，使用文件名
-                    font_name = os.path.basename(font_path).replace('.ttf', '').replace('.TTF', '')
-                    if font_name and font_name not in fonts:
-                        fonts.append(font_name)
-            
-            # 排序并返回
-            fonts.sort()
-            
-            # 确保包含一些常用中文字体
-            common_fonts = ["Microsoft YaHei", "SimHei", "SimSun", "KaiTi", "FangSong", "Arial", "Times New Roman"]
-            for font in common_fonts:
-                if font not in fonts:
-                    fonts.insert(0, font)
-            
-            return fonts[:60]  # 限制数量避免列表过长
-            
-        except ImportError:
-            # 如果没有matplotlib，返回常用字体列表
-            return ["Microsoft YaHei", "SimHei", "SimSun", "KaiTi", "FangSong", 
-                   "Arial", "Times New Roman", "Helvetica", "Courier New", "宋体", "黑体"]
-        except Exception as e:
-            print(f"获取系统字体失败: {e}")
-            return ["Microsoft YaHei", "SimHei", "Arial", "Times New Roman", "宋体", "黑体"]
+        """获取系统中已安装的字体列表
+
+        字体列表来自磁盘上的字体索引，在后台线程加载/构建；
+        尚未就绪时先返回常用字体，就绪后再刷新下拉框。
+        """
+        common_fonts = ["Microsoft YaHei", "SimHei", "SimSun", "KaiTi", "FangSong", "Arial", "Times New Roman"]
+        font_index = get_font_index()
+        if not font_index.is_ready():
+            font_index.add_listener(lambda: self.root.after(0, self.refresh_font_list))
+            font_index.start()
+            return common_fonts
+        
+        fonts = font_index.family_names()
+        # 常用字体放在最前面（已安装的才列出）
+        installed = {font.lower() for font in fonts}
+        preferred = [font for font in common_fonts if font.lower() in installed]
+        return preferred + [font for font in fonts if font not in preferred] or common_fonts
+    
+    def refresh_font_list(self):
+        """字体索引就绪后更新字体下拉框（主线程）"""
+        if getattr(self, 'font_combo', None) is not None:
+            self.font_combo.config(values=self.get_system_fonts())
 
     def setup_style_page(self, parent):
         """设置现代化样式页面"""
@@ -778,7 +873,7 @@ class LyricsVideoGenerator:
         font_row = Frame(font_frame, bg=COLORS['surface'])
         font_row.pack(fill=X, pady=8)
         create_modern_label(font_row, "字体:").pack(side=LEFT)
-        font_combo = ttk.Combobox(font_row, textvariable=self.font_family, 
+        font_combo = self.font_combo = ttk.Combobox(font_row, textvariable=self.font_family, 
                                  values=system_fonts,
                                  state="readonly", width=20, font=FONTS['body'])
         font_combo.pack(side=LEFT, padx=(10, 5))
@@ -966,6 +1061,11 @@ class LyricsVideoGenerator:
         self.current_file_var = StringVar(value="无")
         Label(current_file_frame, textvariable=self.current_file_var, bg='white', fg='#007bff').pack(side=LEFT, padx=10)
         
+        # 批量模式下所有进行中的任务
+        self.active_jobs_list = Listbox(progress_frame, height=4, bg='white', fg='#333333',
+                                        relief='flat', highlightthickness=0, activestyle='none')
+        self.active_jobs_list.pack(fill=X, pady=(0, 5))
+        
         # 当前文件进度
         current_progress_frame = Frame(progress_frame, bg='white')
         current_progress_frame.pack(fill=X, pady=5)
@@ -997,6 +1097,13 @@ class LyricsVideoGenerator:
         self.log_text = ScrolledText(progress_frame, height=15, wrap=WORD)
         self.log_text.pack(fill=BOTH, expand=True, pady=10)
         
+        # 日志先缓冲再批量写入，文本框行数受限，完整日志写入滚动文件
+        self.log_sink = BufferedLogSink(
+            self.root, self.log_text,
+            max_lines=self.config_manager.get('app.log_max_lines', 2000)
+        )
+        self.log_sink.start()
+        
     def select_audio(self):
         filename = filedialog.askopenfilename(
             title="选择音频文件",
@@ -1043,71 +1150,140 @@ class LyricsVideoGenerator:
         if not folder_path:
             messagebox.showwarning("警告", "请先选择文件夹")
             return
+        if not os.path.isdir(folder_path):
+            messagebox.showerror("错误", "文件夹不存在")
+            return
         
         # 清空现有列表
-        for item in self.file_tree.get_children():
-            self.file_tree.delete(item)
-        self.file_pairs.clear()
-        
-        try:
-            file_pairs, missing_files = scan_folder_for_files(folder_path)
-            self.file_pairs = file_pairs
-            
-            # 显示找到的配对文件
-            for audio_file, lrc_file in file_pairs:
-                # 检查对应的背景图片
-                bg_image = "无"
-                for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                    bg_file = audio_file.parent / f"{audio_file.stem}{ext}"
-                    if bg_file.exists():
-                        bg_image = bg_file.name
-                        break
+        self.scan_generation += 1
+        generation = self.scan_generation
+        self.file_list_model.clear()
+        self.file_list.refresh()
+        self.file_pairs = []
+        self.track_info = {}
+        self.broken_lyrics = {}
+        self.update_debug_status("正在扫描文件夹...", "info")
+        
+        # 后台线程遍历目录，主线程定时刷新列表；
+        # 遍历完成即发布配对列表（可以开始批量生成），读取标签和检查歌词在之后继续进行
+        scan_state = {'listed': False, 'probed': False, 'done': False, 'error': None,
+                      'probing': False, 'linting': False, 'broken': {}}
+        published = {'listed': False, 'probed': False}
+        
+        def scan_worker():
+            try:
+                for entries in iter_folder_files(folder_path):
+                    if generation != self.scan_generation:
+                        return  # 已开始新的扫描
+                    self.file_list_model.extend(entries)
+                scan_state['listed'] = True
                 
-                if bg_image == "无":
-                    for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                        bg_file = lrc_file.parent / f"{lrc_file.stem}{ext}"
-                        if bg_file.exists():
-                            bg_image = bg_file.name
-                            break
+                # 读取歌词/音频标签中的歌名和歌手（有缓存，重复扫描很快）
+                scan_state['probing'] = True
+                pairs = [(entry.audio, entry.lrc) for entry in self.file_list_model.valid_entries()]
+                track_info = probe_tracks(pairs, should_stop=lambda: generation != self.scan_generation)
+                if generation == self.scan_generation:
+                    self.track_info = track_info
+                scan_state['probed'] = True
                 
-                self.file_tree.insert('', 'end', values=(audio_file.name, lrc_file.name, bg_image))
-            
-            # 显示缺少歌词的文件
-            for audio_file in missing_files:
-                self.file_tree.insert('', 'end', values=(audio_file.name, "未找到匹配的歌词文件", "-"), tags=('missing',))
-            
-            self.file_tree.tag_configure('missing', background='#ffcccc')
-            
-            self.log(f"扫描完成：找到 {len(file_pairs)} 个有效的音频-歌词配对，{len(missing_files)} 个文件缺少歌词")
-            self.update_debug_status(f"扫描完成: {len(file_pairs)}个有效文件", "success")
-            
-            # 显示详细的文件配对信息
-            if file_pairs:
-                self.log("\n📋 文件配对详情：")
-                for i, (audio_file, lrc_file) in enumerate(file_pairs, 1):
-                    bg_info = "无背景图片"
-                    for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                        bg_file = audio_file.parent / f"{audio_file.stem}{ext}"
-                        if bg_file.exists():
-                            bg_info = f"使用背景: {bg_file.name}"
-                            break
-                    
-                    if bg_info == "无背景图片":
-                        for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                            bg_file = lrc_file.parent / f"{lrc_file.stem}{ext}"
-                            if bg_file.exists():
-                                bg_info = f"使用背景: {bg_file.name}"
-                                break
-                    
-                    self.log(f"  {i}. {audio_file.name} ↔ {lrc_file.name} ({bg_info})")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"扫描文件夹时出错：{str(e)}")
+                # 检查歌词文件（结果记录在曲库索引中，未变化的文件不会重复检查），
+                # 检查完成后从配对列表中移除不可用的，已开始的批量生成也会跳过它们
+                from utils.config_manager import get_config
+                if get_config().get("lyrics.lint_on_scan", True):
+                    scan_state['linting'] = True
+                    results = lint_pairs(pairs, check_audio=False, workers=1,
+                                         should_stop=lambda: generation != self.scan_generation)
+                    scan_state['broken'] = {result.lrc: result for result in results if result.broken}
+            except Exception as e:
+                scan_state['error'] = e
+            finally:
+                scan_state['done'] = True
+        
+        def poll_scan():
+            if generation != self.scan_generation:
+                return
+            self.file_list.refresh()
+            self.file_count_label.config(text=f"文件: {self.file_list_model.total_count()}")
+            if scan_state['listed'] and not published['listed']:
+                published['listed'] = True
+                self.on_scan_listed()
+            if scan_state['probed'] and not published['probed']:
+                published['probed'] = True
+                # 标签读取完成后开始预生成AI标题，与歌词检查和之后的编码重叠
+                if self.file_pairs and self.is_ai_enabled():
+                    self.prefetch_titles(self.file_pairs)
+            if scan_state['done']:
+                self.on_scan_finished(scan_state['error'], scan_state['broken'], published['listed'])
+            else:
+                if scan_state['linting']:
+                    self.update_debug_status("正在检查歌词文件...", "info")
+                elif scan_state['probing']:
+                    self.update_debug_status("正在读取歌曲标签...", "info")
+                self.root.after(100, poll_scan)
+        
+        threading.Thread(target=scan_worker, daemon=True).start()
+        self.root.after(100, poll_scan)
+    
+    def on_scan_listed(self):
+        """目录遍历完成：发布配对列表（主线程）"""
+        valid_entries = self.file_list_model.valid_entries()
+        self.file_pairs = [(entry.audio, entry.lrc) for entry in valid_entries]
+        missing_count = self.file_list_model.missing_count()
+        self.title_prefetcher.reset()
+        
+        self.log(f"扫描完成：找到 {len(self.file_pairs)} 个音频-歌词配对，{missing_count} 个文件缺少歌词")
+        self.update_debug_status(f"找到 {len(self.file_pairs)} 个配对，正在读取标签和检查歌词...", "info")
+        
+        # 显示详细的文件配对信息（大文件夹只列出前面部分，完整列表见文件列表）
+        if self.file_pairs:
+            max_listed = 100
+            self.log("\n📋 文件配对详情：")
+            for i, entry in enumerate(valid_entries[:max_listed], 1):
+                bg_info = f"使用背景: {entry.background.name}" if entry.background else "无背景图片"
+                self.log(f"  {i}. {entry.audio.name} ↔ {entry.lrc.name} ({bg_info})")
+            if len(self.file_pairs) > max_listed:
+                self.log(f"  ... 其余 {len(self.file_pairs) - max_listed} 个配对请在文件列表中查看")
+    
+    def on_scan_finished(self, error=None, broken=None, listed=True):
+        """读取标签和检查歌词结束后的汇总（主线程）"""
+        if error is not None and not listed:
+            messagebox.showerror("错误", f"扫描文件夹时出错：{str(error)}")
             self.update_debug_status("扫描失败", "error")
-            logger.error(f"扫描文件夹失败: {e}")
+            logger.error(f"扫描文件夹失败: {error}")
+            return
+        if error is not None:
+            # 配对列表已发布，读取标签或检查歌词失败不影响生成
+            self.log(f"⚠️ 读取标签或检查歌词时出错：{error}")
+            logger.error(f"扫描后处理失败: {error}")
+        
+        broken = broken or {}
+        self.broken_lyrics = broken
+        if broken:
+            self.file_pairs = [(audio_path, lrc_path) for audio_path, lrc_path in self.file_pairs
+                               if str(lrc_path) not in broken]
+            self.log(f"⚠️ {len(broken)} 个歌词文件有问题，已跳过（可用 scripts/lint_lrc.py 查看详情或修复）：")
+            for result in list(broken.values())[:20]:
+                reasons = "；".join(issue.message for issue in result.issues if issue.severity == 'error')
+                self.log(f"  ❌ {Path(result.lrc).name}: {reasons}")
+            if len(broken) > 20:
+                self.log(f"  ... 其余 {len(broken) - 20} 个")
+        self.update_debug_status(f"扫描完成: {len(self.file_pairs)}个有效文件", "success")
             
+    def prefetch_titles(self, file_pairs):
+        """提交AI标题预生成任务（已提交的不会重复）"""
+        artist = self.get_config().get('artist', None)
+        self.title_prefetcher.prefetch([self.get_title_key(audio_path, lrc_path, artist)
+                                        for audio_path, lrc_path in file_pairs])
+    
+    def get_title_key(self, audio_path, lrc_path, default_artist=None):
+        """标题生成用的 (歌名, 歌手)：优先取歌词/音频标签，其次是文件名"""
+        info = self.track_info.get(audio_path) or get_track_info(audio_path, lrc_path)
+        return info.title, info.artist or default_artist
+        
     def get_config(self):
         width, height = self.resolution.get().split('x')
+        # 编码参数来自保存的视频偏好（样式页不提供这些控件）
+        video_prefs = self.user_preferences.get('video', {})
         return {
             'font_family': self.font_family.get(),
             'font_size': self.font_size.get(),
@@ -1127,6 +1303,19 @@ class LyricsVideoGenerator:
             'shadow_color': '#000000',
             'shadow_offset': 2,
             'concurrency': self.concurrency_var.get(),
+            'preset': video_prefs.get('preset', 'medium'),
+            'tune': video_prefs.get('tune', 'film'),
+            'crf': video_prefs.get('crf', 23),
+            'hwaccel': video_prefs.get('hwaccel', video_prefs.get('hardware_acceleration', 'none')),
+            'encoder_fallback_chain': video_prefs.get('encoder_fallback_chain'),
+            'thread_count': video_prefs.get('thread_count', 0),
+            'verify_output': video_prefs.get('verify_output', True),
+            'verify_tolerance': video_prefs.get('verify_tolerance', 1.0),
+            'verify_sample_frames': video_prefs.get('verify_sample_frames', 0),
+            'stage_fonts': video_prefs.get('stage_fonts', True),
+            'cjk_fallback_font': video_prefs.get('cjk_fallback_font'),
+            'adaptive_crf': video_prefs.get('adaptive_crf', False),
+            'adaptive_crf_target': video_prefs.get('adaptive_crf_target', 0.985),
             'artist': None  # 可以从文件名解析艺术家信息
         }
         
@@ -1242,9 +1431,8 @@ class LyricsVideoGenerator:
             self.concurrency_var.set(min(8, max(1, config['concurrency'])))
 
     def log(self, message):
-        self.log_text.insert(END, f"{message}\n")
-        self.log_text.see(END)
-        self.root.update_idletasks()
+        """写入日志（可在任意线程调用）"""
+        self.log_sink.write(message)
         
     def update_progress(self, current, total, message=""):
         """更新进度回调函数"""
@@ -1287,17 +1475,7 @@ class LyricsVideoGenerator:
             import os
             os.environ['OPENAI_API_KEY'] = self.openai_api_key.get()
         
-        # 使用AI标题时，先生成标题再构造输出路径
-        if ai_enabled:
-            from utils.ai_title_generator import generate_video_title
-            song_name = Path(audio_path).stem
-            artist = config.get('artist', None)
-            ai_title = generate_video_title(song_name, artist)
-            # 清理文件名中的特殊字符
-            safe_title = "".join(c for c in ai_title if c.isalnum() or c in (' ', '-', '_', '.', '《', '》', '【', '】', '（', '）', '！', '？', '~')).rstrip()
-            output_path = self.output_dir / f"{safe_title}.mp4"
-        else:
-            output_path = self.output_dir / f"{Path(audio_path).stem}.mp4"
+        default_output_path = self.output_dir / f"{Path(audio_path).stem}.mp4"
         
         # 更新UI状态
         self.single_generate_btn.config(state=DISABLED)
@@ -1319,11 +1497,20 @@ class LyricsVideoGenerator:
 
         def generate():
             try:
-                # 创建新的视频生成器实例
+                # 使用AI标题时，先生成标题再构造输出路径（在工作线程中，不阻塞界面）
+                output_path = default_output_path
+                if ai_enabled:
+                    self.root.after(0, lambda: self.status_var.set("AI标题生成中..."))
+                    ai_title = self.title_prefetcher.get(*self.get_title_key(Path(audio_path), lrc_path, config.get('artist', None)))
+                    # 清理文件名中的特殊字符
+                    safe_title = "".join(c for c in ai_title if c.isalnum() or c in (' ', '-', '_', '.', '《', '》', '【', '】', '（', '）', '！', '？', '~')).rstrip()
+                    output_path = self.output_dir / f"{safe_title}.mp4"
+                
+                # 创建新的视频生成器实例（标题已生成，不再重复调用AI）
                 generator = VideoGenerator(progress_callback)
                 success, result = generator.generate_video(
                     audio_path, lrc_path, config, bg_image_path, output_path, 
-                    use_ai_title=ai_enabled
+                    use_ai_title=False
                 )
                 if success:
                     self.log(f"✅ 视频生成成功：{result}")
@@ -1352,6 +1539,9 @@ class LyricsVideoGenerator:
             messagebox.showwarning("警告", "没有找到有效的文件配对，请先扫描文件夹")
             return
             
+        # 使用配置文件中最新的编码参数（可能刚运行过调优脚本）
+        self.reload_video_preferences()
+        
         # 重置视频生成器的停止标志
         self.video_generator.set_stop_flag(False)
         
@@ -1361,6 +1551,10 @@ class LyricsVideoGenerator:
         self.total_progress_bar['maximum'] = len(self.file_pairs)
         self.total_progress_bar['value'] = 0
         
+        # 工作线程的进度更新先汇总，再以固定帧率刷新界面
+        self.progress_aggregator = ProgressAggregator(self.root, self.render_batch_progress, fps=10)
+        self.progress_aggregator.start()
+        
         def batch_generate():
             import os
             from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -1376,19 +1570,48 @@ class LyricsVideoGenerator:
             if ai_enabled and self.openai_api_key.get():
                 os.environ['OPENAI_API_KEY'] = self.openai_api_key.get()
             
+            # 确保所有标题都已提交预生成（扫描后才启用AI的情况）
+            if ai_enabled:
+                self.prefetch_titles(self.file_pairs)
+            
             # 使用用户配置的并发度
             max_workers = min(8, max(1, config.get('concurrency', 2)))
             self.log(f"🚀 启动并发处理，使用 {max_workers} 个线程")
             
+            # 本批次共享的编码器健康状态，故障编码器对后续任务不再使用
+            encoder_health = EncoderHealth()
+            self.apply_encoder_capabilities(config, encoder_health)
+            
+            # 批次日志与输出校验（校验在独立的小线程池中运行，不占编码名额）
+            journal = BatchJournal()
+            verifier = None
+            verify_futures = {}
+            if config.get('verify_output', True):
+                verifier = OutputVerifier(
+                    max_workers=2,
+                    tolerance=config.get('verify_tolerance', 1.0),
+                    sample_frames=config.get('verify_sample_frames', 0),
+                    journal=journal
+                )
+            self.log(f"📒 批次日志: {journal.path}")
+            
             # 创建线程池执行器
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # 提交所有任务
                 future_to_file = {}
                 
+                skipped_count = 0
                 for i, (audio_path, lrc_path) in enumerate(self.file_pairs):
                     if self.video_generator.stop_flag:
                         break
                     
+                    # 批量生成开始后才检查完的歌词：不可用的直接跳过
+                    if str(lrc_path) in self.broken_lyrics:
+                        skipped_count += 1
+                        journal.record('skip', audio=audio_path, reason="歌词文件检查未通过")
+                        self.log(f"⏭️ [{i+1}/{total_files}] {audio_path.name} 歌词文件有问题，已跳过")
+                        continue
+                    
                     output_path = self.output_dir / f"{audio_path.stem}.mp4"
                     
                     # 检查是否有同名背景图片（在音频文件所在目录查找）
@@ -1410,12 +1633,13 @@ class LyricsVideoGenerator:
                     # 提交任务到线程池
                     future = executor.submit(
                         self.process_single_file,
-                        audio_path, lrc_path, config, bg_image_path, output_path, i+1, total_files
+                        audio_path, lrc_path, config, bg_image_path, output_path, i+1, total_files,
+                        encoder_health
                     )
                     future_to_file[future] = (audio_path, i+1)
                 
-                # 收集结果
-                completed = 0
+                # 收集结果（跳过的计入已完成）
+                completed = skipped_count
                 for future in as_completed(future_to_file):
                     if self.video_generator.stop_flag:
                         # 取消未完成的任务
@@ -1427,16 +1651,38 @@ class LyricsVideoGenerator:
                     
                     try:
                         success, result = future.result()
+                        journal.record('encode', audio=audio_path, success=success, result=result)
                         if success:
                             success_count += 1
                             self.log(f"✅ [{file_num}/{total_files}] {audio_path.name} 生成成功")
+                            if verifier is not None:
+                                verify_futures[verifier.submit(result, audio_path)] = (audio_path, file_num)
                         else:
                             self.log(f"❌ [{file_num}/{total_files}] {audio_path.name} 生成失败：{result}")
                     except Exception as e:
+                        journal.record('encode', audio=audio_path, success=False, result=str(e))
                         self.log(f"❌ [{file_num}/{total_files}] {audio_path.name} 处理异常：{str(e)}")
                     
                     completed += 1
-                    self.update_total_progress(completed, total_files)
+                    self.progress_aggregator.set_total(completed, total_files)
+            
+            # 汇总校验结果
+            verified_count = 0
+            if verifier is not None:
+                for future, (audio_path, file_num) in verify_futures.items():
+                    try:
+                        report = future.result()
+                    except Exception as e:
+                        report = {'ok': False, 'errors': [str(e)]}
+                    if report['ok']:
+                        verified_count += 1
+                    else:
+                        self.log(f"⚠️ [{file_num}/{total_files}] {audio_path.name} 校验未通过：{'; '.join(report['errors'])}")
+                verifier.shutdown()
+                self.log(f"🔎 输出校验：通过 {verified_count}/{len(verify_futures)}")
+            
+            for encoder, reason in encoder_health.get_unhealthy().items():
+                self.log(f"⚠️ 编码器 {encoder} 在本批次中出现故障已停用：{reason}")
             
             # 完成后更新UI
             if not self.video_generator.stop_flag:
@@ -1445,18 +1691,56 @@ class LyricsVideoGenerator:
             else:
                 self.log("❌ 批量生成已停止")
             
+            self.progress_aggregator.stop()
             self.batch_generate_btn.config(state=NORMAL)
             self.stop_btn.config(state=DISABLED)
             self.current_file_var.set("无")
         
         threading.Thread(target=batch_generate, daemon=True).start()
     
-    def process_single_file(self, audio_path, lrc_path, config, bg_image_path, output_path, file_num, total_files):
+    def render_batch_progress(self, snapshot):
+        """在主线程中刷新批量进度（由ProgressAggregator按帧率调用）"""
+        jobs = snapshot['jobs']
+        
+        self.active_jobs_list.delete(0, END)
+        for _, label, percent, message in jobs:
+            self.active_jobs_list.insert(END, f"{label}  {percent}%  {message}")
+        
+        if jobs:
+            average = sum(job[2] for job in jobs) // len(jobs)
+            self.current_file_var.set(f"{len(jobs)} 个任务进行中")
+            self.current_file_progress_var.set(f"{average}%")
+            self.current_file_progress_bar['value'] = average
+        else:
+            self.current_file_var.set("无")
+        
+        if snapshot['total']:
+            self.update_total_progress(*snapshot['total'])
+    
+    def apply_encoder_capabilities(self, config, encoder_health):
+        """按缓存的编码器检测结果，预先停用本批次编码器链中试编码失败的编码器
+
+        只读缓存，不启动ffmpeg；还没有检测结果时由运行时故障转移处理
+        """
+        try:
+            from utils.encoder_capabilities import get_encoder_capabilities
+            capabilities = get_encoder_capabilities(probe=False)
+        except Exception as e:
+            logger.warning(f"⚠️ 读取编码器检测结果失败: {e}")
+            return
+        if capabilities is None:
+            return
+        chain = config.get('encoder_fallback_chain') or [config.get('hwaccel', 'none')]
+        for encoder in chain:
+            # 临时故障（会话数已满等）现在可能已恢复，交给运行时故障转移
+            if encoder != 'none' and not capabilities.is_usable(encoder) and encoder not in capabilities.transient:
+                encoder_health.mark_unhealthy(encoder, f"试编码未通过: {capabilities.errors.get(encoder, '')}")
+    
+    def process_single_file(self, audio_path, lrc_path, config, bg_image_path, output_path, file_num, total_files, encoder_health=None):
         """处理单个文件的包装函数"""
         try:
             # 创建独立的视频生成器实例（线程安全）
             from core.video_generator import VideoGenerator
-            from utils.ai_title_generator import generate_video_title
             
             # 记录使用的文件路径，确保每个文件使用正确的资源
             print(f"📝 处理文件 {file_num}/{total_files}:")
@@ -1471,9 +1755,9 @@ class LyricsVideoGenerator:
             final_output_path = output_path
             if ai_enabled:
                 try:
-                    song_name = audio_path.stem
-                    artist = config.get('artist', None)
-                    ai_title = generate_video_title(song_name, artist)
+                    song_name, artist = self.get_title_key(audio_path, lrc_path, config.get('artist', None))
+                    # 标题由预取阶段生成，通常此时已经就绪
+                    ai_title = self.title_prefetcher.get(song_name, artist)
                     # 清理文件名中的特殊字符，但保留中文符号
                     safe_title = "".join(c for c in ai_title if c.isalnum() or c in (' ', '-', '_', '.', '《', '》', '【', '】', '（', '）', '！', '？', '~')).rstrip()
                     final_output_path = output_path.parent / f"{safe_title}.mp4"
@@ -1485,34 +1769,23 @@ class LyricsVideoGenerator:
             else:
                 print(f"   输出: {final_output_path}")
             
+            job_label = f"[{file_num}/{total_files}] {audio_path.name}"
+            
             def progress_callback(current, total, message=""):
-                # 使用after方法确保线程安全地更新GUI
-                def update_gui():
-                    progress_percent = int((current / total) * 100) if total > 0 else 0
-                    self.current_file_progress_var.set(f"{progress_percent}%")
-                    self.current_file_progress_bar['value'] = progress_percent
-                    
-                    # 更新状态信息
-                    if message:
-                        self.current_file_var.set(f"[{file_num}/{total_files}] {audio_path.name} - {message}")
-                    else:
-                        self.current_file_var.set(f"[{file_num}/{total_files}] {audio_path.name} ({progress_percent}%)")
-                
-                # 使用after方法在主线程中更新GUI
-                try:
-                    self.root.after(0, update_gui)
-                except:
-                    # 如果root已被销毁，直接返回
-                    pass
+                # 只记录最新状态，由进度聚合器在主线程中按帧率刷新
+                progress_percent = int((current / total) * 100) if total > 0 else 0
+                self.progress_aggregator.update(file_num, job_label, progress_percent, message)
             
-            generator = VideoGenerator(progress_callback)
+            generator = VideoGenerator(progress_callback, encoder_health=encoder_health)
             return generator.generate_video(
                 audio_path, lrc_path, config, bg_image_path, final_output_path,
-                use_ai_title=ai_enabled
+                use_ai_title=False
             )
             
         except Exception as e:
             return False, str(e)
+        finally:
+            self.progress_aggregator.finish(file_num)
         
     def stop_generation(self):
         self.video_generator.set_stop_flag(True)
@@ -1525,6 +1798,14 @@ class LyricsVideoGenerator:
             # 保存用户偏好设置
             self.save_user_preferences()
             
+            from utils.ai_client import close_ai_clients, get_circuit_breaker
+            get_circuit_breaker().remove_listener(self.on_ai_circuit_state)
+            
+            # 停止标题预取（取消排队的批次），再关闭共享AI客户端（取消进行中的请求、关闭连接池和事件循环线程），
+            # 否则退出时要等预取线程里的AI请求超时
+            self.title_prefetcher.shutdown()
+            close_ai_clients()
+            
             # 设置停止标志
             self.video_generator.set_stop_flag(True)
             
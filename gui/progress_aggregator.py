@@ -0,0 +1,81 @@
+"""
+进度聚合器 - 合并多线程的进度回调，按固定帧率刷新界面
+"""
+
+import threading
+
+
+class ProgressAggregator:
+    """收集每个任务的最新进度，在Tk主线程中定时统一刷新
+
+    工作线程只调用 update()/finish()/set_total()，这些方法只写内存状态；
+    界面刷新由 root.after 定时器在主线程中完成，每帧最多一次回调。
+    """
+
+    def __init__(self, root, render, fps=10):
+        """
+        Args:
+            root: Tk根窗口
+            render: 刷新回调，接收快照 {'jobs': [...], 'total': (完成数, 总数) 或 None}
+            fps: 每秒刷新次数
+        """
+        self.root = root
+        self.render = render
+        self.interval_ms = max(16, int(1000 / fps))
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._total = None
+        self._dirty = False
+        self._running = False
+        self._after_id = None
+
+    def update(self, job_id, label, percent, message=""):
+        """记录任务的最新进度（任意线程）"""
+        with self._lock:
+            self._jobs[job_id] = (label, percent, message)
+            self._dirty = True
+
+    def finish(self, job_id):
+        """任务结束，从活动列表移除（任意线程）"""
+        with self._lock:
+            if self._jobs.pop(job_id, None) is not None:
+                self._dirty = True
+
+    def set_total(self, completed, total):
+        """记录总体进度（任意线程）"""
+        with self._lock:
+            self._total = (completed, total)
+            self._dirty = True
+
+    def start(self):
+        """开始定时刷新（主线程调用）"""
+        with self._lock:
+            self._jobs.clear()
+            self._total = None
+            self._dirty = True
+        self._running = True
+        self._schedule()
+
+    def stop(self):
+        """停止刷新，停止前会再刷新一帧（任意线程）"""
+        self._running = False
+
+    def _schedule(self):
+        try:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+        except Exception:
+            # 窗口已销毁
+            self._running = False
+
+    def _tick(self):
+        with self._lock:
+            dirty = self._dirty
+            self._dirty = False
+            snapshot = {
+                'jobs': [(job_id,) + state for job_id, state in sorted(self._jobs.items())],
+                'total': self._total,
+            }
+        if dirty:
+            self.render(snapshot)
+        if self._running:
+            self._schedule()
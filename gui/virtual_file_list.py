@@ -0,0 +1,188 @@
+"""
+虚拟化文件列表 - 支持数万条记录的批量文件列表
+只为可见行创建Treeview条目，排序和过滤都在数据模型上完成
+"""
+
+import threading
+from tkinter import Frame, VERTICAL, LEFT, RIGHT, BOTH, Y
+from tkinter import ttk
+
+# 列定义：(列名, 标题, 宽度)
+FILE_LIST_COLUMNS = (
+    ('audio', '🎵 音频文件', 200),
+    ('lrc', '📝 歌词文件', 200),
+    ('background', '🖼️ 背景图片', 150),
+)
+
+
+def entry_display_values(entry):
+    """ScanEntry -> 界面显示的列值"""
+    if entry.lrc is None:
+        return (entry.audio.name, "未找到匹配的歌词文件", "-")
+    background = entry.background.name if entry.background else "无"
+    return (entry.audio.name, entry.lrc.name, background)
+
+
+class FileListModel:
+    """文件列表数据模型
+
+    扫描线程通过 extend() 追加条目，界面只按需读取可见范围。
+    过滤和排序结果惰性计算，数据变化后在下一次读取时重建。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = []
+        self._view = None           # 过滤/排序后的行索引，None表示需要重建
+        self._filter_text = ""
+        self._sort_column = None
+        self._sort_reverse = False
+
+    def clear(self):
+        with self._lock:
+            self._rows = []
+            self._view = None
+
+    def extend(self, entries):
+        """追加扫描结果（任意线程）"""
+        with self._lock:
+            self._rows.extend(entries)
+            self._view = None
+
+    def set_filter(self, text):
+        with self._lock:
+            self._filter_text = text.strip().lower()
+            self._view = None
+
+    def sort_by(self, column):
+        """按列排序，再次点击同一列则反向"""
+        with self._lock:
+            if self._sort_column == column:
+                self._sort_reverse = not self._sort_reverse
+            else:
+                self._sort_column = column
+                self._sort_reverse = False
+            self._view = None
+
+    def _ensure_view(self):
+        # 调用方需持有锁
+        if self._view is not None:
+            return self._view
+        indices = range(len(self._rows))
+        if self._filter_text:
+            text = self._filter_text
+            indices = [i for i in indices
+                       if any(text in value.lower() for value in entry_display_values(self._rows[i]))]
+        if self._sort_column is not None:
+            column = [c[0] for c in FILE_LIST_COLUMNS].index(self._sort_column)
+            rows = self._rows
+            indices = sorted(indices,
+                             key=lambda i: entry_display_values(rows[i])[column].lower(),
+                             reverse=self._sort_reverse)
+        self._view = list(indices)
+        return self._view
+
+    def row_count(self):
+        """过滤后的可见行数"""
+        with self._lock:
+            return len(self._ensure_view())
+
+    def get_rows(self, start, count):
+        """获取过滤/排序后 [start, start+count) 范围的条目"""
+        with self._lock:
+            view = self._ensure_view()
+            return [self._rows[i] for i in view[start:start + count]]
+
+    def total_count(self):
+        with self._lock:
+            return len(self._rows)
+
+    def valid_entries(self):
+        """所有有歌词的条目，保持扫描顺序"""
+        with self._lock:
+            return [entry for entry in self._rows if entry.lrc]
+
+    def missing_count(self):
+        with self._lock:
+            return sum(1 for entry in self._rows if entry.lrc is None)
+
+
+class VirtualFileList(Frame):
+    """只渲染可见行的文件列表
+
+    Treeview 中始终只有 visible_rows 个条目，滚动时复用这些条目
+    并从模型中取对应范围的数据填充。
+    """
+
+    def __init__(self, parent, model, visible_rows=6, style='Modern.Treeview', **kwargs):
+        super().__init__(parent, **kwargs)
+        self.model = model
+        self.visible_rows = visible_rows
+        self.offset = 0
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in FILE_LIST_COLUMNS],
+                                 show='headings', height=visible_rows, style=style,
+                                 selectmode='browse')
+        for column, title, width in FILE_LIST_COLUMNS:
+            self.tree.heading(column, text=title, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width)
+        self.tree.tag_configure('missing', background='#ffcccc')
+
+        self.scrollbar = ttk.Scrollbar(self, orient=VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+
+        # 预先创建固定数量的行，之后只更新内容
+        self._slots = [self.tree.insert('', 'end', values=('', '', '')) for _ in range(visible_rows)]
+
+        for widget in (self.tree, self.scrollbar):
+            widget.bind('<MouseWheel>', self._on_mousewheel)
+            widget.bind('<Button-4>', lambda e: self.scroll(-1))
+            widget.bind('<Button-5>', lambda e: self.scroll(1))
+        self.refresh()
+
+    def refresh(self):
+        """根据当前偏移量重新填充可见行"""
+        total = self.model.row_count()
+        max_offset = max(0, total - self.visible_rows)
+        self.offset = min(max(0, self.offset), max_offset)
+
+        rows = self.model.get_rows(self.offset, self.visible_rows)
+        for slot, index in zip(self._slots, range(self.visible_rows)):
+            if index < len(rows):
+                entry = rows[index]
+                tags = ('missing',) if entry.lrc is None else ()
+                self.tree.item(slot, values=entry_display_values(entry), tags=tags)
+            else:
+                self.tree.item(slot, values=('', '', ''), tags=())
+
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_rows) / total)
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.refresh()
+
+    def sort_by(self, column):
+        self.model.sort_by(column)
+        self.offset = 0
+        self.refresh()
+
+    def set_filter(self, text):
+        self.model.set_filter(text)
+        self.offset = 0
+        self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(value) * self.model.row_count())
+        elif action == 'scroll':
+            step = self.visible_rows if unit == 'pages' else 1
+            self.offset += int(value) * step
+        self.refresh()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+        return 'break'
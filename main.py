@@ -7,6 +7,7 @@
 import sys
 import os
 import logging
+import importlib.util
 from datetime import datetime
 from pathlib import Path
 from tkinter import Tk, messagebox
@@ -43,7 +44,7 @@ print(f"🐍 Python版本: {sys.version}")
 print("=" * 60)
 
 def print_system_info():
-    """打印系统信息"""
+    """打印系统信息（窗口显示后调用；依赖只检查是否安装，不导入）"""
     try:
         import platform
         print(f"💻 系统: {platform.system()} {platform.release()}")
@@ -52,13 +53,12 @@ def print_system_info():
         
         # 检查关键依赖
         dependencies = [
-            'tkinter', 'openai', 'pysubs2'
+            'tkinter', 'openai'
         ]
         for dep in dependencies:
-            try:
-                __import__(dep)
+            if importlib.util.find_spec(dep) is not None:
                 print(f"✅ {dep}: 已安装")
-            except ImportError:
+            else:
                 print(f"❌ {dep}: 未安装")
                 
     except Exception as e:
@@ -69,9 +69,6 @@ def main():
     logger.info("🚀 启动歌词视频生成器")
     
     try:
-        # 打印系统信息
-        print_system_info()
-        
         # 检查必要目录
         required_dirs = ['config', 'output', 'logs', 'style_templates']
         for dir_name in required_dirs:
@@ -131,6 +128,9 @@ def main():
         app = LyricsVideoGenerator(root)
         logger.info("✅ 应用初始化完成")
         
+        # 系统信息不影响界面，窗口显示后再打印
+        root.after(200, print_system_info)
+        
         # 优雅退出处理
         def on_closing():
             if messagebox.askokcancel("退出", "确定要退出程序吗？"):
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI标题生成压测脚本
+默认启动内置的模拟AI服务（scripts/mock_llm_server.py），通过与界面相同的
+TitlePrefetcher → generate_video_titles 路径生成大量标题，统计吞吐和每批延迟分位数。
+超时、重试、并发、限速和批量都通过 ai.* 配置传入（只改内存，不写回配置文件），
+熔断阈值默认沿用配置值。
+
+示例：
+    python scripts/ai_load_test.py --tracks 1000 --concurrency 8 --client-rpm 600
+    python scripts/ai_load_test.py --tracks 1000 --batch-size 1 --error-rate 0.05 --rate-limit-rate 0.05
+    python scripts/ai_load_test.py --tracks 200 --base-url http://127.0.0.1:8765/v1   # 使用外部服务
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+
+from mock_llm_server import add_server_arguments, server_options, start_server
+
+LOAD_TEST_PROVIDER = 'load_test'
+
+
+def percentile(values, p):
+    """最近秩法计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def configure(args, base_url):
+    """只修改内存中的配置，不写回配置文件"""
+    from utils.config_manager import get_config
+    config = get_config()
+    config.set(f'ai.providers.{LOAD_TEST_PROVIDER}', {
+        'api_key': 'mock-key', 'base_url': base_url, 'model': args.model,
+    })
+    config.set('ai.provider', LOAD_TEST_PROVIDER)
+    config.set('ai.timeout', args.timeout)
+    config.set('ai.max_retries', args.retries)
+    config.set('ai.concurrency', args.concurrency)
+    config.set('ai.requests_per_minute', args.client_rpm)
+    config.set('ai.batch_size', args.batch_size)
+    config.set('ai.cache.enabled', False)
+    if args.breaker_threshold is not None:
+        config.set('ai.circuit_breaker.failure_threshold', args.breaker_threshold)
+
+
+def run(args):
+    from utils.ai_client import CIRCUIT_OPEN, close_ai_clients, get_circuit_breaker
+    from utils.ai_title_generator import generate_video_titles, get_default_title
+    from utils.title_prefetcher import TitlePrefetcher
+
+    latencies = []
+    latencies_lock = threading.Lock()
+    breaker_opens = []
+
+    def timed_batch(tracks):
+        start = time.perf_counter()
+        try:
+            return generate_video_titles(tracks)
+        finally:
+            with latencies_lock:
+                latencies.append(time.perf_counter() - start)
+
+    def on_breaker_state(state):
+        if state == CIRCUIT_OPEN:
+            breaker_opens.append(state)
+
+    breaker = get_circuit_breaker()
+    breaker.add_listener(on_breaker_state)
+    prefetcher = TitlePrefetcher(batch_func=timed_batch)
+    tracks = [(f"测试歌曲{i:05d}", None) for i in range(args.tracks)]
+    try:
+        start = time.perf_counter()
+        prefetcher.prefetch(tracks)
+        titles = [prefetcher.get(*track) for track in tracks]
+        elapsed = time.perf_counter() - start
+    finally:
+        breaker.remove_listener(on_breaker_state)
+        prefetcher.shutdown()
+        close_ai_clients()
+
+    # 本地标题对同一首歌是确定的，与之相同说明AI失败或熔断后回退了
+    failed = sum(1 for track, title in zip(tracks, titles) if title == get_default_title(*track))
+    return {
+        'elapsed': elapsed,
+        'titles': len(titles),
+        'failed': failed,
+        'latencies': latencies,
+        'breaker_state': breaker.state,
+        'breaker_opens': len(breaker_opens),
+        'breaker_threshold': breaker.failure_threshold,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI标题生成压测（模拟服务）")
+    parser.add_argument('--tracks', type=int, default=500, help="歌曲数量")
+    parser.add_argument('--concurrency', type=int, default=8, help="ai.concurrency")
+    parser.add_argument('--client-rpm', type=int, default=600, help="ai.requests_per_minute（0为不限）")
+    parser.add_argument('--batch-size', type=int, default=10, help="ai.batch_size（1为逐首请求）")
+    parser.add_argument('--timeout', type=float, default=30, help="ai.timeout，单次请求超时（秒）")
+    parser.add_argument('--retries', type=int, default=3, help="ai.max_retries，最大重试次数")
+    parser.add_argument('--breaker-threshold', type=int, default=None,
+                        help="ai.circuit_breaker.failure_threshold（默认沿用配置）")
+    parser.add_argument('--model', default='mock-model')
+    parser.add_argument('--base-url', default=None, help="使用已运行的服务，不启动内置模拟服务")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = start_server(**server_options(args))
+        base_url = server.base_url
+
+    try:
+        configure(args, base_url)
+        result = run(args)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    latencies = result['latencies']
+    print("=" * 50)
+    print(f"歌曲: {args.tracks}  并发: {args.concurrency}  "
+          f"限速: {args.client_rpm or '不限'}/分钟  批量: {args.batch_size}")
+    print(f"耗时: {result['elapsed']:.2f}s  吞吐: {result['titles'] / result['elapsed']:.1f} 标题/秒")
+    print(f"失败（回退本地标题）: {result['failed']}")
+    print(f"每批延迟（含排队和重试）p50: {percentile(latencies, 50):.3f}s  p95: {percentile(latencies, 95):.3f}s  "
+          f"p99: {percentile(latencies, 99):.3f}s  (共 {len(latencies)} 批)")
+    print(f"熔断: 阈值 {result['breaker_threshold']}  打开 {result['breaker_opens']} 次  "
+          f"结束时状态 {result['breaker_state']}")
+    if server is not None:
+        stats = server.stats
+        print(f"服务端: 请求 {stats['requests']}  成功 {stats['ok']}  500 {stats['errors']}  "
+              f"429 {stats['rate_limited']}  截断 {stats['truncated']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LRC解析微基准
+生成一批模拟歌词文件（UTF-8/GBK混合、多时间戳行、offset标签），
+比较旧的逐行正则 + 多次重读编码的解析方式与 utils/lrc_parser 的耗时。
+
+示例：
+    python scripts/bench_lrc_parser.py --files 2000 --lines 80
+    python scripts/bench_lrc_parser.py --corpus D:/Music    # 使用真实歌词目录
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.lrc_parser import parse_lrc_file
+
+LYRIC_WORDS = ["晴天", "故事的小黄花", "从出生那年就飘着", "童年的荡秋千", "随记忆一直晃到现在",
+               "刮风这天", "我试过握着你手", "但偏偏", "雨渐渐", "大到我看你不见"]
+
+
+def legacy_parse(lrc_path):
+    """旧实现：逐个编码重读整个文件，每行用未编译的正则匹配两次，只取第一个时间戳"""
+    try:
+        with open(lrc_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        for enc in ['gbk', 'gb2312', 'latin-1', 'cp1252']:
+            try:
+                with open(lrc_path, 'r', encoding=enc) as f:
+                    content = f.read()
+                break
+            except UnicodeDecodeError:
+                continue
+    lines = []
+    time_pattern = r'\[(\d{1,2}):(\d{1,2})(?:\.(\d{1,3}))?\]'
+    for line in content.splitlines():
+        matches = list(re.finditer(time_pattern, line))
+        text = re.sub(time_pattern, '', line).strip()
+        if matches and text:
+            m, s, cs = map(int, matches[0].groups(default='0'))
+            lines.append(((m * 60 + s) * 1000 + cs * 10, text))
+    return lines
+
+
+def create_corpus(work_dir, count, line_count, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        rows = [f"[ti:测试歌曲{i}]", "[ar:测试歌手]", "[offset:+120]"]
+        t = 0.0
+        for _ in range(line_count):
+            t += rng.uniform(2, 6)
+            stamps = f"[{int(t // 60):02d}:{t % 60:05.2f}]"
+            if rng.random() < 0.2:
+                # 副歌重复出现的多时间戳行
+                t2 = t + rng.uniform(60, 90)
+                stamps += f"[{int(t2 // 60):02d}:{t2 % 60:06.3f}]"
+            rows.append(stamps + rng.choice(LYRIC_WORDS))
+        encoding = 'gbk' if i % 3 == 0 else 'utf-8'
+        path = work_dir / f"song_{i:05d}.lrc"
+        path.write_bytes("\n".join(rows).encode(encoding))
+        paths.append(path)
+    return paths
+
+
+def run(label, func, paths, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total_lines = 0
+        for path in paths:
+            result = func(path)
+            total_lines += len(result.lines if hasattr(result, 'lines') else result)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<10} {best * 1000:9.1f} ms  {len(paths) / best:10.0f} 文件/秒  {total_lines} 行")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LRC解析微基准")
+    parser.add_argument('--files', type=int, default=1000, help="生成的歌词文件数")
+    parser.add_argument('--lines', type=int, default=60, help="每个文件的歌词行数")
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数（取最快一次）")
+    parser.add_argument('--corpus', default=None, help="使用已有的歌词目录（递归查找 .lrc）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='lrc2video_lrc_bench_') as tmp:
+        if args.corpus:
+            paths = sorted(Path(args.corpus).rglob('*.lrc'))
+        else:
+            paths = create_corpus(Path(tmp), args.files, args.lines)
+        print(f"文件数: {len(paths)}")
+        legacy = run("旧解析", legacy_parse, paths, args.repeat)
+        fast = run("新解析", parse_lrc_file, paths, args.repeat)
+        print(f"加速: {legacy / fast:.2f}x（新解析展开了多时间戳行，行数会更多）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量调度压测脚本
+使用 fake_ffmpeg.py 代替真实编码，测量 VideoGenerator 批量调度的吞吐、
+失败重试和取消行为。
+
+示例：
+    python scripts/bench_scheduler.py --jobs 2000 --workers 8 --speed 100000
+    python scripts/bench_scheduler.py --jobs 200 --hwaccel nvenc --fail-encoders h264_nvenc
+    python scripts/bench_scheduler.py --jobs 200 --fail-rate 0.1 --partial-rate 0.05 --verify
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+SAMPLE_LRC = """[ti:bench]
+[00:01.00]第一行歌词
+[00:05.50]第二行歌词
+[00:10.00]第三行歌词
+"""
+
+
+def setup_fake_ffmpeg(args):
+    """通过环境变量切换到fake ffmpeg"""
+    fake = str(PROJECT_ROOT / 'scripts' / 'fake_ffmpeg.py')
+    os.environ['LRC2VIDEO_FFMPEG'] = f'"{sys.executable}" -S "{fake}"'
+    os.environ['LRC2VIDEO_FFPROBE'] = f'"{sys.executable}" -S "{fake}" --ffprobe'
+    os.environ['FAKE_FFMPEG_SPEED'] = str(args.speed)
+    os.environ['FAKE_FFMPEG_DURATION'] = str(args.duration)
+    os.environ['FAKE_FFMPEG_FAIL_RATE'] = str(args.fail_rate)
+    os.environ['FAKE_FFMPEG_HANG_RATE'] = str(args.hang_rate)
+    os.environ['FAKE_FFMPEG_PARTIAL_RATE'] = str(args.partial_rate)
+    os.environ['FAKE_FFMPEG_FAIL_ENCODERS'] = args.fail_encoders
+
+
+def create_jobs(work_dir, count):
+    """生成占位音频和歌词文件"""
+    jobs = []
+    for i in range(count):
+        audio = work_dir / f"song_{i:05d}.mp3"
+        lrc = work_dir / f"song_{i:05d}.lrc"
+        audio.write_bytes(b'FAKEAUDIO')
+        lrc.write_text(SAMPLE_LRC, encoding='utf-8')
+        jobs.append((audio, lrc))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量调度压测（fake ffmpeg）")
+    parser.add_argument('--jobs', type=int, default=500, help="任务数量")
+    parser.add_argument('--workers', type=int, default=4, help="并发线程数")
+    parser.add_argument('--speed', type=float, default=100000, help="模拟编码速度（实时倍数）")
+    parser.add_argument('--duration', type=float, default=180, help="模拟音频时长（秒）")
+    parser.add_argument('--hwaccel', default='none', help="编码器类型 none/nvenc/qsv/amf")
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--partial-rate', type=float, default=0.0)
+    parser.add_argument('--fail-encoders', default='', help="总是失败的编码器，如 h264_nvenc")
+    parser.add_argument('--cancel-after', type=float, default=0, help="N秒后发出取消（0为不取消）")
+    parser.add_argument('--verify', action='store_true', help="启用输出校验阶段")
+    args = parser.parse_args()
+
+    setup_fake_ffmpeg(args)
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    from core.video_generator import VideoGenerator, EncoderHealth
+    from core.output_verifier import OutputVerifier
+
+    with tempfile.TemporaryDirectory(prefix='lrc2video_bench_') as tmp:
+        work_dir = Path(tmp)
+        os.chdir(work_dir)  # 临时文件写入 ./temp
+        jobs = create_jobs(work_dir, args.jobs)
+        output_dir = work_dir / 'output'
+        output_dir.mkdir()
+
+        config = {'hwaccel': args.hwaccel, 'width': 1280, 'height': 720}
+        encoder_health = EncoderHealth()
+        generators = []
+        verifier = OutputVerifier(max_workers=2) if args.verify else None
+
+        def run_job(audio, lrc):
+            generator = VideoGenerator(encoder_health=encoder_health)
+            generators.append(generator)
+            output = output_dir / f"{audio.stem}.mp4"
+            return generator.generate_video(audio, lrc, config, None, output, use_ai_title=False)
+
+        start = time.perf_counter()
+        results = {'ok': 0, 'failed': 0, 'cancelled': 0}
+        verify_futures = []
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(run_job, audio, lrc) for audio, lrc in jobs]
+            if args.cancel_after > 0:
+                def cancel():
+                    for future in futures:
+                        future.cancel()
+                    for generator in list(generators):
+                        generator.set_stop_flag(True)
+                # 不能提交到同一个线程池，否则会排在所有任务之后
+                threading.Timer(args.cancel_after, cancel).start()
+            for future in as_completed(futures):
+                if future.cancelled():
+                    results['cancelled'] += 1
+                    continue
+                success, message = future.result()
+                if success:
+                    results['ok'] += 1
+                    if verifier is not None:
+                        verify_futures.append(verifier.submit(message))
+                elif message == "操作已取消":
+                    results['cancelled'] += 1
+                else:
+                    results['failed'] += 1
+        elapsed = time.perf_counter() - start
+
+        verify_failed = 0
+        if verifier is not None:
+            verify_failed = sum(1 for f in verify_futures if not f.result()['ok'])
+            verifier.shutdown()
+
+    print("=" * 50)
+    print(f"任务数: {args.jobs}  并发: {args.workers}  编码器: {args.hwaccel}")
+    print(f"耗时: {elapsed:.2f}s  吞吐: {args.jobs / elapsed * 60:.0f} 任务/分钟")
+    print(f"成功: {results['ok']}  失败: {results['failed']}  取消: {results['cancelled']}")
+    if args.verify:
+        print(f"校验未通过: {verify_failed}")
+    unhealthy = encoder_health.get_unhealthy()
+    if unhealthy:
+        print(f"停用的编码器: {', '.join(unhealthy)}")
+
+
+if __name__ == "__main__":
+    main()
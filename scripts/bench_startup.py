@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准
+用 python -X importtime 在新进程中导入界面模块，统计导入总耗时和最慢的模块，
+并与 scripts/startup_budget.json 中记录的预算比较：
+超出耗时预算，或启动时导入了不应导入的重量级模块（openai、pysubs2 等）时返回非0。
+
+示例：
+    python scripts/bench_startup.py                  # 默认导入 gui.main_window，取5次中位数
+    python scripts/bench_startup.py --runs 10 --top 30
+    python scripts/bench_startup.py --module core.video_generator
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+
+# import time:       self [us] |   cumulative | imported package
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def measure(module):
+    """在新进程中导入模块，返回 {模块名: (自身微秒, 累计微秒, 层级)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return modules
+
+
+def load_budget():
+    try:
+        with open(BUDGET_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    budget = load_budget()
+    parser = argparse.ArgumentParser(description="启动耗时基准（-X importtime）")
+    parser.add_argument('--module', default=budget.get('module', 'gui.main_window'), help="要导入的模块")
+    parser.add_argument('--runs', type=int, default=5, help="运行次数（取中位数）")
+    parser.add_argument('--top', type=int, default=15, help="列出累计耗时最多的模块数")
+    args = parser.parse_args()
+
+    totals = []
+    modules = {}
+    for _ in range(args.runs):
+        modules = measure(args.module)
+        if args.module not in modules:
+            print(f"❌ 输出中没有 {args.module}（可能已被其他模块提前导入）")
+            return 2
+        totals.append(modules[args.module][1] / 1000)
+    total_ms = statistics.median(totals)
+
+    print(f"📦 导入 {args.module}: 中位数 {total_ms:.1f} ms（{args.runs} 次: "
+          + ", ".join(f"{t:.0f}" for t in totals) + "）")
+    print(f"   共导入 {len(modules)} 个模块，累计耗时最多的（最后一次运行）：")
+    for name, (self_us, cumulative_us, level) in sorted(
+            modules.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms  {'  ' * level}{name}")
+
+    failed = False
+    max_ms = budget.get('max_import_ms')
+    if max_ms is not None:
+        if total_ms > max_ms:
+            print(f"❌ 超出预算: {total_ms:.1f} ms > {max_ms} ms")
+            failed = True
+        else:
+            print(f"✅ 预算内: {total_ms:.1f} ms <= {max_ms} ms")
+    loaded = sorted(name for name in budget.get('forbidden_modules', [])
+                    if any(m == name or m.startswith(name + '.') for m in modules))
+    if loaded:
+        print(f"❌ 启动时不应导入: {', '.join(loaded)}")
+        failed = True
+    elif budget.get('forbidden_modules'):
+        print(f"✅ 未导入重量级模块: {', '.join(budget['forbidden_modules'])}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FFmpeg/FFprobe 测试替身
+模拟真实的进度输出、生成占位输出文件，并可注入失败、卡死和截断写入，
+用于在没有真实编码的情况下测试和压测批量调度。
+
+启用方式（环境变量或配置文件 video.ffmpeg_path / video.ffprobe_path）：
+    LRC2VIDEO_FFMPEG="python scripts/fake_ffmpeg.py"
+    LRC2VIDEO_FFPROBE="python scripts/fake_ffmpeg.py --ffprobe"
+
+行为控制（环境变量）：
+    FAKE_FFMPEG_SPEED           编码速度，相对实时的倍数（默认 50，libx264 再按预设缩放）
+    FAKE_FFMPEG_DURATION        音频输入的模拟时长，秒（默认 180）
+    FAKE_FFMPEG_FAIL_RATE       随机失败概率 0-1（默认 0）
+    FAKE_FFMPEG_FAIL_ENCODERS   总是失败的编码器，逗号分隔，如 h264_nvenc
+    FAKE_FFMPEG_HANG_RATE       卡死概率 0-1，卡死后只能被终止（默认 0）
+    FAKE_FFMPEG_PARTIAL_RATE    写入截断文件但返回成功的概率 0-1（默认 0）
+    FAKE_FFMPEG_SEED            随机种子，便于复现
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# 占位输出文件的标记头，fake ffprobe 据此返回输出文件的时长和流信息
+FAKE_MEDIA_MAGIC = "LRC2VIDEO-FAKE-MEDIA\n"
+
+FAKE_ENCODERS_LIST = """Encoders:
+ V..... = Video
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ V....D h264_qsv             H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (Intel Quick Sync Video acceleration) (codec h264)
+ V....D h264_amf             AMD AMF H.264 Encoder (codec h264)
+"""
+
+# libx264 各预设相对 medium 的编码速度
+PRESET_SPEED = {
+    'ultrafast': 4.0, 'superfast': 3.0, 'veryfast': 2.5, 'faster': 1.8, 'fast': 1.4,
+    'medium': 1.0, 'slow': 0.6, 'slower': 0.35, 'veryslow': 0.2,
+}
+
+ENCODER_ERRORS = {
+    'h264_nvenc': "[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: incompatible client key (21): (no details)",
+    'h264_qsv': "[h264_qsv @ 0x0] Error creating a MFX session: -9.",
+    'h264_amf': "[h264_amf @ 0x0] AMF failed to initialise on the given D3D11 device: 1.",
+}
+
+
+def env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def read_fake_media(path):
+    """读取占位文件，非占位文件返回None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.readline() != FAKE_MEDIA_MAGIC:
+                return None
+            return json.loads(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+    except ValueError:
+        # 截断写入的文件
+        return {'corrupt': True}
+
+
+def option_value(args, name):
+    """获取最后一次出现的选项值"""
+    value = None
+    for i, arg in enumerate(args[:-1]):
+        if arg == name:
+            value = args[i + 1]
+    return value
+
+
+def input_files(args):
+    inputs = []
+    for i, arg in enumerate(args[:-1]):
+        if arg == '-i':
+            inputs.append(args[i + 1])
+    return inputs
+
+
+def format_time(seconds):
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{int(h):02d}:{int(m):02d}:{s:05.2f}"
+
+
+def run_ffprobe(args):
+    """模拟ffprobe，支持项目中用到的几种输出格式"""
+    target = args[-1] if args else ''
+    if not Path(target).exists():
+        print(f"{target}: No such file or directory", file=sys.stderr)
+        return 1
+
+    media = read_fake_media(target)
+    if media is None:
+        media = {'duration': env_float('FAKE_FFMPEG_DURATION', 180.0),
+                 'streams': ['audio'], 'tags': {}}
+    elif media.get('corrupt'):
+        print(f"{target}: Invalid data found when processing input", file=sys.stderr)
+        return 1
+
+    duration = media['duration']
+    output_format = option_value(args, '-of') or ''
+    entries = option_value(args, '-show_entries') or ''
+
+    if output_format == 'json':
+        streams = [{'codec_type': kind, 'duration': f"{duration:.6f}", 'bit_rate': '192000'}
+                   for kind in media['streams']]
+        result = {'format': {'duration': f"{duration:.6f}", 'bit_rate': '192000',
+                             'tags': media.get('tags', {})},
+                  'streams': streams}
+        print(json.dumps(result))
+    elif 'bit_rate' in entries:
+        print('192000')
+    else:
+        print(f"{duration:.6f}")
+    return 0
+
+
+def fake_quality(media, metric):
+    """按占位文件记录的编码参数估算画质：crf越大画质越低，-qp 0 为无损"""
+    if media.get('qp') == '0':
+        return 1.0 if metric == 'ssim' else float('inf')
+    crf = float(media.get('crf') or 23)
+    if media.get('encoder', 'libx264') != 'libx264':
+        crf = 24.0
+    ssim = 1 - (crf / 100) ** 2 * 0.25
+    if media.get('tune') == 'stillimage':
+        ssim += 0.001
+    return ssim if metric == 'ssim' else 60 - crf * 0.8
+
+
+def run_quality_filter(args, metric):
+    """模拟 ssim/psnr 滤镜的汇总输出"""
+    inputs = input_files(args)
+    media = read_fake_media(inputs[0]) if inputs else None
+    if not media or media.get('corrupt'):
+        print(f"{inputs[0] if inputs else 'input'}: Invalid data found when processing input", file=sys.stderr)
+        return 1
+    value = fake_quality(media, metric)
+    if metric == 'ssim':
+        print(f"[Parsed_ssim_0 @ 0x0] SSIM Y:{value:.6f} (20.0) U:{value:.6f} (20.0) "
+              f"V:{value:.6f} (20.0) All:{value:.6f} (20.0)", file=sys.stderr)
+    else:
+        print(f"[Parsed_psnr_0 @ 0x0] PSNR y:{value:.2f} u:{value:.2f} v:{value:.2f} "
+              f"average:{value:.2f} min:{value:.2f} max:{value:.2f}", file=sys.stderr)
+    return 0
+
+
+def run_ffmpeg(args):
+    """模拟ffmpeg编码过程"""
+    if '-version' in args:
+        print("ffmpeg version 6.1-fake Copyright (c) 2000-2023 the FFmpeg developers")
+        return 0
+    if '-encoders' in args:
+        print(FAKE_ENCODERS_LIST)
+        return 0
+
+    rng = random.Random(os.getenv('FAKE_FFMPEG_SEED') or None)
+
+    # 输入检查（与真实ffmpeg一致，文件缺失立即失败）
+    for path in input_files(args):
+        if path.startswith(('color=', 'testsrc')):
+            continue
+        if not Path(path).exists():
+            print(f"{path}: No such file or directory", file=sys.stderr)
+            return 1
+    filter_graph = option_value(args, '-filter_complex') or option_value(args, '-vf') or ''
+    for metric in ('ssim', 'psnr'):
+        if (option_value(args, '-lavfi') or '').endswith(metric):
+            return run_quality_filter(args, metric)
+    if 'subtitles=' in filter_graph:
+        subtitles = filter_graph.split('subtitles=', 1)[1].split('[', 1)[0].split(':', 1)[0]
+        if subtitles and not Path(subtitles).exists():
+            print(f"[Parsed_subtitles_0 @ 0x0] Unable to open {subtitles}", file=sys.stderr)
+            return 1
+
+    encoder = option_value(args, '-c:v') or option_value(args, '-vcodec') or 'libx264'
+    fail_encoders = {e.strip() for e in os.getenv('FAKE_FFMPEG_FAIL_ENCODERS', '').split(',') if e.strip()}
+    if encoder in fail_encoders:
+        print(ENCODER_ERRORS.get(encoder, f"[{encoder} @ 0x0] Error while opening encoder"), file=sys.stderr)
+        print("Error initializing output stream 0:0 -- Error while opening encoder for output stream #0:0",
+              file=sys.stderr)
+        return 1
+
+    output = args[-1] if args else '-'
+    duration = float(option_value(args, '-t') or env_float('FAKE_FFMPEG_DURATION', 180.0))
+    if '-frames:v' in args:
+        duration = min(duration, 0.04 * int(option_value(args, '-frames:v')))
+
+    # 封面提取：音频里没有图片时真实ffmpeg也会失败，这里直接写占位图
+    if '-an' in args and option_value(args, '-vcodec') == 'copy':
+        Path(output).write_bytes(b'FAKEJPEG')
+        return 0
+
+    speed = max(env_float('FAKE_FFMPEG_SPEED', 50.0), 0.001)
+    if encoder == 'libx264':
+        speed *= PRESET_SPEED.get(option_value(args, '-preset') or 'medium', 1.0)
+    wall_time = duration / speed
+    steps = max(1, min(100, int(wall_time / 0.05)))
+    fail_at = steps // 2 if rng.random() < env_float('FAKE_FFMPEG_FAIL_RATE', 0.0) else None
+    hang_at = steps // 3 if rng.random() < env_float('FAKE_FFMPEG_HANG_RATE', 0.0) else None
+    partial = rng.random() < env_float('FAKE_FFMPEG_PARTIAL_RATE', 0.0)
+
+    print("Input #0, mp3, from 'input':", file=sys.stderr)
+    print(f"  Duration: {format_time(duration)}, start: 0.000000, bitrate: 192 kb/s", file=sys.stderr)
+    print(f"Stream mapping:\n  Stream #0:0 -> #0:0 (rawvideo (native) -> h264 ({encoder}))", file=sys.stderr)
+    sys.stderr.flush()
+
+    for step in range(1, steps + 1):
+        time.sleep(wall_time / steps)
+        if hang_at is not None and step == hang_at:
+            while True:
+                time.sleep(3600)
+        if fail_at is not None and step == fail_at:
+            print("[aac @ 0x0] Error submitting frame: Generic error in an external library", file=sys.stderr)
+            print("Conversion failed!", file=sys.stderr)
+            return 1
+        position = duration * step / steps
+        frame = int(position * 25)
+        print(f"frame={frame:5d} fps={25 * speed:.0f} q=28.0 size={frame * 4:8d}kB "
+              f"time={format_time(position)} bitrate= 1000.0kbits/s speed={speed:.3g}x",
+              end='\r', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+
+    if output != '-':
+        payload = json.dumps({'duration': duration, 'streams': ['video', 'audio'],
+                              'encoder': encoder, 'preset': option_value(args, '-preset'),
+                              'tune': option_value(args, '-tune'), 'crf': option_value(args, '-crf'),
+                              'qp': option_value(args, '-qp')})
+        if partial:
+            payload = payload[:len(payload) // 2]
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(FAKE_MEDIA_MAGIC + payload)
+    return 0
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == '--ffprobe':
+        return run_ffprobe(args[1:])
+    if 'ffprobe' in Path(sys.argv[0]).name:
+        return run_ffprobe(args)
+    return run_ffmpeg(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量检查/修复LRC歌词
+扫描音乐文件夹中的 音频-歌词 配对，用多进程检查编码、时间戳顺序、重叠行和超出音频时长的歌词，
+结果写入曲库索引（cache/library_index.json），界面扫描时会自动排除有问题的配对。
+
+示例：
+    python scripts/lint_lrc.py D:/Music
+    python scripts/lint_lrc.py D:/Music --fix                # 自动修复，原文件备份为 .lrc.bak
+    python scripts/lint_lrc.py D:/Music --no-audio --workers 8
+    python scripts/lint_lrc.py D:/Music --report lint.json   # 输出完整的JSON报告
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.file_utils import iter_folder_files
+from utils.library_index import get_library_index
+from utils.lrc_linter import lint_pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量检查/修复LRC歌词")
+    parser.add_argument('folder', help="音乐文件夹（递归扫描）")
+    parser.add_argument('--fix', action='store_true', help="自动修复可修复的问题")
+    parser.add_argument('--no-audio', action='store_true', help="不用ffprobe检查音频时长")
+    parser.add_argument('--workers', type=int, default=None, help="进程数（默认CPU核数）")
+    parser.add_argument('--force', action='store_true', help="忽略曲库索引中的记录，全部重新检查")
+    parser.add_argument('--report', default=None, help="把所有检查结果写入JSON文件")
+    parser.add_argument('--quiet', action='store_true', help="只输出汇总")
+    args = parser.parse_args()
+
+    folder = Path(args.folder)
+    if not folder.is_dir():
+        print(f"❌ 文件夹不存在: {folder}")
+        return 2
+
+    pairs = [(entry.audio, entry.lrc) for entries in iter_folder_files(folder)
+             for entry in entries if entry.lrc]
+    print(f"📁 找到 {len(pairs)} 个音频-歌词配对")
+    if not pairs:
+        return 0
+
+    step = max(1, len(pairs) // 100)
+
+    def progress(done, total):
+        if done % step == 0 or done == total:
+            print(f"\r🔍 检查进度: {done}/{total}", end="", flush=True)
+
+    index = get_library_index()
+    start = time.perf_counter()
+    results = lint_pairs(pairs, check_audio=not args.no_audio, fix=args.fix,
+                         workers=args.workers, force=args.force, index=index, progress=progress)
+    elapsed = time.perf_counter() - start
+    print()
+    index.prune()
+    index.save()
+
+    codes = Counter()
+    for result in results:
+        codes.update(issue.code for issue in result.issues)
+        if not args.quiet and result.issues:
+            mark = "❌" if result.broken else ("🔧" if result.fixed else "⚠️")
+            print(f"{mark} {result.lrc}")
+            for issue in result.issues:
+                print(f"     [{issue.code}] {issue.message}")
+
+    broken = sum(1 for result in results if result.broken)
+    fixed = sum(1 for result in results if result.fixed)
+    warned = sum(1 for result in results if result.issues and not result.broken)
+    print("=" * 50)
+    print(f"检查: {len(results)}  耗时: {elapsed:.2f}s  ({len(results) / max(elapsed, 1e-9):.0f} 个/秒)")
+    print(f"✅ 正常: {len(results) - broken - warned}  ⚠️ 警告: {warned}  ❌ 不可用: {broken}  🔧 已修复: {fixed}")
+    if codes:
+        print("问题统计: " + ", ".join(f"{code}={count}" for code, count in codes.most_common()))
+    if broken:
+        print("不可用的配对已记录到曲库索引，界面扫描时会自动排除")
+
+    if args.report:
+        report = [{"lrc": result.lrc, "audio": result.audio, "broken": result.broken,
+                   "fixed": result.fixed, "encoding": result.encoding, "lines": result.line_count,
+                   "duration": result.duration, "issues": [issue._asdict() for issue in result.issues]}
+                  for result in results]
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 报告已写入: {args.report}")
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
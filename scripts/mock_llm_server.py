@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟的 OpenAI 兼容对话接口
+用于在没有网络和API费用的情况下测试、压测AI标题生成。
+
+支持 POST /v1/chat/completions 和 GET /v1/models：
+- 单首请求返回一个标题
+- 批量请求（提示词中带歌曲列表JSON）返回 [{"id", "title"}] 数组
+
+示例：
+    python scripts/mock_llm_server.py --port 8765 --latency 0.3 --error-rate 0.05 --rpm 300
+    然后把AI提供商的 base_url 设为 http://127.0.0.1:8765/v1
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 批量提示词中的歌曲列表（见 utils/ai_title_generator.BATCH_TITLE_PROMPT_TEMPLATE）
+SONGS_JSON_PATTERN = re.compile(r'(\[\{.*?\}\])\s*\n', re.S)
+SONG_NAME_PATTERN = re.compile(r'《(.+?)》')
+
+TITLE_SUFFIXES = ["前奏一响就是整个青春", "副歌一出直接头皮发麻", "单曲循环停不下来",
+                  "多少人的意难平", "这就是现场的魅力"]
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """模拟服务器，行为参数和请求统计都挂在服务器对象上"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.2, jitter=0.1, error_rate=0.0,
+                 rate_limit_rate=0.0, rpm=0, truncate_rate=0.0, seed=None):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm = rpm
+        self.truncate_rate = truncate_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent_requests = deque()
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0, 'truncated': 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def check_rate_limit(self):
+        """返回 None 表示放行，否则返回建议的 Retry-After 秒数"""
+        with self.lock:
+            if self.rate_limit_rate and self.random.random() < self.rate_limit_rate:
+                return 1.0
+            if not self.rpm:
+                return None
+            now = time.monotonic()
+            while self.recent_requests and now - self.recent_requests[0] > 60:
+                self.recent_requests.popleft()
+            if len(self.recent_requests) >= self.rpm:
+                return max(0.1, 60 - (now - self.recent_requests[0]))
+            self.recent_requests.append(now)
+            return None
+
+    def roll(self, rate):
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+
+def build_reply(prompt, truncate=False):
+    """根据提示词生成回复内容"""
+    match = SONGS_JSON_PATTERN.search(prompt)
+    if match:
+        songs = json.loads(match.group(1))
+        items = [{"id": song["id"],
+                  "title": f"【{song['song']}】{TITLE_SUFFIXES[song['id'] % len(TITLE_SUFFIXES)]}"}
+                 for song in songs]
+        content = json.dumps(items, ensure_ascii=False)
+        # 模拟输出token不够时被截断的JSON
+        return (content[:len(content) // 2], "length") if truncate else (content, "stop")
+    name = SONG_NAME_PATTERN.search(prompt)
+    song = name.group(1) if name else "未知歌曲"
+    return f"【{song}】{TITLE_SUFFIXES[len(song) % len(TITLE_SUFFIXES)]}", "stop"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {"object": "list",
+                                  "data": [{"id": "mock-model", "object": "model", "owned_by": "mock"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        server.count('requests')
+        retry_after = server.check_rate_limit()
+        if retry_after is not None:
+            server.count('rate_limited')
+            self._send_json(429, {"error": {"message": "rate limit exceeded", "type": "rate_limit"}},
+                            headers={'Retry-After': f"{retry_after:.2f}"})
+            return
+
+        time.sleep(server.delay())
+
+        if server.roll(server.error_rate):
+            server.count('errors')
+            self._send_json(500, {"error": {"message": "mock internal error", "type": "server_error"}})
+            return
+
+        messages = request.get('messages') or [{}]
+        prompt = messages[-1].get('content', '')
+        truncate = server.roll(server.truncate_rate)
+        content, finish_reason = build_reply(prompt, truncate)
+        server.count('truncated' if finish_reason == 'length' else 'ok')
+        self._send_json(200, {
+            "id": f"mock-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get('model', 'mock-model'),
+            "choices": [{
+                "index": 0,
+                "finish_reason": finish_reason,
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {"prompt_tokens": len(prompt), "completion_tokens": len(content),
+                      "total_tokens": len(prompt) + len(content)},
+        })
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """在后台线程中启动服务器，返回服务器对象（port=0 时自动分配端口）"""
+    server = MockLLMServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='mock-llm', daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.2, help="平均响应延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.1, help="延迟随机波动（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回500的概率")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="随机返回429的概率")
+    parser.add_argument('--rpm', type=int, default=0, help="服务端每分钟请求上限，超出返回429（0为不限）")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="批量回复被截断的概率")
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def server_options(args):
+    return {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'rate_limit_rate': args.rate_limit_rate, 'rpm': args.rpm,
+            'truncate_rate': args.truncate_rate, 'seed': args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 OpenAI 兼容接口")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), **server_options(args))
+    print(f"🤖 模拟AI服务已启动: {server.base_url}  (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"请求统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
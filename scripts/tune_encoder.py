@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编码参数自动调优
+用一首歌中歌词最密集的一段，比较各组编码器/预设/tune/crf 的编码速度、码率和画质（相对无损参考片段的SSIM或PSNR），
+把满足画质下限且编码最快的一组写入配置（video.hwaccel / preset / tune / crf），界面生成视频时直接使用。
+
+示例：
+    python scripts/tune_encoder.py D:/Music/晴天.mp3 D:/Music/晴天.lrc
+    python scripts/tune_encoder.py song.mp3 song.lrc --floor 0.99 --seconds 15
+    python scripts/tune_encoder.py song.mp3 song.lrc --metric psnr --floor 42 --encoders none,nvenc
+    python scripts/tune_encoder.py song.mp3 song.lrc --presets veryfast,medium --crfs 18,22 --no-save
+    python scripts/tune_encoder.py song.mp3 song.lrc --runs 3
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.encoder_tuner import (DEFAULT_CRFS, DEFAULT_FLOORS, DEFAULT_PRESETS, DEFAULT_TUNES,
+                                EncoderTuner, build_candidates, choose_best, save_tuned_settings)
+from utils.config_manager import get_config
+from utils.encoder_capabilities import get_encoder_capabilities
+
+
+def split_list(value, convert=str):
+    return [convert(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="编码参数自动调优")
+    parser.add_argument('audio', help="音频文件")
+    parser.add_argument('lrc', help="歌词文件")
+    parser.add_argument('--bg', default=None, help="背景图片（默认使用音频封面，没有时为纯色背景）")
+    parser.add_argument('--seconds', type=float, default=10, help="测试片段时长（秒）")
+    parser.add_argument('--runs', type=int, default=1, help="每组参数渲染次数，速度取中位数（默认1）")
+    parser.add_argument('--metric', choices=('ssim', 'psnr'), default='ssim', help="画质指标")
+    parser.add_argument('--floor', type=float, default=None,
+                        help=f"画质下限（默认 SSIM {DEFAULT_FLOORS['ssim']} / PSNR {DEFAULT_FLOORS['psnr']}）")
+    parser.add_argument('--encoders', default=None, help="候选编码器，逗号分隔（默认为检测到的所有可用编码器）")
+    parser.add_argument('--presets', default=",".join(DEFAULT_PRESETS), help="候选预设，逗号分隔")
+    parser.add_argument('--tunes', default=",".join(DEFAULT_TUNES), help="候选tune，逗号分隔（仅libx264）")
+    parser.add_argument('--crfs', default=",".join(map(str, DEFAULT_CRFS)), help="候选crf，逗号分隔（仅libx264）")
+    parser.add_argument('--no-save', action='store_true', help="只输出结果，不写入配置")
+    parser.add_argument('--report', default=None, help="把所有结果写入JSON文件")
+    parser.add_argument('--keep', action='store_true', help="保留 temp/tune 中的测试片段")
+    args = parser.parse_args()
+
+    for path in (args.audio, args.lrc):
+        if not Path(path).exists():
+            print(f"❌ 文件不存在: {path}")
+            return 2
+
+    floor = args.floor if args.floor is not None else DEFAULT_FLOORS[args.metric]
+    encoders = split_list(args.encoders) if args.encoders else get_encoder_capabilities().usable
+    candidates = build_candidates(encoders, split_list(args.presets), split_list(args.tunes),
+                                  split_list(args.crfs, int))
+    print(f"🎛️ 候选参数: {len(candidates)} 组（编码器: {', '.join(encoders)}）")
+
+    tuner = EncoderTuner(args.audio, args.lrc, get_config().get('video', {}), args.bg,
+                         segment_seconds=args.seconds, metric=args.metric, runs=args.runs)
+    try:
+        tuner.prepare()
+        print(f"🎯 测试片段: {tuner.segment_start:.1f}s 起 {args.seconds:g}s，参考片段已无损渲染")
+
+        def progress(done, total, result):
+            if result.error:
+                print(f"[{done}/{total}] ❌ {result.candidate.label()}: {result.error}")
+            else:
+                mark = "✅" if result.quality >= floor else "  "
+                print(f"[{done}/{total}] {mark} {result.candidate.label():40s} "
+                      f"{result.fps:7.1f} fps  {result.kbps:8.1f} kbps  {args.metric.upper()} {result.quality:.4f}")
+
+        results = tuner.run(candidates, progress)
+    finally:
+        if not args.keep:
+            tuner.cleanup()
+
+    if args.report:
+        report = [dict(result._asdict(), candidate=result.candidate._asdict()) for result in results]
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 报告已写入: {args.report}")
+
+    best = choose_best(results, floor)
+    print("=" * 50)
+    if best is None:
+        print(f"❌ 没有满足 {args.metric.upper()} >= {floor} 的参数，请降低画质下限或增加候选crf")
+        return 1
+    print(f"🏆 最佳参数: {best.candidate.label()}")
+    print(f"   {best.fps:.1f} fps  {best.kbps:.1f} kbps  {args.metric.upper()} {best.quality:.4f}（下限 {floor}）")
+    if args.no_save:
+        return 0
+    save_tuned_settings(best, args.metric, floor, song=args.audio)
+    print("💾 已写入配置: video.hwaccel / preset / tune / crf")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
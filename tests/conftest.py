@@ -0,0 +1,26 @@
+"""
+测试公共设置：把项目根目录加入导入路径，测试用的 ffmpeg 替身命令
+运行：python -m pytest -q
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+FAKE_FFMPEG = PROJECT_ROOT / "scripts" / "fake_ffmpeg.py"
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch, tmp_path):
+    """让 ffmpeg/ffprobe 指向 scripts/fake_ffmpeg.py，并在临时目录中运行（temp/、cache/ 写到这里）"""
+    monkeypatch.setenv("LRC2VIDEO_FFMPEG", f'"{sys.executable}" "{FAKE_FFMPEG}"')
+    monkeypatch.setenv("LRC2VIDEO_FFPROBE", f'"{sys.executable}" "{FAKE_FFMPEG}" --ffprobe')
+    monkeypatch.setenv("FAKE_FFMPEG_SPEED", "500")
+    monkeypatch.setenv("FAKE_FFMPEG_DURATION", "4")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
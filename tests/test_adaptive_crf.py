@@ -0,0 +1,51 @@
+"""自适应CRF：由 crf-SSIM 曲线插值"""
+
+import threading
+
+import pytest
+
+from core.adaptive_crf import CRF_MAX, CRF_MIN, CrfCurveCache, interpolate_crf
+
+
+@pytest.mark.parametrize("points, target, expected", [
+    # 目标落在探测点之间：线性插值后向下取整
+    ([(18, 0.99), (24, 0.985), (30, 0.97)], 0.98, 26),
+    ([(18, 0.99), (24, 0.985), (30, 0.97)], 0.985, 24),
+    # 所有探测点都达标（纯色背景）：按最后两点外推，不超过上限
+    ([(18, 0.999), (24, 0.998), (30, 0.997)], 0.985, CRF_MAX),
+    # 所有探测点都不达标（细节很多的照片）：外推到下限
+    ([(18, 0.97), (24, 0.96), (30, 0.95)], 0.985, CRF_MIN),
+    # 测量噪声导致不单调：按累计最小值处理
+    ([(18, 0.99), (24, 0.992), (30, 0.98)], 0.985, 27),
+    # 输入顺序无关
+    ([(30, 0.97), (18, 0.99), (24, 0.985)], 0.98, 26),
+])
+def test_interpolate_crf(points, target, expected):
+    assert interpolate_crf(points, target) == expected
+
+
+def test_interpolate_crf_flat_curve_and_degenerate_input():
+    # 画质不随crf变化时无法外推：全部达标取上限
+    assert interpolate_crf([(18, 0.99), (24, 0.99), (30, 0.99)], 0.985) == CRF_MAX
+    assert interpolate_crf([(24, 0.99)], 0.985) == 24
+    assert interpolate_crf([(24, 0.98)], 0.985) == CRF_MIN
+    assert interpolate_crf([], 0.985) is None
+
+
+def test_interpolate_crf_respects_custom_bounds():
+    points = [(18, 0.999), (24, 0.998), (30, 0.997)]
+    assert interpolate_crf(points, 0.985, crf_min=20, crf_max=28) == 28
+
+
+def test_crf_curve_cache_concurrent_sets(tmp_path):
+    cache_file = tmp_path / "crf_curves.json"
+    cache = CrfCurveCache(cache_file)
+    threads = [threading.Thread(target=cache.set, args=(f"key{i}", [[18, 0.99], [24, 0.98]]))
+               for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reloaded = CrfCurveCache(cache_file)
+    assert all(reloaded.get(f"key{i}") == [[18, 0.99], [24, 0.98]] for i in range(16))
+    assert list(tmp_path.iterdir()) == [cache_file]
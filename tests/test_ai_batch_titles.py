@@ -0,0 +1,119 @@
+"""AI批量标题：回复解析、批量大小自适应与逐首补发"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import ai_title_generator
+from utils.ai_title_generator import AITitleGenerator, _AdaptiveBatchSize, parse_batch_titles
+
+
+def test_parse_plain_and_fenced_json():
+    items = [{"id": 1, "title": "晴天：前奏一响就是整个青春"}, {"id": 2, "title": "江南：多少人的意难平"}]
+    expected = {1: items[0]["title"], 2: items[1]["title"]}
+    assert parse_batch_titles(json.dumps(items, ensure_ascii=False)) == expected
+    fenced = "好的，标题如下：\n```json\n" + json.dumps(items, ensure_ascii=False, indent=2) + "\n```"
+    assert parse_batch_titles(fenced) == expected
+
+
+def test_parse_object_wrapper():
+    content = '{"titles": [{"id": 1, "title": "第一首歌的标题"}, {"id": 2, "title": "第二首歌的标题"}]}'
+    assert parse_batch_titles(content) == {1: "第一首歌的标题", 2: "第二首歌的标题"}
+
+
+def test_parse_truncated_array_salvages_complete_items():
+    content = '[{"id": 1, "title": "完整的第一个标题"}, {"id": 2, "title": "带\\"引号\\"的标题"}, {"id": 3, "title": "被截'
+    assert parse_batch_titles(content) == {1: "完整的第一个标题", 2: '带"引号"的标题'}
+
+
+def test_parse_string_and_invalid_ids():
+    content = '[{"id": "1", "title": "字符串id的标题"}, {"id": "abc", "title": "无效id"}, {"id": null, "title": "空id"},' \
+              ' {"title": "没有id"}, {"id": 4, "title": ""}, "not an object", {"id": 5.0, "title": "浮点id的标题"}]'
+    assert parse_batch_titles(content) == {1: "字符串id的标题", 5: "浮点id的标题"}
+
+
+def test_parse_garbage_returns_empty():
+    assert parse_batch_titles("抱歉，我无法完成这个请求") == {}
+    assert parse_batch_titles("[1, 2, 3]") == {}
+
+
+def test_adaptive_batch_size_shrinks_and_grows_by_one():
+    size = _AdaptiveBatchSize()
+    assert size.get(10) == 10
+    size.shrink()
+    assert size.get(10) == 5
+    size.shrink()
+    size.shrink()
+    size.shrink()
+    assert size.get(10) == 1               # 不低于1
+    size.grow(10)
+    assert size.get(10) == 2
+    for _ in range(20):
+        size.grow(10)
+    assert size.get(10) == 10              # 不超过上限
+    assert size.get(4) == 4                # 上限变小时立即收紧
+
+
+class FakeClient:
+    """按预设回复批量请求，记录逐首补发的请求"""
+
+    def __init__(self, batch_reply, finish_reason="stop"):
+        self.batch_reply = batch_reply
+        self.finish_reason = finish_reason
+        self.single_requests = []
+
+    async def complete(self, model, messages, **kwargs):
+        message = SimpleNamespace(content=self.batch_reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=self.finish_reason)])
+
+    async def chat(self, model, messages, **kwargs):
+        self.single_requests.append(messages[0]["content"])
+        return "单独补发生成的一个标题"
+
+
+def make_generator(client):
+    generator = AITitleGenerator.__new__(AITitleGenerator)
+    generator.model = "test-model"
+    generator.client = client
+    return generator
+
+
+@pytest.fixture
+def batch_size(monkeypatch):
+    size = _AdaptiveBatchSize()
+    monkeypatch.setattr(ai_title_generator, "_batch_size", size)
+    return size
+
+
+def test_missing_ids_fall_back_to_single_requests_and_shrink(batch_size):
+    chunk = [("晴天", "周杰伦"), ("江南", "林俊杰"), ("倔强", "五月天")]
+    client = FakeClient('[{"id": 1, "title": "晴天：前奏一响就是整个青春"}, {"id": 3, "title": "倔强：万人合唱这就是青春"}]')
+    batch_size.get(10)
+
+    titles = asyncio.run(make_generator(client)._generate_batch(chunk, 10))
+
+    assert titles == ["晴天：前奏一响就是整个青春", "单独补发生成的一个标题", "倔强：万人合唱这就是青春"]
+    assert len(client.single_requests) == 1 and "江南" in client.single_requests[0]
+    assert batch_size.get(10) == 5
+
+
+def test_truncated_reply_shrinks_batch(batch_size):
+    chunk = [("晴天", "周杰伦"), ("江南", "林俊杰")]
+    client = FakeClient('[{"id": 1, "title": "晴天：前奏一响就是整个青春"}, {"id": 2, "title": "江南：多少人的意难平"}]',
+                        finish_reason="length")
+    batch_size.get(8)
+    asyncio.run(make_generator(client)._generate_batch(chunk, 8))
+    assert batch_size.get(8) == 4
+
+
+def test_complete_reply_grows_batch(batch_size):
+    chunk = [("晴天", "周杰伦"), ("江南", "林俊杰")]
+    client = FakeClient('[{"id": 1, "title": "晴天：前奏一响就是整个青春"}, {"id": 2, "title": "江南：多少人的意难平"}]')
+    batch_size.get(8)
+    batch_size.shrink()
+    titles = asyncio.run(make_generator(client)._generate_batch(chunk, 8))
+    assert titles == ["晴天：前奏一响就是整个青春", "江南：多少人的意难平"]
+    assert client.single_requests == []
+    assert batch_size.get(8) == 5
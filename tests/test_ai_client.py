@@ -0,0 +1,159 @@
+"""共享AI客户端：关闭与熔断器"""
+
+import asyncio
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+
+openai = pytest.importorskip("openai")
+
+from utils import ai_client
+from utils.ai_client import (CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, AsyncAIClient, CircuitBreaker,
+                             close_ai_clients, get_ai_client)
+
+
+def test_close_cancels_pending_requests_and_rejects_new_ones():
+    client = AsyncAIClient("http://127.0.0.1:9/v1", "key", requests_per_minute=0)
+    pending = client.submit(asyncio.sleep(3600))
+
+    client.close()
+
+    with pytest.raises(CancelledError):
+        pending.result(timeout=5)
+    with pytest.raises(RuntimeError):
+        client.submit(asyncio.sleep(0))
+    assert not client._thread.is_alive()
+    client.close()  # 重复关闭无副作用
+
+
+def test_close_ai_clients_drops_cached_clients(monkeypatch):
+    monkeypatch.setattr(ai_client, "_clients", {})
+    first = get_ai_client("http://127.0.0.1:9/v1", "key", timeout=8, max_retries=2)
+    assert get_ai_client("http://127.0.0.1:9/v1", "key", timeout=8, max_retries=2) is first
+    assert get_ai_client("http://127.0.0.1:9/v1", "key", timeout=5, max_retries=2) is not first
+
+    close_ai_clients()
+
+    assert ai_client._clients == {}
+    assert not first._thread.is_alive()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ai_client.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_at_threshold_and_rejects_during_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.record_success()            # 成功清零连续失败次数
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+    clock.now += 59
+    assert not breaker.allow_request()
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_breaker_allows_exactly_one_half_open_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+
+    assert breaker.allow_request()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release_probe()             # 探测被取消，下一个请求重新探测
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_breaker_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_breaker_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, cooldown=60)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow_request()
+    breaker.record_failure()            # 半开状态下一次失败就重新打开
+    assert breaker.state == CIRCUIT_OPEN
+    clock.now += 30
+    assert not breaker.allow_request()
+    clock.now += 31
+    assert breaker.allow_request()
+
+
+def status_error(status):
+    # 不经过HTTP响应对象构造SDK的状态码异常
+    error = openai.APIStatusError.__new__(openai.APIStatusError)
+    error.status_code = status
+    error.response = None
+    return error
+
+
+class FailingCompletions:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+def run_complete(error, breaker, max_retries=3):
+    client = AsyncAIClient("http://127.0.0.1:9/v1", "key", requests_per_minute=0, max_retries=max_retries,
+                           backoff_base=0, circuit_breaker=breaker)
+    completions = FailingCompletions(error)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions), close=_noop)
+    try:
+        with pytest.raises(openai.APIStatusError):
+            client._call(client.complete("model", []), timeout=10)
+    finally:
+        client.close()
+    return completions.calls
+
+
+async def _noop():
+    pass
+
+
+@pytest.mark.parametrize("error, counted", [
+    (status_error(500), True),
+    (status_error(503), True),
+    (status_error(429), False),
+    (status_error(401), False),
+    (status_error(400), False),
+])
+def test_complete_records_one_outcome_per_call(error, counted):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    calls = run_complete(error, breaker)
+    assert calls == (4 if error.status_code in (429, 500, 503) else 1)
+    assert breaker._failures == (1 if counted else 0)
+    assert breaker.state == CIRCUIT_CLOSED
@@ -0,0 +1,71 @@
+"""ASS字幕写入器：与 pysubs2 输出一致，后备字体标签"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from core.ass_writer import MAX_ASS_TIME, build_ass, format_ass_time
+
+DATA_DIR = Path(__file__).parent / "data"
+
+CONFIG = {
+    'font_family': 'Arial', 'font_size': 36, 'font_color': '#FFEE00',
+    'outline_color': '#112233', 'shadow_color': '#000000', 'outline_width': 3, 'shadow_offset': 2,
+    'bold': True, 'italic': False, 'margin_bottom': 50, 'margin_left': 10, 'margin_right': 10,
+    'fade_in': 300, 'fade_out': 400,
+}
+LINES = [(1000, 3456, '第一行'), (3456, 6000, 'Second line'), (6000, 9005, '混合 mixed「歌词」')]
+
+
+def sample_times():
+    rng = random.Random(20240601)
+    values = list(range(-100, 20000))
+    values += [rng.randrange(0, MAX_ASS_TIME + 100000) for _ in range(5000)]
+    values += [MAX_ASS_TIME - 5, MAX_ASS_TIME - 4, MAX_ASS_TIME, MAX_ASS_TIME + 9, 10 ** 9, -10 ** 9]
+    return values
+
+
+# 超出范围时 pysubs2 会警告后截断，这里正是要比较截断结果
+@pytest.mark.filterwarnings("ignore:Overflow in SubStation timestamp")
+def test_format_ass_time_matches_pysubs2():
+    pytest.importorskip("pysubs2")
+    from pysubs2.formats.substation import SubstationFormat
+    mismatched = [ms for ms in sample_times() if format_ass_time(ms) != SubstationFormat.ms_to_timestamp(ms)]
+    assert mismatched == []
+
+
+def test_format_ass_time_rounding_and_clamps():
+    assert format_ass_time(0) == "0:00:00.00"
+    assert format_ass_time(4) == "0:00:00.00"
+    assert format_ass_time(5) == "0:00:00.01"
+    assert format_ass_time(3456) == "0:00:03.46"
+    assert format_ass_time(-1000) == "0:00:00.00"
+    assert format_ass_time(10 ** 9) == "9:59:59.99"
+
+
+@pytest.mark.parametrize("config, golden", [
+    (CONFIG, "ass_writer_basic.ass"),
+    (dict(CONFIG, fallback_font_family='Noto Sans CJK SC'), "ass_writer_cjk_fallback.ass"),
+])
+def test_build_ass_golden(config, golden):
+    expected = (DATA_DIR / golden).read_text(encoding='utf-8')
+    assert build_ass(LINES, config) == expected
+
+
+def test_build_ass_matches_pysubs2():
+    pysubs2 = pytest.importorskip("pysubs2")
+    subs = pysubs2.SSAFile()
+    subs.styles['Default'] = pysubs2.SSAStyle(
+        fontname='Arial', fontsize=36, primarycolor=pysubs2.Color(0xFF, 0xEE, 0x00, 0),
+        outlinecolor=pysubs2.Color(0x11, 0x22, 0x33, 0), backcolor=pysubs2.Color(0, 0, 0, 0),
+        bold=True, italic=False, outline=3, shadow=2, alignment=pysubs2.Alignment.BOTTOM_CENTER,
+        marginl=10, marginr=10, marginv=50)
+    for start, end, text in LINES:
+        subs.append(pysubs2.SSAEvent(start=start, end=end, text='{\\an2\\fad(300,400)}' + text))
+
+    def without_comments(text):
+        # 只有注释中的生成工具名不同
+        return [line for line in text.splitlines() if not line.startswith(';')]
+
+    assert without_comments(build_ass(LINES, CONFIG)) == without_comments(subs.to_string('ass'))
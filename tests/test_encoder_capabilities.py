@@ -0,0 +1,60 @@
+"""编码器试编码检测与检测结果缓存"""
+
+import pytest
+
+from utils.encoder_capabilities import (FAILURE_TTL, TRANSIENT_FAILURE_TTL, EncoderCapabilities,
+                                        EncoderCapabilityCache, is_transient_error,
+                                        probe_encoder_capabilities)
+
+
+@pytest.mark.parametrize("error, expected", [
+    ("[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: out of memory (10)", True),
+    ("[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: incompatible client key (21)", True),
+    ("[h264_v4l2m2m @ 0x0] Could not open device: Device or resource busy", True),
+    ("试编码超过60秒", True),
+    ("[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: unsupported device (2): (no details)", False),
+    ("[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: no encode device (1): (no details)", False),
+    ("[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: invalid param (8)", False),
+    ("[h264_amf @ 0x0] AMF failed to initialise: the device is busy loading drivers", False),
+    ("[h264_qsv @ 0x0] Error creating a MFX session: -9.", False),
+    ("[h264_nvenc @ 0x0] Cannot load libnvidia-encode.so.1", False),
+    (None, False),
+])
+def test_is_transient_error(error, expected):
+    assert is_transient_error(error) is expected
+
+
+def test_probe_records_transient_failures(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL_ENCODERS", "h264_nvenc,h264_qsv")
+    capabilities = probe_encoder_capabilities(presets=('ultrafast', 'medium'), frames=5)
+    assert 'none' in capabilities.usable
+    assert {'nvenc', 'qsv'} <= set(capabilities.compiled) - set(capabilities.usable)
+    assert capabilities.transient == ('nvenc',)
+    assert set(capabilities.fps['none']) == {'ultrafast', 'medium'}
+
+
+def make_capabilities(probed_at, usable=('none', 'nvenc'), transient=()):
+    errors = {'nvenc': "OpenEncodeSessionEx failed"} if 'nvenc' not in usable else {}
+    return EncoderCapabilities('6.1', ['none', 'nvenc'], list(usable), {}, errors, probed_at, transient)
+
+
+def test_failed_results_expire():
+    now = 1_000_000.0
+    assert not make_capabilities(0.0).is_expired(now)
+    transient = make_capabilities(now, usable=('none',), transient=('nvenc',))
+    assert not transient.is_expired(now + TRANSIENT_FAILURE_TTL - 1)
+    assert transient.is_expired(now + TRANSIENT_FAILURE_TTL + 1)
+    permanent = make_capabilities(now, usable=('none',))
+    assert not permanent.is_expired(now + TRANSIENT_FAILURE_TTL + 1)
+    assert permanent.is_expired(now + FAILURE_TTL + 1)
+
+
+def test_cache_drops_expired_entries(tmp_path):
+    cache_file = tmp_path / "encoder_capabilities.json"
+    cache = EncoderCapabilityCache(cache_file)
+    cache.set('ok', make_capabilities(0.0))
+    cache.set('busy', make_capabilities(0.0, usable=('none',), transient=('nvenc',)))
+
+    reloaded = EncoderCapabilityCache(cache_file)
+    assert reloaded.get('ok').usable == ['none', 'nvenc']
+    assert reloaded.get('busy') is None
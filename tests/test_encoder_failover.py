@@ -0,0 +1,92 @@
+"""FFmpeg错误分类与编码器故障转移（用 scripts/fake_ffmpeg.py 模拟编码器故障）"""
+
+import json
+
+import pytest
+
+from core.video_generator import (FFMPEG_ERROR_ENCODER, FFMPEG_ERROR_INPUT, FFMPEG_ERROR_UNKNOWN,
+                                  EncoderHealth, VideoGenerator, classify_ffmpeg_error)
+from scripts.fake_ffmpeg import FAKE_MEDIA_MAGIC
+
+
+@pytest.mark.parametrize("output, expected", [
+    ("[h264_nvenc @ 0x0] OpenEncodeSessionEx failed: incompatible client key (21)", FFMPEG_ERROR_ENCODER),
+    ("[h264_qsv @ 0x0] Error creating a MFX session: -9.", FFMPEG_ERROR_ENCODER),
+    ("Error initializing output stream 0:0 -- Error while opening encoder", FFMPEG_ERROR_ENCODER),
+    ("song.mp3: No such file or directory", FFMPEG_ERROR_INPUT),
+    ("cover.jpg: Invalid data found when processing input", FFMPEG_ERROR_INPUT),
+    ("[aac @ 0x0] Error submitting frame: Generic error in an external library", FFMPEG_ERROR_UNKNOWN),
+    ("", FFMPEG_ERROR_UNKNOWN),
+    (None, FFMPEG_ERROR_UNKNOWN),
+])
+def test_classify_ffmpeg_error(output, expected):
+    assert classify_ffmpeg_error(output) == expected
+
+
+def test_input_errors_win_over_encoder_errors():
+    # 输入文件缺失时ffmpeg也会报打开编码器失败，换编码器没有意义
+    output = "a.mp3: No such file or directory\nError while opening encoder for output stream #0:0"
+    assert classify_ffmpeg_error(output) == FFMPEG_ERROR_INPUT
+
+
+def test_encoder_chain_skips_unhealthy_and_ends_with_software():
+    health = EncoderHealth()
+    generator = VideoGenerator(encoder_health=health)
+    config = {'hwaccel': 'nvenc', 'encoder_fallback_chain': ['qsv', 'nvenc', 'qsv']}
+    assert generator.get_encoder_chain(config) == ['qsv', 'nvenc', 'none']
+    health.mark_unhealthy('qsv', "MFX session")
+    health.mark_unhealthy('none', "软件编码永远不停用")
+    assert generator.get_encoder_chain(config) == ['nvenc', 'none']
+    assert generator.get_encoder_chain({'hwaccel': 'amf'}) == ['amf', 'none']
+
+
+def make_song(folder):
+    audio = folder / "song.mp3"
+    audio.write_bytes(b"not really audio")
+    lrc = folder / "song.lrc"
+    lrc.write_text("[00:00.50]第一行\n[00:01.50]第二行\n[00:03.00]第三行\n", encoding="utf-8")
+    return audio, lrc
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as f:
+        assert f.readline() == FAKE_MEDIA_MAGIC
+        return json.loads(f.read())
+
+
+def test_failover_to_next_encoder_and_mark_unhealthy(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL_ENCODERS", "h264_qsv,h264_nvenc")
+    audio, lrc = make_song(fake_ffmpeg)
+    config = {'hwaccel': 'qsv', 'encoder_fallback_chain': ['qsv', 'nvenc'],
+              'width': 320, 'height': 240, 'stage_fonts': False}
+    health = EncoderHealth()
+
+    ok, output = VideoGenerator(encoder_health=health).generate_video(
+        audio, lrc, config, output_path=fake_ffmpeg / "first.mp4", use_ai_title=False)
+
+    assert ok, output
+    assert read_output(output)['encoder'] == 'libx264'
+    assert set(health.get_unhealthy()) == {'qsv', 'nvenc'}
+
+    # 同一批次的后续任务直接使用软件编码，不再尝试故障编码器
+    second = VideoGenerator(encoder_health=health)
+    assert second.get_encoder_chain(config) == ['none']
+    ok, output = second.generate_video(audio, lrc, config, output_path=fake_ffmpeg / "second.mp4",
+                                       use_ai_title=False)
+    assert ok, output
+    assert read_output(output)['encoder'] == 'libx264'
+
+
+def test_healthy_hardware_encoder_is_used(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL_ENCODERS", "h264_qsv")
+    audio, lrc = make_song(fake_ffmpeg)
+    config = {'hwaccel': 'qsv', 'encoder_fallback_chain': ['qsv', 'nvenc'],
+              'width': 320, 'height': 240, 'stage_fonts': False}
+    health = EncoderHealth()
+
+    ok, output = VideoGenerator(encoder_health=health).generate_video(
+        audio, lrc, config, output_path=fake_ffmpeg / "out.mp4", use_ai_title=False)
+
+    assert ok, output
+    assert read_output(output)['encoder'] == 'h264_nvenc'
+    assert list(health.get_unhealthy()) == ['qsv']
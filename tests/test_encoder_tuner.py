@@ -0,0 +1,48 @@
+"""编码参数调优：结果选择与速度测量"""
+
+from core.encoder_tuner import TuneCandidate, TuneResult, choose_best, render_clip
+from core.video_generator import VideoGenerator
+
+
+def result(preset, fps, kbps, quality=0.99, crf=23, error=None):
+    return TuneResult(TuneCandidate('none', preset, 'film', crf), fps, kbps, quality, error)
+
+
+def test_choose_best_prefers_fastest_passing_result():
+    results = [
+        result('ultrafast', 900, 3000, quality=0.97),   # 画质不达标
+        result('veryfast', 600, 1500),
+        result('medium', 300, 800),
+        result('faster', 0, 0, quality=None, error="编码超时"),
+    ]
+    assert choose_best(results, floor=0.985).candidate.preset == 'veryfast'
+
+
+def test_choose_best_treats_close_speeds_as_equal_and_picks_smaller_file():
+    results = [
+        result('veryfast', 600, 1500, crf=20),
+        result('veryfast', 590, 1100, crf=23),      # 慢不到5%，码率更低
+        result('veryfast', 500, 900, crf=26),       # 慢太多
+    ]
+    assert choose_best(results, floor=0.985).candidate.crf == 23
+    assert choose_best(results, floor=0.985, speed_tolerance=0).candidate.crf == 20
+
+
+def test_choose_best_returns_none_when_nothing_passes():
+    assert choose_best([result('medium', 300, 800, quality=0.9)], floor=0.985) is None
+    assert choose_best([], floor=0.985) is None
+
+
+def test_render_clip_reports_ffmpeg_fps(fake_ffmpeg, monkeypatch):
+    # 假ffmpeg按 FAKE_FFMPEG_SPEED 报告 fps=25*速度倍数，与实际耗时无关
+    monkeypatch.setenv("FAKE_FFMPEG_SPEED", "40")
+    config = {'width': 320, 'height': 240}
+    ass_path = fake_ffmpeg / "clip.ass"
+    ass_path.write_text("", encoding="utf-8")
+    encoder_args = ['-c:v', 'h264_nvenc', '-preset', 'fast']
+
+    fps, error = render_clip(VideoGenerator(), None, config, ass_path, encoder_args,
+                             fake_ffmpeg / "clip.mp4", seconds=1)
+
+    assert error is None
+    assert fps == 1000
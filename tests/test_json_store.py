@@ -0,0 +1,73 @@
+"""JSON缓存文件：版本校验、原子替换、保存顺序和单例"""
+
+import json
+import threading
+
+from utils.json_store import JsonFileStore, LazySingleton
+
+
+def test_round_trip_with_version(tmp_path):
+    store = JsonFileStore(tmp_path / "sub" / "cache.json", version=3)
+    assert store.load() is None
+    assert store.save(lambda: {"entries": {"a": 1}})
+    with open(store.path, encoding="utf-8") as f:
+        assert json.load(f) == {"version": 3, "entries": {"a": 1}}
+    assert store.load() == {"version": 3, "entries": {"a": 1}}
+    assert not store.path.with_suffix(".tmp").exists()
+
+
+def test_version_mismatch_and_corrupt_file_load_as_missing(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"version": 1, "entries": {}}), encoding="utf-8")
+    assert JsonFileStore(path, version=2).load() is None
+    # 不带版本号的文件不校验版本
+    assert JsonFileStore(path).load() == {"version": 1, "entries": {}}
+    path.write_text('{"entries": [', encoding="utf-8")
+    assert JsonFileStore(path).load() is None
+    path.write_text("[]", encoding="utf-8")
+    assert JsonFileStore(path).load() is None
+
+
+def test_snapshot_none_skips_write(tmp_path):
+    store = JsonFileStore(tmp_path / "cache.json")
+    assert not store.save(lambda: None)
+    assert not store.path.exists()
+
+
+def test_concurrent_saves_keep_latest_snapshot(tmp_path):
+    store = JsonFileStore(tmp_path / "cache.json", version=1)
+    counter = {"value": 0}
+    counter_lock = threading.Lock()
+
+    def snapshot():
+        with counter_lock:
+            counter["value"] += 1
+            return {"entries": counter["value"]}
+
+    threads = [threading.Thread(target=lambda: [store.save(snapshot) for _ in range(20)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 快照和写入在同一把锁内，最后一次快照一定是最后写入的
+    assert store.load()["entries"] == 160
+    assert list(tmp_path.iterdir()) == [store.path]
+
+
+def test_lazy_singleton_creates_once():
+    created = []
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    singleton = LazySingleton(factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(singleton.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
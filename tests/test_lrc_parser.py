@@ -0,0 +1,52 @@
+"""LRC解析：编码识别与时间轴"""
+
+import pytest
+
+from utils.lrc_linter import lint_lrc_bytes
+from utils.lrc_parser import decode_lrc_bytes, parse_lrc_bytes
+
+BIG5_LYRICS = "[ti:晴天]\n[00:12.50]故事的小黃花 從出生那年就飄著\n[00:18.00]童年的盪鞦韆 隨記憶一直晃到現在\n"
+GBK_LYRICS = "[ti:晴天]\n[00:12.50]故事的小黄花 从出生那年就飘着\n[00:18.00]童年的荡秋千 随记忆一直晃到现在\n"
+
+
+@pytest.mark.parametrize("text, encoding, expected", [
+    ("[00:01.00]晴天", 'big5', 'big5'),
+    ("[00:01.00]晴天", 'gbk', 'gb18030'),
+    (BIG5_LYRICS, 'big5', 'big5'),
+    (GBK_LYRICS, 'gbk', 'gb18030'),
+    (GBK_LYRICS, 'utf-8', 'utf-8'),
+])
+def test_decode_distinguishes_big5_from_gbk(text, encoding, expected):
+    assert decode_lrc_bytes(text.encode(encoding)) == (text, expected)
+
+
+def test_decode_partial_header_with_truncated_character():
+    data = BIG5_LYRICS.encode('big5')
+    cut = data.index('隨'.encode('big5')) + 1
+    text, encoding = decode_lrc_bytes(data[:cut], partial=True)
+    assert encoding == 'big5'
+    assert text.endswith('童年的盪鞦韆 ')
+
+
+def test_decode_bom_and_unknown_bytes():
+    assert decode_lrc_bytes('﻿[00:01.00]晴天'.encode('utf-8')) == ('[00:01.00]晴天', 'utf-8')
+    assert decode_lrc_bytes(b'[00:01.00]\xff\xff\xff')[1] == 'latin-1'
+
+
+def test_parse_expands_timestamps_and_applies_offset():
+    data = ("[ti:晴天]\n[offset:+500]\n"
+            "[00:20.5][00:01.00]副歌\n"
+            "[00:10.123]第二行\n"
+            "[00:05:50]冒号分隔的毫秒\n"
+            "[00:30.00]\n").encode('utf-8')
+    result = parse_lrc_bytes(data)
+    assert result.tags == {'ti': '晴天', 'offset': '+500'}
+    assert result.lines == [(500, '副歌'), (5000, '冒号分隔的毫秒'), (9623, '第二行'), (20000, '副歌')]
+    assert result.encoding == 'utf-8'
+
+
+def test_lint_warns_about_big5_encoding():
+    issues, encoding, parsed = lint_lrc_bytes(BIG5_LYRICS.encode('big5'))
+    assert encoding == 'big5'
+    assert [issue.code for issue in issues if issue.code == 'encoding']
+    assert parsed.lines[0] == (12500, '故事的小黃花 從出生那年就飄著')
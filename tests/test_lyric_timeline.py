@@ -0,0 +1,85 @@
+"""歌词时间轴：按时间查询与区间查询"""
+
+from array import array
+
+import pytest
+
+from core.lyric_timeline import LAST_LINE_DURATION, LyricTimeline
+
+
+@pytest.fixture
+def gapped():
+    # 1000-2000 第一行，2000-3000 空白，3000-5000 第二行，5000-6000 空白，6000-7000 第三行
+    return LyricTimeline([1000, 3000, 6000], [2000, 5000, 7000], [0, 1, 2], ['一', '二', '三'])
+
+
+@pytest.mark.parametrize("time_ms, expected", [
+    (0, -1), (999, -1),             # 第一行之前
+    (1000, 0), (1999, 0),           # 开始时间包含，结束时间不包含
+    (2000, -1), (2999, -1),         # 行间空白
+    (3000, 1), (4999, 1),
+    (5000, -1),
+    (6000, 2), (6999, 2),
+    (7000, -1), (10 ** 9, -1),      # 最后一行之后
+])
+def test_index_at(gapped, time_ms, expected):
+    assert gapped.index_at(time_ms) == expected
+    assert gapped.at(time_ms) == (gapped.texts[expected] if expected >= 0 else None)
+
+
+def test_index_at_empty_timeline():
+    timeline = LyricTimeline()
+    assert not timeline
+    assert timeline.index_at(0) == -1
+    assert timeline.between(0, 1000) == range(0, 0)
+    assert timeline.duration == 0
+
+
+@pytest.mark.parametrize("start_ms, end_ms, expected", [
+    (0, 1000, range(0, 0)),         # 结束于第一行开始，不重叠
+    (0, 1001, range(0, 1)),
+    (1500, 3500, range(0, 2)),
+    (1500, 3000, range(0, 1)),      # 区间结束处开始的行不包含
+    (2000, 3000, range(1, 1)),      # 完全落在空白中
+    (5000, 6000, range(2, 2)),
+    (4999, 6001, range(1, 3)),
+    (7000, 9000, range(3, 3)),      # 最后一行结束之后
+    (0, 10 ** 9, range(0, 3)),
+    (3500, 3500, range(1, 1)),      # 零长度区间
+    (3500, 3000, range(1, 1)),      # 结束早于开始
+])
+def test_between(gapped, start_ms, end_ms, expected):
+    assert gapped.between(start_ms, end_ms) == expected
+
+
+def test_same_start_lines():
+    # 同一时间的两行：前一行时长为0，查询总是得到后一行
+    timeline = LyricTimeline.from_lines([(1000, '甲'), (1000, '乙'), (2000, '丙')])
+    assert list(timeline.ends) == [1000, 2000, 2000 + LAST_LINE_DURATION]
+    assert timeline.index_at(1000) == 1
+    assert timeline.at(1500) == '乙'
+    assert timeline.between(1000, 2000) == range(1, 2)
+    assert timeline.between(0, 3000) == range(0, 3)
+
+
+def test_normalized_ends():
+    assert LyricTimeline.normalized_ends(array('q')) == array('q')
+    assert LyricTimeline.normalized_ends(array('q', [0, 1500, 4000])) == array('q', [1500, 4000, 4000 + LAST_LINE_DURATION])
+    assert LyricTimeline.normalized_ends(array('q', [500]), last_duration=100) == array('q', [600])
+
+
+def test_from_lines_dedups_texts():
+    lines = [(0, '副歌'), (1000, '主歌'), (2000, '副歌'), (3000, '副歌')]
+    timeline = LyricTimeline.from_lines(lines, last_duration=500)
+    assert timeline.texts == ['副歌', '主歌']
+    assert list(timeline.text_index) == [0, 1, 0, 0]
+    assert list(timeline) == [(0, 1000, '副歌'), (1000, 2000, '主歌'), (2000, 3000, '副歌'), (3000, 3500, '副歌')]
+    assert timeline[1] == (1000, 2000, '主歌')
+    assert timeline.duration == 3500
+
+
+def test_from_lrc_bytes_expands_repeated_chorus():
+    timeline = LyricTimeline.from_lrc_bytes("[00:01.00][00:05.00]副歌\n[00:03.00]主歌\n".encode('utf-8'))
+    assert list(timeline.starts) == [1000, 3000, 5000]
+    assert timeline.texts == ['副歌', '主歌']
+    assert list(timeline.text_index) == [0, 1, 0]
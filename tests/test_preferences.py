@@ -0,0 +1,79 @@
+"""界面偏好保存：不能丢掉界面之外设置的 video.* 配置"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from gui.main_window import LyricsVideoGenerator
+from utils import config_manager
+
+
+def make_app(preferences, gui_config):
+    app = SimpleNamespace(
+        user_preferences=preferences,
+        get_config=lambda: dict(gui_config),
+        folder_var=SimpleNamespace(get=lambda: "D:/Music"),
+        output_dir="output",
+        openai_api_key=SimpleNamespace(get=lambda: ""),
+    )
+    app.reload_video_preferences = lambda: LyricsVideoGenerator.reload_video_preferences(app)
+    return app
+
+
+def test_save_keeps_video_keys_not_managed_by_gui(tmp_path, monkeypatch):
+    manager = config_manager.ConfigManager(str(tmp_path / "config"))
+    monkeypatch.setattr(config_manager, "_config_instance", manager)
+    preferences = {
+        "app": {},
+        "video": {
+            "ffmpeg_path": "/opt/ffmpeg/bin/ffmpeg",
+            "subtitle_cache_mb": 16,
+            "auto_tune": {"metric": "ssim", "fps": 420.0},
+            "font_size": 20,
+        },
+    }
+    app = make_app(preferences, {"font_size": 36, "preset": "veryfast"})
+
+    LyricsVideoGenerator.save_user_preferences(app)
+
+    with open(manager.config_file, encoding="utf-8") as f:
+        video = json.load(f)["video"]
+    assert video["ffmpeg_path"] == "/opt/ffmpeg/bin/ffmpeg"
+    assert video["subtitle_cache_mb"] == 16
+    assert video["auto_tune"] == {"metric": "ssim", "fps": 420.0}
+    # 界面管理的项以界面当前值为准
+    assert video["font_size"] == 36
+    assert video["preset"] == "veryfast"
+
+
+def test_save_does_not_overwrite_settings_written_while_open(tmp_path, monkeypatch):
+    manager = config_manager.ConfigManager(str(tmp_path / "config"))
+    monkeypatch.setattr(config_manager, "_config_instance", manager)
+    preferences = manager._config
+    preferences.setdefault("app", {})
+    preferences["video"] = {"preset": "medium", "crf": 23, "font_size": 20}
+    manager.save_config()
+
+    # 窗口打开期间调优脚本写入了配置文件（另一个ConfigManager实例）
+    tuner_config = config_manager.ConfigManager(str(tmp_path / "config"))
+    tuner_config.set("video.preset", "veryfast")
+    tuner_config.set("video.crf", 26)
+    tuner_config.set("video.auto_tune", {"metric": "ssim"})
+    tuner_config.save_config()
+
+    # 与界面的 get_config 一样：编码参数取自内存中的 video 配置，字号取自控件
+    app = make_app(preferences, {})
+    app.get_config = lambda: {"preset": preferences["video"].get("preset"),
+                              "crf": preferences["video"].get("crf"), "font_size": 36}
+
+    LyricsVideoGenerator.save_user_preferences(app)
+
+    with open(manager.config_file, encoding="utf-8") as f:
+        video = json.load(f)["video"]
+    assert video["preset"] == "veryfast"
+    assert video["crf"] == 26
+    assert video["auto_tune"] == {"metric": "ssim"}
+    assert video["font_size"] == 36
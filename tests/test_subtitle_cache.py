@@ -0,0 +1,83 @@
+"""字幕缓存：缓存键与按大小淘汰"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from core import subtitle_cache
+from core.ass_writer import STYLE_CONFIG_KEYS
+from core.subtitle_cache import SubtitleCache
+
+LRC = "[00:01.00]第一行\n[00:03.00]第二行\n".encode('utf-8')
+STYLE = {
+    'font_family': 'Arial', 'font_size': 36, 'font_color': '#FFFFFF', 'outline_color': '#000000',
+    'shadow_color': '#000000', 'outline_width': 3, 'shadow_offset': 2, 'bold': True, 'italic': False,
+    'margin_bottom': 50, 'margin_left': 10, 'margin_right': 10, 'fade_in': 500, 'fade_out': 500,
+    'fallback_font_family': None,
+}
+
+
+def test_key_changes_with_lyrics():
+    assert SubtitleCache.make_key(LRC, STYLE) != SubtitleCache.make_key(LRC + b"[00:05.00]x\n", STYLE)
+
+
+@pytest.mark.parametrize("field", STYLE_CONFIG_KEYS)
+def test_key_changes_with_each_style_field(field):
+    changed = dict(STYLE, **{field: 'changed'})
+    assert SubtitleCache.make_key(LRC, STYLE) != SubtitleCache.make_key(LRC, changed)
+
+
+def test_key_changes_with_writer_version(monkeypatch):
+    key = SubtitleCache.make_key(LRC, STYLE)
+    monkeypatch.setattr(subtitle_cache, "ASS_WRITER_VERSION", subtitle_cache.ASS_WRITER_VERSION + 1)
+    assert SubtitleCache.make_key(LRC, STYLE) != key
+
+
+def test_encoder_only_change_hits_cache(tmp_path):
+    cache = SubtitleCache(tmp_path / "subtitles")
+    source = tmp_path / "song.ass"
+    source.write_text("[Script Info]\n", encoding='utf-8')
+    cache.put(SubtitleCache.make_key(LRC, dict(STYLE, preset='medium', crf=23, hwaccel='none')), source)
+
+    rerender = dict(STYLE, preset='veryfast', crf=28, tune='animation', hwaccel='nvenc', width=1280, height=720)
+    dest = tmp_path / "rerender.ass"
+    assert cache.get(SubtitleCache.make_key(LRC, rerender), dest)
+    assert dest.read_text(encoding='utf-8') == "[Script Info]\n"
+    assert not cache.get(SubtitleCache.make_key(LRC, dict(STYLE, font_size=40)), tmp_path / "miss.ass")
+
+
+def test_eviction_trims_to_ninety_percent_least_recently_used_first(tmp_path):
+    cache_dir = tmp_path / "subtitles"
+    cache = SubtitleCache(cache_dir, max_bytes=1000)
+    source = tmp_path / "song.ass"
+    source.write_bytes(b"x" * 100)
+
+    def put(name, mtime):
+        cache.put(name, source)
+        os.utime(cache_dir / f"{name}.ass", (mtime, mtime))
+
+    for i in range(10):
+        put(f"k{i}", 1000 + i)
+    assert sorted(path.name for path in cache_dir.iterdir()) == [f"k{i}.ass" for i in range(10)]
+
+    # 最早写入的 k0 刚被使用过，不应被淘汰
+    assert cache.get("k0", tmp_path / "used.ass")
+    put("k10", 2000)
+
+    remaining = {path.name for path in cache_dir.iterdir()}
+    total = sum(path.stat().st_size for path in cache_dir.iterdir())
+    assert total == 900    # 上限的90%
+    assert "k0.ass" in remaining and "k10.ass" in remaining
+    assert "k1.ass" not in remaining and "k2.ass" not in remaining
+
+
+def test_global_cache_uses_subtitle_cache_mb(monkeypatch):
+    settings = {"video.subtitle_cache_mb": 2}
+    config = SimpleNamespace(get=lambda key, default=None: settings.get(key, default))
+    monkeypatch.setattr(subtitle_cache, "get_config", lambda: config)
+    monkeypatch.setattr(subtitle_cache, "_subtitle_cache", None)
+    assert subtitle_cache.get_subtitle_cache().max_bytes == 2 * 1024 * 1024
+
+    settings["video.subtitle_cache_mb"] = 0
+    assert subtitle_cache.get_subtitle_cache() is None
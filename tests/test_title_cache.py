@@ -0,0 +1,87 @@
+"""AI标题缓存：过期、LRU淘汰、键与手动失效"""
+
+import json
+
+import pytest
+
+from utils import ai_title_generator
+from utils.ai_title_generator import PROMPT_TEMPLATE_HASH, TitleCache, invalidate_title_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"time": 1_700_000_000.0}
+    monkeypatch.setattr(ai_title_generator.time, "time", lambda: now["time"])
+    return now
+
+
+def key(song, artist="周杰伦"):
+    return TitleCache.make_key(song, artist, "moonshot", "kimi")
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = TitleCache(tmp_path / "titles.json", ttl_days=1, save_interval=0)
+    cache.set(key("晴天"), "晴天：前奏一响就是整个青春")
+    clock["time"] += 86400 - 1
+    assert cache.get(key("晴天")) == "晴天：前奏一响就是整个青春"
+    clock["time"] += 2
+    assert cache.get(key("晴天")) is None
+    assert len(cache) == 0
+
+
+def test_ttl_zero_never_expires(tmp_path, clock):
+    cache = TitleCache(tmp_path / "titles.json", ttl_days=0, save_interval=0)
+    cache.set(key("晴天"), "标题")
+    clock["time"] += 10 * 365 * 86400
+    assert cache.get(key("晴天")) == "标题"
+
+
+def test_lru_eviction_at_max_entries(tmp_path):
+    cache = TitleCache(tmp_path / "titles.json", max_entries=3, save_interval=0)
+    for song in ("一", "二", "三"):
+        cache.set(key(song), f"{song}的标题")
+    cache.get(key("一"))                 # 最近使用过，不被淘汰
+    cache.set(key("四"), "四的标题")
+
+    assert len(cache) == 3
+    assert cache.get(key("二")) is None
+    assert [cache.get(key(song)) for song in ("一", "三", "四")] == ["一的标题", "三的标题", "四的标题"]
+
+    # 文件按写入时的最近使用顺序保存（三、一、四），重新加载后先淘汰三
+    reloaded = TitleCache(tmp_path / "titles.json", max_entries=3, save_interval=0)
+    reloaded.set(key("五"), "五的标题")
+    assert reloaded.get(key("三")) is None
+    assert [reloaded.get(key(song)) for song in ("一", "四", "五")] == ["一的标题", "四的标题", "五的标题"]
+
+
+def test_key_includes_every_field_and_prompt_hash():
+    base = TitleCache.make_key("晴天", "周杰伦", "moonshot", "kimi")
+    assert base == TitleCache.make_key("晴天", "周杰伦", "moonshot", "kimi", PROMPT_TEMPLATE_HASH)
+    variants = [
+        TitleCache.make_key("雨天", "周杰伦", "moonshot", "kimi"),
+        TitleCache.make_key("晴天", None, "moonshot", "kimi"),
+        TitleCache.make_key("晴天", "周杰伦", "openrouter", "kimi"),
+        TitleCache.make_key("晴天", "周杰伦", "moonshot", "gpt"),
+        TitleCache.make_key("晴天", "周杰伦", "moonshot", "kimi", "changedprompt"),
+    ]
+    assert base not in variants
+    assert len(set(variants)) == len(variants)
+
+
+def test_invalidate_title_cache(tmp_path, monkeypatch):
+    cache_file = tmp_path / "titles.json"
+    cache = TitleCache(cache_file, save_interval=0)
+    monkeypatch.setattr(ai_title_generator, "get_title_cache", lambda: cache)
+    cache.set(key("晴天"), "晴天的标题", song_name="晴天", artist="周杰伦")
+    cache.set(key("稻香"), "稻香的标题", song_name="稻香", artist="周杰伦")
+    cache.set(key("江南", "林俊杰"), "江南的标题", song_name="江南", artist="林俊杰")
+
+    assert invalidate_title_cache(song_name="晴天") == 1
+    assert cache.get(key("晴天")) is None
+    assert invalidate_title_cache(artist="周杰伦") == 1
+    assert len(cache) == 1
+    with open(cache_file, encoding="utf-8") as f:
+        assert len(json.load(f)["entries"]) == 1    # 失效后立即写盘
+
+    assert invalidate_title_cache() == 1
+    assert len(TitleCache(cache_file)) == 0
@@ -0,0 +1,411 @@
+"""
+共享AI客户端
+所有线程共用一个长期存在的 AsyncOpenAI 客户端（复用HTTP连接），
+在后台事件循环中执行请求，统一限制并发数和请求速率，
+遇到 429/5xx/网络错误时按指数退避加随机抖动重试。
+提供商连续失败时由熔断器直接拒绝请求，调用方改用本地标题。
+"""
+
+import asyncio
+import importlib.util
+import logging
+import random
+import sys
+import threading
+import time
+
+# openai（连同 httpx/pydantic）导入要零点几秒，启动时只检查是否安装，
+# 第一次创建客户端时才真正导入
+HAS_OPENAI_LIB = importlib.util.find_spec('openai') is not None
+
+from .config_manager import get_config
+
+logger = logging.getLogger(__name__)
+
+# OpenRouter 等平台要求的来源标识
+DEFAULT_HEADERS = {
+    "HTTP-Referer": "https://github.com/Lrc2Video",
+    "X-Title": "Lrc2Video",
+}
+
+
+class TokenBucket:
+    """令牌桶限速器（在事件循环内使用）
+
+    rate 为每秒补充的令牌数，capacity 为允许的突发请求数。
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # 串行发放令牌，保证请求按到达顺序被放行
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# 熔断器状态
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+CIRCUIT_STATE_NAMES = {
+    CIRCUIT_CLOSED: "正常",
+    CIRCUIT_OPEN: "熔断中",
+    CIRCUIT_HALF_OPEN: "探测中",
+}
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求未发出"""
+
+
+class CircuitBreaker:
+    """AI提供商熔断器
+
+    连续失败 failure_threshold 次后打开，冷却 cooldown 秒内所有请求直接失败；
+    冷却结束后进入半开状态，只放行一个探测请求，成功则恢复，失败则重新冷却。
+    每次调用（含重试）只记录一次结果，只有服务故障（5xx、超时、连接错误）计为失败。
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._listeners = []
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def add_listener(self, callback):
+        """注册状态变化回调 callback(state)，可能在任意线程中调用"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _set_state(self, state):
+        # 调用方需持有锁；返回是否发生了变化
+        if self._state == state:
+            return False
+        self._state = state
+        return True
+
+    def _notify(self, state):
+        messages = {
+            CIRCUIT_OPEN: f"⚡ AI服务连续失败，熔断 {self.cooldown:.0f} 秒，期间使用本地标题",
+            CIRCUIT_HALF_OPEN: "🔍 AI熔断冷却结束，发送探测请求",
+            CIRCUIT_CLOSED: "✅ AI服务已恢复",
+        }
+        if state == CIRCUIT_CLOSED:
+            logger.info(messages[state])
+        else:
+            logger.warning(messages[state])
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                logger.debug(f"熔断器状态回调失败: {e}")
+
+    def allow_request(self):
+        """是否允许发出请求；半开状态下只允许一个探测请求"""
+        changed = None
+        with self._lock:
+            if self._state == CIRCUIT_OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._set_state(CIRCUIT_HALF_OPEN)
+                self._probe_in_flight = False
+                changed = CIRCUIT_HALF_OPEN
+            if self._state == CIRCUIT_HALF_OPEN:
+                if self._probe_in_flight:
+                    allowed = False
+                else:
+                    self._probe_in_flight = True
+                    allowed = True
+            else:
+                allowed = True
+        if changed:
+            self._notify(changed)
+        return allowed
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            changed = self._set_state(CIRCUIT_CLOSED)
+        if changed:
+            self._notify(CIRCUIT_CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            should_open = (self._state == CIRCUIT_HALF_OPEN or
+                           self._failures >= self.failure_threshold)
+            changed = False
+            if should_open:
+                self._opened_at = time.monotonic()
+                changed = self._set_state(CIRCUIT_OPEN)
+        if changed:
+            self._notify(CIRCUIT_OPEN)
+
+    def release_probe(self):
+        """请求被取消、没有结果时释放探测名额，下一个请求重新探测"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        """手动恢复（例如修改了AI配置）"""
+        self.record_success()
+
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """获取全局AI熔断器（参数来自 ai.circuit_breaker.*）"""
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            config = get_config()
+            _circuit_breaker = CircuitBreaker(
+                failure_threshold=config.get("ai.circuit_breaker.failure_threshold", 5),
+                cooldown=config.get("ai.circuit_breaker.cooldown", 60),
+            )
+        return _circuit_breaker
+
+
+def is_retryable_error(error):
+    """429、5xx、超时和连接错误值得重试，其余（如401/400）直接失败"""
+    if 'openai' not in sys.modules:
+        return False  # 还没有创建过客户端，错误不可能来自SDK
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+    if isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def is_outage_error(error):
+    """5xx、超时和连接错误说明服务故障，计入熔断；429限流和其他4xx说明服务有响应"""
+    if 'openai' not in sys.modules:
+        return False
+    from openai import APIConnectionError, APIStatusError
+    if isinstance(error, APIConnectionError):  # 包括 APITimeoutError
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def get_retry_after(error):
+    """读取响应头中的 Retry-After（秒），没有则返回None"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        value = response.headers.get('retry-after')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=0.5, max_delay=20.0):
+    """指数退避 + 全抖动：在 [0, min(max_delay, base*2^attempt)] 中随机取值"""
+    return random.uniform(0, min(max_delay, base * (2 ** attempt)))
+
+
+class AsyncAIClient:
+    """在后台事件循环中运行的共享异步客户端"""
+
+    def __init__(self, base_url, api_key, max_concurrency=8, requests_per_minute=600,
+                 timeout=30, max_retries=3, backoff_base=0.5, max_backoff=20.0,
+                 circuit_breaker=None):
+        self.base_url = base_url
+        self.circuit_breaker = circuit_breaker
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='ai-client', daemon=True)
+        self._thread.start()
+
+        # 客户端和信号量都绑定到后台事件循环
+        self._client = None
+        self._semaphore = None
+        # 突发上限等于并发数，之后按平均速率放行
+        self._bucket = (TokenBucket(requests_per_minute / 60.0, capacity=max_concurrency)
+                        if requests_per_minute else None)
+        self._call(self._setup(base_url, api_key))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _call(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    async def _setup(self, base_url, api_key):
+        from openai import AsyncOpenAI
+        # 重试由本类统一处理，关闭SDK自带的重试
+        self._client = AsyncOpenAI(base_url=base_url, api_key=api_key,
+                                   timeout=self.timeout, max_retries=0)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def chat(self, model, messages, **kwargs):
+        """发送一次对话请求，返回回复文本"""
+        completion = await self.complete(model, messages, **kwargs)
+        return completion.choices[0].message.content or ""
+
+    async def complete(self, model, messages, **kwargs):
+        """发送一次对话请求，返回完整的completion；重试耗尽时抛出最后一次的异常
+
+        熔断器打开时抛出 CircuitOpenError，不发出请求；重试结束后向熔断器记录一次结果。
+        """
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError("AI服务熔断中")
+        succeeded = None    # 被取消时保持None
+        try:
+            completion = await self._complete_with_retries(model, messages, kwargs)
+            succeeded = True
+            return completion
+        except Exception as e:
+            succeeded = not is_outage_error(e)
+            raise
+        finally:
+            if breaker is not None:
+                if succeeded is None:
+                    breaker.release_probe()
+                elif succeeded:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+
+    async def _complete_with_retries(self, model, messages, kwargs):
+        for attempt in range(self.max_retries + 1):
+            if self._bucket is not None:
+                await self._bucket.acquire()
+            try:
+                async with self._semaphore:
+                    return await self._client.chat.completions.create(
+                        extra_headers=DEFAULT_HEADERS,
+                        model=model,
+                        messages=messages,
+                        **kwargs
+                    )
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = get_retry_after(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.backoff_base, self.max_backoff)
+                logger.debug(f"AI请求失败（第{attempt + 1}次），{delay:.2f}s后重试: {e}")
+                await asyncio.sleep(delay)
+
+    def chat_sync(self, model, messages, **kwargs):
+        """在任意线程中同步调用 chat()"""
+        return self._call(self.chat(model, messages, **kwargs))
+
+    def submit(self, coro):
+        """提交协程到后台事件循环，返回 concurrent.futures.Future；客户端已关闭时抛出 RuntimeError"""
+        with self._close_lock:
+            if self._closed:
+                coro.close()
+                raise RuntimeError("AI客户端已关闭")
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _shutdown(self):
+        # 取消进行中的请求（等待结果的线程收到 CancelledError），再关闭连接池
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+
+    def close(self):
+        """取消进行中的请求，关闭连接池并停止后台事件循环"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout=5)
+        except Exception as e:
+            logger.debug(f"关闭AI客户端失败: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_ai_client(base_url, api_key, timeout=None, max_retries=None):
+    """按连接参数获取共享客户端，首次调用时创建
+
+    并发和限速参数来自 ai.concurrency / ai.requests_per_minute；
+    超时和重试次数由调用方传入（ai.timeout / ai.max_retries，未设置时取提供商配置），
+    参数不同会创建新的客户端，修改AI配置后应调用 close_ai_clients() 关闭旧的。
+    """
+    if not HAS_OPENAI_LIB:
+        return None
+    key = (base_url, api_key, timeout, max_retries)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            config = get_config()
+            client = AsyncAIClient(
+                base_url, api_key,
+                max_concurrency=config.get("ai.concurrency", 8),
+                requests_per_minute=config.get("ai.requests_per_minute", 600),
+                timeout=timeout if timeout is not None else 30,
+                max_retries=max_retries if max_retries is not None else 3,
+                circuit_breaker=get_circuit_breaker(),
+            )
+            _clients[key] = client
+        return client
+
+
+def close_ai_clients():
+    """关闭所有共享客户端（程序退出或修改AI配置后调用）"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -5,22 +5,293 @@ AI标题生成器
 """
 
 import os
+import re
+import json
+import asyncio
+import time
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 # 抑制OpenAI的HTTP请求日志
 logging.getLogger("openai").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-try:
-    from openai import OpenAI
-    HAS_OPENAI_LIB = True
-except ImportError:
-    HAS_OPENAI_LIB = False
-    OpenAI = None
-
 # 导入配置管理器
 from .config_manager import get_config
+from .ai_client import HAS_OPENAI_LIB, get_ai_client
+from .json_store import JsonFileStore, LazySingleton
+from .title_engine import get_title_engine
+
+logger = logging.getLogger(__name__)
+
+# 标题生成提示词模板（修改模板会改变哈希，旧缓存自动失效）
+TITLE_PROMPT_TEMPLATE = """你是一个专业的音乐视频标题策划师！根据以下信息为这首歌曲量身定制一个独特的爆款标题：
+
+                    🎵 歌曲信息：
+                    歌曲名：《{song_name}》
+                    歌手：{artist}
+                    风格特征：{style_context}
+
+                    🎯 创作要求：
+                    1. **个性化**：必须体现这首歌的独特气质和歌手风格
+                    2. **情感共鸣**：针对{style_context}的特点，精准触发对应情感
+                    3. **记忆钩子**：创造专属的记忆点，避免千篇一律的模板
+                    4. **平台适配**：B站/抖音风格，但保持音乐质感
+                    5. **长度控制**：15-25字，朗朗上口
+
+                    💡 创作思路：
+                    - 如果是抒情歌曲：突出治愈、回忆、遗憾等情感
+                    - 如果是摇滚/电音：强调炸裂、燃爆、震撼等感受  
+                    - 如果是民谣：营造故事感、生活化、温暖氛围
+                    - 如果是Live版：突出现场魅力、真实感动
+                    - 根据歌手特色：比如周杰伦的"青春"、林俊杰的"治愈"、邓紫棋的"爆发力"
+
+                    🚀 爆款公式：
+                    【歌名】+ 专属记忆点 + 情感爆点
+                    避免使用"听完直接破防"这类通用模板！
+
+                    🎭 风格示例：
+                    - 周杰伦【晴天】：前奏一响就是整个青春
+                    - 林俊杰【江南】：江南一响，多少人的意难平
+                    - 邓紫棋【光年之外】：高音一出直接头皮发麻
+                    - 五月天【倔强】：万人合唱现场，这就是青春啊
+
+                    请根据《{song_name}》{artist_hint}，创作一个独一无二的标题！
+                    直接返回标题，不要解释！"""
+
+# 批量模板：风格指南只出现一次，一次请求为多首歌生成标题
+BATCH_TITLE_PROMPT_TEMPLATE = """你是一个专业的音乐视频标题策划师！请为下面每一首歌曲分别量身定制一个独特的爆款标题。
+
+                    🎯 创作要求：
+                    1. **个性化**：必须体现每首歌的独特气质和歌手风格
+                    2. **情感共鸣**：针对每首歌的风格特征，精准触发对应情感
+                    3. **记忆钩子**：创造专属的记忆点，避免千篇一律的模板，各首之间不要雷同
+                    4. **平台适配**：B站/抖音风格，但保持音乐质感
+                    5. **长度控制**：15-25字，朗朗上口
+
+                    💡 创作思路：
+                    - 如果是抒情歌曲：突出治愈、回忆、遗憾等情感
+                    - 如果是摇滚/电音：强调炸裂、燃爆、震撼等感受  
+                    - 如果是民谣：营造故事感、生活化、温暖氛围
+                    - 如果是Live版：突出现场魅力、真实感动
+                    - 根据歌手特色：比如周杰伦的"青春"、林俊杰的"治愈"、邓紫棋的"爆发力"
+
+                    🚀 爆款公式：
+                    【歌名】+ 专属记忆点 + 情感爆点
+                    避免使用"听完直接破防"这类通用模板！
+
+                    🎭 风格示例：
+                    - 周杰伦【晴天】：前奏一响就是整个青春
+                    - 林俊杰【江南】：江南一响，多少人的意难平
+                    - 邓紫棋【光年之外】：高音一出直接头皮发麻
+                    - 五月天【倔强】：万人合唱现场，这就是青春啊
+
+                    🎵 歌曲列表（JSON，style为风格特征）：
+                    {songs_json}
+
+                    请严格返回一个JSON数组，每首歌一项，包含 id 和 title，例如：
+                    [{{"id": 1, "title": "..."}}]
+                    只返回JSON，不要解释！"""
+
+PROMPT_TEMPLATE_HASH = hashlib.sha256(
+    (TITLE_PROMPT_TEMPLATE + BATCH_TITLE_PROMPT_TEMPLATE).encode('utf-8')
+).hexdigest()[:12]
+
+# 批量请求中每首歌预留的输出token数（中文标题+JSON结构）
+BATCH_TOKENS_PER_SONG = 60
+
+# 从不完整的JSON中尽量抢救出 id/title 对
+_BATCH_ITEM_PATTERN = re.compile(r'"id"\s*:\s*"?(\d+)"?\s*,\s*"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def parse_batch_titles(content):
+    """解析批量请求的回复，返回 {id: 标题}；格式损坏时尽量部分解析"""
+    text = content.strip()
+    start, end = text.find('['), text.rfind(']')
+    if start != -1 and end > start:
+        try:
+            items = json.loads(text[start:end + 1])
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            results = {}
+            for item in items:
+                if not isinstance(item, dict) or not item.get("title"):
+                    continue
+                # id 可能是 "2" 这样的字符串；无法转换的单独跳过，不影响其他歌曲
+                try:
+                    results[int(item["id"])] = str(item["title"])
+                except (KeyError, ValueError, TypeError):
+                    continue
+            return results
+    results = {}
+    for match in _BATCH_ITEM_PATTERN.finditer(text):
+        try:
+            results[int(match.group(1))] = json.loads(f'"{match.group(2)}"')
+        except ValueError:
+            continue
+    return results
+
+
+class _AdaptiveBatchSize:
+    """根据回复是否被截断动态调整每批歌曲数（所有生成器共享）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._size = None
+
+    def get(self, limit):
+        with self._lock:
+            if self._size is None or self._size > limit:
+                self._size = limit
+            return self._size
+
+    def shrink(self):
+        with self._lock:
+            if self._size:
+                self._size = max(1, self._size // 2)
+                logger.info(f"AI批量标题回复被截断或无法解析，每批歌曲数降为 {self._size}")
+
+    def grow(self, limit):
+        with self._lock:
+            if self._size and self._size < limit:
+                self._size += 1
+
+
+_batch_size = _AdaptiveBatchSize()
+
+
+class TitleCache:
+    """AI标题本地缓存
+
+    以 (歌曲名, 歌手, 提供商, 模型, 提示词模板哈希) 为键，
+    支持过期时间、条目数上限（最久未使用的先淘汰）和手动失效。
+    """
+
+    def __init__(self, cache_file="cache/ai_titles.json", ttl_days=30, max_entries=5000,
+                 save_interval=2.0):
+        self.cache_file = Path(cache_file)
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self._store = JsonFileStore(self.cache_file, label="标题缓存")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    @staticmethod
+    def make_key(song_name, artist, provider, model, prompt_hash=PROMPT_TEMPLATE_HASH):
+        raw = json.dumps([song_name, artist or "", provider or "", model or "", prompt_hash],
+                         ensure_ascii=False)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        data = self._store.load()
+        if data is not None:
+            # 文件中按最近使用顺序保存
+            self._entries = OrderedDict(data.get("entries", []))
+
+    def get(self, key):
+        """命中返回标题，未命中或已过期返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl_seconds and time.time() - entry["created"] > self.ttl_seconds:
+                del self._entries[key]
+                self._dirty = True
+                return None
+            self._entries.move_to_end(key)
+            return entry["title"]
+
+    def set(self, key, title, **meta):
+        """写入标题，meta中的song_name/artist用于按歌曲失效"""
+        with self._lock:
+            entry = {"title": title, "created": time.time()}
+            entry.update(meta)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            should_save = time.time() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def invalidate(self, song_name=None, artist=None):
+        """按歌曲名和/或歌手失效，都不指定时清空缓存；返回删除的条目数"""
+        with self._lock:
+            if song_name is None and artist is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key, entry in self._entries.items()
+                        if (song_name is None or entry.get("song_name") == song_name)
+                        and (artist is None or entry.get("artist") == artist)]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+            self._dirty = True
+        self.save()
+        return removed
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            self._last_save = time.time()
+            return {"entries": list(self._entries.items())}
+
+    def save(self):
+        """有修改时写入磁盘"""
+        self._store.save(self._snapshot)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _create_title_cache():
+    cache_config = get_config().get("ai.cache", {}) or {}
+    return TitleCache(
+        cache_file=cache_config.get("file", "cache/ai_titles.json"),
+        ttl_days=cache_config.get("ttl_days", 30),
+        max_entries=cache_config.get("max_entries", 5000)
+    )
+
+
+_title_cache = LazySingleton(_create_title_cache, save_at_exit=True)
+
+
+def get_title_cache():
+    """获取全局标题缓存实例"""
+    return _title_cache.get()
+
+
+def invalidate_title_cache(song_name=None, artist=None):
+    """手动失效AI标题缓存，都不指定时清空全部"""
+    return get_title_cache().invalidate(song_name, artist)
+
+def clean_title(title, song_name):
+    """确保标题长度合适且去除可能的引号"""
+    title = title.strip().strip('"\'')
+    if len(title) < 10:
+        title = f"【{song_name}】绝美音乐MV"
+    elif len(title) > 25:
+        # 智能截断
+        if "】" in title:
+            parts = title.split("】", 1)
+            if len(parts) == 2:
+                title = parts[0] + "】" + parts[1][:25-len(parts[0])-1]
+        else:
+            title = title[:25]
+    return title
 
 class AITitleGenerator:
     """AI标题生成器 - 集成版本"""
@@ -36,25 +307,31 @@ class AITitleGenerator:
             providers = ai_config.get("providers", {})
             provider_config = providers.get(provider, {})
             
+            self.provider = provider
             self.api_key = provider_config.get("api_key", "")
             self.base_url = provider_config.get("base_url", "")
             self.model = provider_config.get("model", "")
+            # AI配置对话框把超时和重试次数保存在ai层级，优先使用；没有时再用提供商中的值
+            self.timeout = ai_config.get("timeout", provider_config.get("timeout", 30))
+            self.max_retries = ai_config.get("max_retries", provider_config.get("max_retries", 3))
         else:
             # 使用显式参数
+            self.provider = "custom"
             self.api_key = api_key
             self.base_url = base_url or (
                 os.getenv("LRC2VIDEO_API_BASE_URL") or 
                 "https://openrouter.ai/api/v1"
             )
             self.model = model or os.getenv("LRC2VIDEO_MODEL") or "moonshotai/kimi-k2:free"
+            self.timeout = 30
+            self.max_retries = 3
         
         self.enabled = bool(self.api_key) and HAS_OPENAI_LIB
         
+        # 共享客户端：复用连接，并发和速率在所有线程间统一限制
         if self.enabled:
-            self.client = OpenAI(
-                base_url=self.base_url,
-                api_key=self.api_key,
-            )
+            self.client = get_ai_client(self.base_url, self.api_key,
+                                        timeout=self.timeout, max_retries=self.max_retries)
         else:
             self.client = None
     
@@ -63,178 +340,127 @@ class AITitleGenerator:
         if not self.enabled:
             return None
             
-        # 根据歌手和歌曲名分析风格特征
-        style_context = self._analyze_music_style(song_name, artist)
+        prompt = self._build_prompt(song_name, artist)
         
-        prompt = f"""你是一个专业的音乐视频标题策划师！根据以下信息为这首歌曲量身定制一个独特的爆款标题：
+        try:
+            # 重试、退避和限速由共享客户端处理
+            title = self.client.chat_sync(
+                self.model,
+                [{"role": "user", "content": prompt}],
+                max_tokens=50,
+                temperature=0.8
+            )
+            return clean_title(title, song_name)
+        except Exception as e:
+            # 静默处理所有错误，不输出到控制台
+            logger.debug(f"AI标题生成失败: {e}")
+            return None
+    
+    def get_batch_limit(self):
+        """每批最多歌曲数：不超过配置的批量大小，也不超过模型输出token上限"""
+        ai_config = get_config().get("ai", {}) or {}
+        batch_size = max(1, int(ai_config.get("batch_size", 10)))
+        max_output_tokens = int(ai_config.get("max_output_tokens", 2048))
+        token_limit = max(1, (max_output_tokens - 50) // BATCH_TOKENS_PER_SONG)
+        return min(batch_size, token_limit)
 
-                    🎵 歌曲信息：
-                    歌曲名：《{song_name}》
-                    歌手：{artist if artist else '未知'}
-                    风格特征：{style_context}
+    def generate_titles(self, tracks):
+        """为多首歌批量生成标题
 
-                    🎯 创作要求：
-                    1. **个性化**：必须体现这首歌的独特气质和歌手风格
-                    2. **情感共鸣**：针对{style_context}的特点，精准触发对应情感
-                    3. **记忆钩子**：创造专属的记忆点，避免千篇一律的模板
-                    4. **平台适配**：B站/抖音风格，但保持音乐质感
-                    5. **长度控制**：15-25字，朗朗上口
+        Args:
+            tracks: [(歌曲名, 歌手), ...]
 
-                    💡 创作思路：
-                    - 如果是抒情歌曲：突出治愈、回忆、遗憾等情感
-                    - 如果是摇滚/电音：强调炸裂、燃爆、震撼等感受  
-                    - 如果是民谣：营造故事感、生活化、温暖氛围
-                    - 如果是Live版：突出现场魅力、真实感动
-                    - 根据歌手特色：比如周杰伦的"青春"、林俊杰的"治愈"、邓紫棋的"爆发力"
+        Returns:
+            list: 与tracks一一对应的标题，失败的为None
+        """
+        if not self.enabled or not tracks:
+            return [None] * len(tracks)
 
-                    🚀 爆款公式：
-                    【歌名】+ 专属记忆点 + 情感爆点
-                    避免使用"听完直接破防"这类通用模板！
+        limit = self.get_batch_limit()
+        size = _batch_size.get(limit)
+        chunks = [tracks[i:i + size] for i in range(0, len(tracks), size)]
+        # 各批次在共享客户端的事件循环中并发执行
+        futures = [self.client.submit(self._generate_batch(chunk, limit)) for chunk in chunks]
+        titles = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                titles.extend(future.result())
+            except Exception as e:
+                logger.debug(f"AI批量标题生成失败: {e}")
+                titles.extend([None] * len(chunk))
+        return titles
 
-                    🎭 风格示例：
-                    - 周杰伦【晴天】：前奏一响就是整个青春
-                    - 林俊杰【江南】：江南一响，多少人的意难平
-                    - 邓紫棋【光年之外】：高音一出直接头皮发麻
-                    - 五月天【倔强】：万人合唱现场，这就是青春啊
+    def _build_prompt(self, song_name, artist=None):
+        # 根据歌手和歌曲名分析风格特征
+        style_context = self._analyze_music_style(song_name, artist)
+        return TITLE_PROMPT_TEMPLATE.format(
+            song_name=song_name,
+            artist=artist if artist else '未知',
+            style_context=style_context,
+            artist_hint=f'和{artist}的风格' if artist else ''
+        )
 
-                    请根据《{song_name}》{f'和{artist}的风格' if artist else ''}，创作一个独一无二的标题！
-                    直接返回标题，不要解释！"""
-        
+    async def _generate_single(self, song_name, artist=None):
         try:
-            import time
-            
-            # 静默重试机制，最多2次尝试
-            max_retries = 2
-            for attempt in range(max_retries):
-                try:
-                    completion = self.client.chat.completions.create(
-                        extra_headers={
-                            "HTTP-Referer": "https://github.com/Lrc2Video",
-                            "X-Title": "Lrc2Video",
-                        },
-                        model=self.model,
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=50,
-                        temperature=0.8,
-                        timeout=8
-                    )
-                    
-                    title = completion.choices[0].message.content.strip()
-                    
-                    # 确保标题长度合适且去除可能的引号
-                    title = title.strip('"\'')
-                    if len(title) < 10:
-                        title = f"【{song_name}】绝美音乐MV"
-                    elif len(title) > 25:
-                        # 智能截断
-                        if "】" in title:
-                            parts = title.split("】", 1)
-                            if len(parts) == 2:
-                                title = parts[0] + "】" + parts[1][:25-len(parts[0])-1]
-                        else:
-                            title = title[:25]
-                    
-                    return title
-                    
-                except Exception as api_error:
-                    # 只在最后一次失败时输出错误信息
-                    if attempt == max_retries - 1:
-                        break
-                    # 静默重试，不输出重试信息
-                    time.sleep(1)
-            
-            # 所有重试都失败，返回None让调用方处理
-            return None
-                        
+            title = await self.client.chat(
+                self.model,
+                [{"role": "user", "content": self._build_prompt(song_name, artist)}],
+                max_tokens=50,
+                temperature=0.8
+            )
+            return clean_title(title, song_name)
         except Exception as e:
-            # 静默处理所有错误，不输出到控制台
+            logger.debug(f"AI标题生成失败: {e}")
             return None
-    
+
+    async def _generate_batch(self, chunk, limit):
+        """一次请求生成一批标题，未能解析的歌曲逐首补发"""
+        if len(chunk) == 1:
+            return [await self._generate_single(*chunk[0])]
+
+        songs = [{"id": i, "song": song_name, "artist": artist or "未知",
+                  "style": self._analyze_music_style(song_name, artist)}
+                 for i, (song_name, artist) in enumerate(chunk, 1)]
+        prompt = BATCH_TITLE_PROMPT_TEMPLATE.format(
+            songs_json=json.dumps(songs, ensure_ascii=False))
+
+        parsed = {}
+        try:
+            completion = await self.client.complete(
+                self.model,
+                [{"role": "user", "content": prompt}],
+                max_tokens=BATCH_TOKENS_PER_SONG * len(chunk) + 50,
+                temperature=0.8
+            )
+            choice = completion.choices[0]
+            parsed = parse_batch_titles(choice.message.content or "")
+            if choice.finish_reason == "length" or len(parsed) < len(chunk):
+                _batch_size.shrink()
+            else:
+                _batch_size.grow(limit)
+        except Exception as e:
+            logger.debug(f"AI批量标题请求失败: {e}")
+
+        titles = [clean_title(parsed[i], song_name) if i in parsed else None
+                  for i, (song_name, _) in enumerate(chunk, 1)]
+        missing = [i for i, title in enumerate(titles) if title is None]
+        if missing:
+            retried = await asyncio.gather(*(self._generate_single(*chunk[i]) for i in missing))
+            for i, title in zip(missing, retried):
+                titles[i] = title
+        return titles
+
     def is_configured(self):
         """检查是否已配置API密钥"""
         return self.enabled
     
     def _analyze_music_style(self, song_name, artist=None):
         """根据歌手和歌曲名分析音乐风格特征"""
-        # 歌手风格特征库
-        artist_styles = {
-            "周杰伦": "青春回忆、华语经典、R&B融合、青春校园",
-            "林俊杰": "治愈系、情歌王子、高音震撼、情感细腻",
-            "邓紫棋": "爆发力、高音炸裂、实力派、舞台王者",
-            "五月天": "青春摇滚、万人合唱、治愈系、正能量",
-            "陈奕迅": "情感深沉、唱功顶级、故事感、港风经典",
-            "薛之谦": "深情款款、歌词走心、情感共鸣、都市情歌",
-            "Taylor Swift": "青春故事、情感真挚、乡村转流行、创作才女",
-            "Ed Sheeran": "温暖治愈、民谣风、情歌王子、欧美经典",
-            "Adele": "灵魂歌姬、情感爆发、唱功顶级、欧美天后",
-            "Billie Eilish": "暗黑系、独特声线、年轻态度、另类流行"
-        }
-        
-        # 歌曲关键词特征
-        song_keywords = {
-            "live": "现场版、真实感动、Live魅力",
-            "Live": "现场版、真实感动、Live魅力",
-            "live版": "现场版、真实感动、Live魅力",
-            "Live版": "现场版、真实感动、Live魅力",
-            "remix": "电音、混音、节奏感、夜店风",
-            "Remix": "电音、混音、节奏感、夜店风",
-            "acoustic": "不插电、纯净、民谣风、温暖",
-            "Acoustic": "不插电、纯净、民谣风、温暖",
-            "cover": "翻唱、全新演绎、致敬经典",
-            "Cover": "翻唱、全新演绎、致敬经典"
-        }
-        
-        # 情感关键词
-        emotion_keywords = {
-            "爱": "情感、爱情、温暖",
-            "泪": "感动、泪目、深情",
-            "心": "情感、共鸣、触动",
-            "夜": "夜晚、孤独、思念",
-            "雨": "伤感、忧郁、思念",
-            "风": "回忆、青春、时光",
-            "光": "希望、温暖、治愈",
-            "梦": "梦想、青春、回忆",
-            "你": "情感、思念、共鸣",
-            "我": "个人情感、自我表达"
-        }
-        
-        style_parts = []
-        
-        # 分析歌手风格
-        if artist and artist in artist_styles:
-            style_parts.append(artist_styles[artist])
-        
-        # 分析歌曲版本特征
-        song_lower = str(song_name).lower()
-        for keyword, style in song_keywords.items():
-            if keyword.lower() in song_lower:
-                style_parts.append(style)
-                break
-        
-        # 分析情感特征
-        for keyword, emotion in emotion_keywords.items():
-            if keyword in str(song_name):
-                style_parts.append(emotion)
-                break
-        
-        # 默认风格判断
-        if not style_parts:
-            # 根据歌名长度和用词判断
-            if len(str(song_name)) <= 4:
-                style_parts.append("华语经典、情感共鸣")
-            elif any(word in str(song_name) for word in ['的', '了', '我', '你']):
-                style_parts.append("华语流行、情感表达")
-            else:
-                style_parts.append("音乐MV、情感共鸣")
-        
-        return '、'.join(set(style_parts))
+        return get_title_engine().style_context(song_name, artist)
 
 def get_default_title(song_name, artist=None):
-    """获取默认标题（当AI生成失败时）"""
-    # 为默认标题也增加一些吸引力
-    if artist:
-        return f"【{song_name}】{artist}的封神现场！"
-    return f"【{song_name}】听完直接破防的音乐MV"
+    """获取默认标题（当AI关闭或生成失败时），由离线标题引擎按风格生成"""
+    return get_title_engine().generate(song_name, artist)
 
 def generate_video_title(song_name, artist=None, use_ai=True):
     """
@@ -255,8 +481,63 @@ def generate_video_title(song_name, artist=None, use_ai=True):
     if not generator.is_configured():
         return get_default_title(song_name, artist)
     
+    # 优先使用本地缓存，重新渲染时不再重复调用AI
+    use_cache = get_config().get("ai.cache.enabled", True)
+    if use_cache:
+        cache = get_title_cache()
+        cache_key = TitleCache.make_key(song_name, artist, generator.provider, generator.model)
+        cached_title = cache.get(cache_key)
+        if cached_title:
+            return cached_title
+    
     ai_title = generator.generate_title(song_name, artist)
     if ai_title:
+        if use_cache:
+            cache.set(cache_key, ai_title, song_name=song_name, artist=artist,
+                      provider=generator.provider, model=generator.model)
         return ai_title
     else:
-        return get_default_title(song_name, artist)
\ No newline at end of file
+        return get_default_title(song_name, artist)
+
+
+def generate_video_titles(tracks, use_ai=True):
+    """
+    批量生成视频标题，先查缓存，未命中的合并成批量AI请求
+    
+    Args:
+        tracks: [(歌曲名, 歌手), ...]
+        use_ai: 是否使用AI生成
+    
+    Returns:
+        list: 与tracks一一对应的最终标题
+    """
+    if not use_ai:
+        return [get_default_title(song_name, artist) for song_name, artist in tracks]
+    
+    generator = AITitleGenerator()
+    if not generator.is_configured():
+        return [get_default_title(song_name, artist) for song_name, artist in tracks]
+    
+    use_cache = get_config().get("ai.cache.enabled", True)
+    cache = get_title_cache() if use_cache else None
+    titles = [None] * len(tracks)
+    pending = {}
+    for index, (song_name, artist) in enumerate(tracks):
+        if cache is not None:
+            cached_title = cache.get(TitleCache.make_key(song_name, artist, generator.provider, generator.model))
+            if cached_title:
+                titles[index] = cached_title
+                continue
+        pending.setdefault((song_name, artist), []).append(index)
+    
+    if pending:
+        keys = list(pending)
+        for (song_name, artist), ai_title in zip(keys, generator.generate_titles(keys)):
+            if ai_title and cache is not None:
+                cache.set(TitleCache.make_key(song_name, artist, generator.provider, generator.model),
+                          ai_title, song_name=song_name, artist=artist,
+                          provider=generator.provider, model=generator.model)
+            title = ai_title or get_default_title(song_name, artist)
+            for index in pending[(song_name, artist)]:
+                titles[index] = title
+    return titles
@@ -157,6 +157,22 @@ class ConfigManager:
         except Exception as e:
             print(f"保存配置文件失败: {e}")
     
+    def read_saved(self, key_path: str, default: Any = None) -> Any:
+        """从配置文件读取当前保存的值（文件可能已被调优脚本等其他程序修改）
+        
+        Args:
+            key_path: 例如 'video' 或 'video.crf'
+            default: 文件不存在、无法读取或没有该项时的默认值
+        """
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            for key in key_path.split('.'):
+                value = value[key]
+            return value
+        except (OSError, ValueError, KeyError, TypeError):
+            return default
+    
     def reset_config(self):
         """重置为默认配置"""
         self._config = self._get_default_config()
@@ -0,0 +1,317 @@
+"""
+编码器能力检测
+ffmpeg -encoders 只能说明编码器被编译进了ffmpeg，不代表能用（没有显卡、驱动版本不对、会话数已满等）。
+这里对每个候选编码器做一次很短的试编码，记录能用的编码器、各预设实测的编码速度和ffmpeg版本，
+按ffmpeg可执行文件的路径和修改时间缓存到 cache/encoder_capabilities.json；
+启动和批量生成时只读缓存，不再启动子进程，更换或升级ffmpeg后自动重新检测。
+会话数已满、显卡忙、超时这类临时故障只短时间有效，其他失败（如驱动未安装）也会定期重新检测。
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .ffmpeg_tools import get_ffmpeg_cmd
+from .json_store import JsonFileStore, LazySingleton
+
+logger = logging.getLogger(__name__)
+
+ENCODER_CAPABILITIES_VERSION = 1
+
+# 硬件加速类型 -> ffmpeg编码器名
+ENCODER_NAMES = {
+    'nvenc': 'h264_nvenc',
+    'qsv': 'h264_qsv',
+    'amf': 'h264_amf',
+    'videotoolbox': 'h264_videotoolbox',
+    'none': 'libx264',
+}
+
+# 试编码的预设；硬件编码器的预设映射后相同的只编码一次
+TRIAL_PRESETS = ('ultrafast', 'veryfast', 'medium', 'slow')
+TRIAL_FRAMES = 60
+TRIAL_SOURCE = 'testsrc2=size=1280x720:rate=25'
+TRIAL_TIMEOUT = 60
+
+# 有编码器试编码失败时，检测结果的有效期（秒）：临时故障很快重试，其他失败（装驱动后可能恢复）每周重试
+TRANSIENT_FAILURE_TTL = 10 * 60
+FAILURE_TTL = 7 * 24 * 3600
+
+# 临时故障：其他程序占用了编码会话或显存，稍后重试可能成功。
+# NVENC的 OpenEncodeSessionEx 失败也可能是永久性的（unsupported device (2)、no encode device (1)），只按错误码匹配
+TRANSIENT_ERROR_PATTERNS = (
+    'out of memory (10)',           # NV_ENC_ERR_OUT_OF_MEMORY：会话数已满或显存不足
+    'incompatible client key (21)', # NV_ENC_ERR_INCOMPATIBLE_CLIENT_KEY：消费级显卡会话数已满
+    'device or resource busy',      # EBUSY：VAAPI/V4L2 设备被占用
+    'resource temporarily unavailable',
+)
+
+# 进度行中的编码速度，如 fps=143
+FPS_PATTERN = re.compile(r'fps=\s*([\d.]+)')
+ENCODER_LINE_PATTERN = re.compile(r'^\s*V\S*\s+(\S+)', re.MULTILINE)
+
+
+def build_encoder_args(hwaccel, preset='medium', tune='film', crf=23):
+    """硬件加速类型和预设 -> ffmpeg视频编码参数"""
+    if hwaccel == 'nvenc':
+        # NVIDIA NVENC
+        nvenc_preset = 'fast' if preset in ['ultrafast', 'superfast', 'veryfast', 'faster'] else 'slow'
+        return ['-c:v', 'h264_nvenc', '-preset', nvenc_preset]
+    if hwaccel == 'qsv':
+        # Intel Quick Sync Video
+        qsv_preset = 'veryfast' if preset in ['ultrafast', 'superfast', 'veryfast'] else 'medium'
+        return ['-c:v', 'h264_qsv', '-preset', qsv_preset]
+    if hwaccel == 'amf':
+        # AMD AMF
+        amf_usage = 'lowlatency' if preset in ['ultrafast', 'superfast', 'veryfast'] else 'balanced'
+        return ['-c:v', 'h264_amf', '-usage', amf_usage]
+    if hwaccel == 'videotoolbox':
+        # macOS VideoToolbox
+        return ['-c:v', 'h264_videotoolbox', '-allow_sw', '1']
+    # 软件编码 (libx264)
+    return ['-c:v', 'libx264', '-preset', preset, '-tune', tune, '-crf', str(crf)]
+
+
+class EncoderCapabilities(NamedTuple):
+    """一个ffmpeg可执行文件的编码器检测结果"""
+    ffmpeg_version: Optional[str]
+    compiled: List[str]                 # 编译进ffmpeg的编码器（硬件加速类型）
+    usable: List[str]                   # 试编码成功的编码器
+    fps: Dict[str, Dict[str, float]]    # {硬件加速类型: {预设: 实测fps}}
+    errors: Dict[str, str]              # {硬件加速类型: 不可用的原因}
+    probed_at: float = 0.0
+    transient: Tuple[str, ...] = ()     # 因临时故障试编码失败的编码器
+
+    def is_usable(self, hwaccel):
+        return hwaccel in self.usable
+
+    def is_expired(self, now=None):
+        """全部编码器都成功时一直有效；有失败时按故障类型设有效期"""
+        failed = [hwaccel for hwaccel in self.compiled if hwaccel not in self.usable]
+        if not failed:
+            return False
+        ttl = TRANSIENT_FAILURE_TTL if self.transient else FAILURE_TTL
+        return (now if now is not None else time.time()) - self.probed_at > ttl
+
+    def fastest(self, preset='medium'):
+        """指定预设下实测最快的可用编码器"""
+        measured = [(speeds[preset], hwaccel) for hwaccel, speeds in self.fps.items()
+                    if hwaccel in self.usable and preset in speeds]
+        return max(measured)[1] if measured else 'none'
+
+    def to_record(self):
+        return self._asdict()
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(**{field: record[field] for field in cls._fields if field in record})
+
+
+def _resolve_executable(token):
+    """命令中的一项 -> 实际文件路径，不是文件时返回None"""
+    path = token if os.path.isfile(token) else shutil.which(token)
+    return os.path.abspath(path) if path else None
+
+
+def ffmpeg_signature(cmd=None):
+    """ffmpeg命令的缓存键：命令中每个可执行文件/脚本的 (路径, 大小, 修改时间)"""
+    cmd = cmd if cmd is not None else get_ffmpeg_cmd()
+    parts = []
+    for token in cmd:
+        path = _resolve_executable(token)
+        if path is None:
+            parts.append(token)
+            continue
+        try:
+            stat = os.stat(path)
+            parts.append([path, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            parts.append(path)
+    return json.dumps(parts, ensure_ascii=False)
+
+
+def _run(cmd, timeout):
+    return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8',
+                          errors='replace', timeout=timeout)
+
+
+def _last_error_line(output, encoder=None):
+    """失败原因：优先取编码器自己输出的错误行"""
+    lines = [line.strip() for line in (output or '').splitlines() if line.strip()]
+    for line in lines:
+        if encoder and line.startswith(f'[{encoder} @'):
+            return line
+    for line in reversed(lines):
+        if 'error' in line.lower() or 'failed' in line.lower():
+            return line
+    return lines[-1] if lines else "未知错误"
+
+
+def is_transient_error(error):
+    """试编码失败是否为临时故障（超时、会话数已满、设备忙）"""
+    if error is None:
+        return False
+    if error.startswith("试编码超过"):
+        return True
+    error = error.lower()
+    return any(pattern in error for pattern in TRANSIENT_ERROR_PATTERNS)
+
+
+def trial_encode(hwaccel, preset='medium', cmd=None, frames=TRIAL_FRAMES):
+    """用测试图案试编码几秒画面
+
+    Returns:
+        (fps, 错误信息)：成功时错误信息为None
+    """
+    cmd = cmd if cmd is not None else get_ffmpeg_cmd()
+    trial_cmd = cmd + ['-hide_banner', '-nostdin', '-y',
+                       '-f', 'lavfi', '-i', TRIAL_SOURCE, '-frames:v', str(frames)]
+    trial_cmd += build_encoder_args(hwaccel, preset)
+    trial_cmd += ['-f', 'null', '-']
+    start = time.perf_counter()
+    try:
+        result = _run(trial_cmd, TRIAL_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return None, f"试编码超过{TRIAL_TIMEOUT}秒"
+    except OSError as e:
+        return None, str(e)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return None, _last_error_line(result.stderr, ENCODER_NAMES.get(hwaccel))
+    # 优先使用ffmpeg统计的速度（不含进程启动时间）
+    matches = FPS_PATTERN.findall(result.stderr)
+    fps = float(matches[-1]) if matches else 0.0
+    if fps <= 0:
+        fps = frames / max(elapsed, 1e-6)
+    return round(fps, 1), None
+
+
+def probe_encoder_capabilities(cmd=None, presets=TRIAL_PRESETS, frames=TRIAL_FRAMES):
+    """检测ffmpeg版本、编译进的编码器，并逐个试编码（会启动多个ffmpeg进程）"""
+    cmd = cmd if cmd is not None else get_ffmpeg_cmd()
+    version = None
+    compiled_names = set()
+    try:
+        result = _run(cmd + ['-version'], 30)
+        first_line = result.stdout.strip().splitlines()[0] if result.stdout.strip() else ''
+        match = re.match(r'ffmpeg version (\S+)', first_line)
+        version = match.group(1) if match else (first_line or None)
+        result = _run(cmd + ['-hide_banner', '-encoders'], 30)
+        compiled_names = set(ENCODER_LINE_PATTERN.findall(result.stdout))
+    except (OSError, IndexError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"⚠️ 无法运行ffmpeg: {e}")
+
+    compiled, usable, fps, errors, transient = [], [], {}, {}, []
+    for hwaccel, encoder in ENCODER_NAMES.items():
+        if encoder not in compiled_names:
+            errors[hwaccel] = f"ffmpeg未编译 {encoder}"
+            continue
+        compiled.append(hwaccel)
+        speeds = {}
+        measured = {}       # 实际编码参数 -> fps，映射后相同的预设不重复试编码
+        for preset in presets:
+            key = tuple(build_encoder_args(hwaccel, preset))
+            if key not in measured:
+                measured[key], error = trial_encode(hwaccel, preset, cmd, frames)
+                if error is not None:
+                    errors[hwaccel] = error
+                    if is_transient_error(error):
+                        transient.append(hwaccel)
+                    logger.info(f"⏭️ 编码器 {hwaccel} 试编码失败: {error}")
+                    break
+            speeds[preset] = measured[key]
+        else:
+            usable.append(hwaccel)
+            fps[hwaccel] = speeds
+    return EncoderCapabilities(version, compiled, usable, fps, errors, time.time(), tuple(transient))
+
+
+class EncoderCapabilityCache:
+    """编码器检测结果缓存，以ffmpeg可执行文件的签名为键"""
+
+    def __init__(self, cache_file="cache/encoder_capabilities.json", max_entries=8):
+        self.cache_file = Path(cache_file)
+        self.max_entries = max_entries
+        self._store = JsonFileStore(self.cache_file, version=ENCODER_CAPABILITIES_VERSION,
+                                    label="编码器检测缓存", indent=2)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load()
+
+    def _load(self):
+        data = self._store.load()
+        if data is not None:
+            self._entries = data.get("entries", {})
+
+    def get(self, signature):
+        """缓存的检测结果，没有或已过期时返回None"""
+        with self._lock:
+            record = self._entries.get(signature)
+        if record is None:
+            return None
+        try:
+            capabilities = EncoderCapabilities.from_record(record)
+        except TypeError:
+            return None
+        return None if capabilities.is_expired() else capabilities
+
+    def set(self, signature, capabilities):
+        with self._lock:
+            self._entries.pop(signature, None)
+            self._entries[signature] = capabilities.to_record()
+            # 只保留最近检测的几个ffmpeg
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self.save()
+
+    def _snapshot(self):
+        with self._lock:
+            return {"entries": dict(self._entries)}
+
+    def save(self):
+        """写入磁盘"""
+        self._store.save(self._snapshot)
+
+
+_capability_cache = LazySingleton(EncoderCapabilityCache)
+# 同一时间只做一次检测，其他线程等待结果
+_probe_lock = threading.Lock()
+
+
+def get_capability_cache():
+    """获取全局编码器检测缓存"""
+    return _capability_cache.get()
+
+
+def get_encoder_capabilities(refresh=False, probe=True):
+    """获取当前ffmpeg的编码器能力
+
+    Args:
+        refresh: 忽略缓存重新检测
+        probe: 缓存中没有时是否试编码检测；为False时只读缓存（不启动子进程）
+
+    Returns:
+        EncoderCapabilities；probe=False且没有缓存时返回None
+    """
+    cache = get_capability_cache()
+    signature = ffmpeg_signature()
+    if not refresh:
+        capabilities = cache.get(signature)
+        if capabilities is not None or not probe:
+            return capabilities
+    with _probe_lock:
+        # 等待期间其他线程可能已经检测完成
+        capabilities = None if refresh else cache.get(signature)
+        if capabilities is None:
+            logger.info("🔍 检测可用的视频编码器...")
+            capabilities = probe_encoder_capabilities()
+            cache.set(signature, capabilities)
+            logger.info(f"✅ 可用编码器: {', '.join(capabilities.usable)}")
+    return capabilities
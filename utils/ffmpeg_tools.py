@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FFmpeg/FFprobe 可执行文件定位
+
+优先级：环境变量 > 配置文件 video.ffmpeg_path / video.ffprobe_path > 系统PATH
+环境变量可以带参数，例如：
+    LRC2VIDEO_FFMPEG="python scripts/fake_ffmpeg.py"
+    LRC2VIDEO_FFPROBE="python scripts/fake_ffmpeg.py --ffprobe"
+"""
+
+import os
+import shlex
+from typing import List
+
+
+def _resolve_command(env_name: str, config_key: str, default: str) -> List[str]:
+    value = os.getenv(env_name)
+    if not value:
+        try:
+            from .config_manager import get_config_value
+            value = get_config_value(config_key)
+        except Exception:
+            value = None
+    if not value:
+        return [default]
+    # Windows路径中的反斜杠不能按POSIX规则转义
+    return shlex.split(value, posix=(os.name != 'nt'))
+
+
+def get_ffmpeg_cmd() -> List[str]:
+    """获取ffmpeg命令前缀"""
+    return _resolve_command('LRC2VIDEO_FFMPEG', 'video.ffmpeg_path', 'ffmpeg')
+
+
+def get_ffprobe_cmd() -> List[str]:
+    """获取ffprobe命令前缀"""
+    return _resolve_command('LRC2VIDEO_FFPROBE', 'video.ffprobe_path', 'ffprobe')
@@ -4,61 +4,17 @@
 文件处理工具函数
 """
 
-import re
+import os
 import subprocess
 from pathlib import Path
-import pysubs2
+from typing import NamedTuple, Optional
 
-def parse_lrc_manually(lrc_path):
-    """手动解析LRC文件"""
-    try:
-        with open(lrc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            print(f"成功使用 utf-8 读取文件: {lrc_path}")
-    except UnicodeDecodeError:
-        for enc in ['gbk', 'gb2312', 'latin-1', 'cp1252']:
-            try:
-                with open(lrc_path, 'r', encoding=enc) as f:
-                    content = f.read()
-                    print(f"成功使用 {enc} 读取文件: {lrc_path}")
-                break
-            except: 
-                continue
-        else:
-            raise ValueError("无法识别 LRC 文件编码")
-
-    subs = pysubs2.SSAFile()
-    time_pattern = r'\[(\d{1,2}):(\d{1,2})(?:\.(\d{1,3}))?\]'
-    for line in content.splitlines():
-        matches = list(re.finditer(time_pattern, line))
-        text   = re.sub(time_pattern, '', line).strip()
-        if matches and text:
-            # 只取最早的那个时间戳
-            m, s, cs = map(int, matches[0].groups(default='0'))
-            start_ms = (m * 60 + s) * 1000 + cs * 10
-            subs.append(pysubs2.SSAEvent(start=start_ms,
-                                        end=start_ms + 3000,
-                                        text=text))
-    # for line in content.splitlines():
-    #     matches = list(re.finditer(time_pattern, line))
-    #     text = re.sub(time_pattern, '', line).strip()
-    #     if matches and text:
-    #         for match in matches:
-    #             m, s, cs = int(match[1]), int(match[2]), int(match[3] or 0)
-    #             start_ms = (m * 60 + s) * 1000 + cs * 10
-    #             subs.append(pysubs2.SSAEvent(start=start_ms, end=start_ms + 3000, text=text))
-    
-    # 调整结束时间
-    for i in range(len(subs)-1): 
-        subs[i].end = subs[i+1].start
-    if subs: 
-        subs[-1].end = subs[-1].start + 3000
-    return subs
+from .ffmpeg_tools import get_ffmpeg_cmd, get_ffprobe_cmd
 
 def extract_cover_image(audio_path, cover_path):
     """从音频文件提取封面图片"""
     try:
-        cmd = ['ffmpeg', '-y', '-i', str(audio_path), '-an', '-vcodec', 'copy', str(cover_path)]
+        cmd = get_ffmpeg_cmd() + ['-y', '-i', str(audio_path), '-an', '-vcodec', 'copy', str(cover_path)]
         subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return cover_path.exists()
     except:
@@ -67,48 +23,117 @@ def extract_cover_image(audio_path, cover_path):
 def get_audio_duration(audio_path):
     """获取音频文件时长"""
     try:
-        result = subprocess.run([
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        result = subprocess.run(get_ffprobe_cmd() + [
+            '-v', 'error', '-show_entries', 'format=duration',
             '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)
         ], capture_output=True, text=True)
         return float(result.stdout.strip())
     except: 
         return 300  # 默认5分钟
 
+AUDIO_EXTENSIONS = {'.mp3', '.flac', '.wav', '.m4a', '.aac'}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ScanEntry(NamedTuple):
+    """扫描结果条目，lrc 为 None 表示缺少歌词"""
+    audio: Path
+    lrc: Optional[Path]
+    background: Optional[Path]
+
+
+def _find_background(images, directory, stem):
+    """在目录的图片索引中按扩展名优先级查找同名背景图"""
+    names = images.get(directory)
+    if not names:
+        return None
+    for ext in IMAGE_EXTENSIONS:
+        name = names.get(f"{stem}{ext}".lower())
+        if name:
+            return directory / name
+    return None
+
+
+def iter_folder_files(folder_path, chunk_size=500):
+    """增量扫描文件夹，分批产出 ScanEntry 列表
+
+    整个目录树只遍历一次，歌词和背景图片通过内存索引匹配，
+    不再对每个文件做 exists()/rglob 查询。同目录下的歌词优先，
+    找不到时在整个文件夹中按文件名匹配；缺少歌词的音频最后产出。
+    """
+    folder = Path(folder_path)
+    seen_stems = set()
+    lrc_index = {}      # 文件名(stem) -> 第一个找到的歌词路径
+    images = {}         # 目录 -> {小写文件名: 实际文件名}
+    pending = []        # 同目录没有歌词的音频，遍历结束后再匹配
+    chunk = []
+
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        directory = Path(dirpath)
+        dir_lrcs = {}
+        dir_images = {}
+        dir_audios = []
+        for filename in sorted(filenames):
+            stem, ext = os.path.splitext(filename)
+            ext = ext.lower()
+            if ext in AUDIO_EXTENSIONS:
+                dir_audios.append((stem, filename))
+            elif ext == '.lrc':
+                dir_lrcs.setdefault(stem, filename)
+                lrc_index.setdefault(stem, directory / filename)
+            elif ext in IMAGE_EXTENSIONS:
+                dir_images[filename.lower()] = filename
+        if dir_images:
+            images[directory] = dir_images
+
+        for stem, filename in dir_audios:
+            # 同名音频只保留第一个，避免输出文件互相覆盖
+            if stem in seen_stems:
+                continue
+            seen_stems.add(stem)
+            audio = directory / filename
+            if stem in dir_lrcs:
+                lrc = directory / dir_lrcs[stem]
+                chunk.append(ScanEntry(audio, lrc, _find_background(images, directory, stem)))
+            else:
+                pending.append((stem, audio))
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    missing = []
+    for stem, audio in pending:
+        lrc = lrc_index.get(stem)
+        if lrc is None:
+            missing.append(ScanEntry(audio, None, None))
+            continue
+        background = (_find_background(images, audio.parent, stem)
+                      or _find_background(images, lrc.parent, lrc.stem))
+        chunk.append(ScanEntry(audio, lrc, background))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    chunk.extend(missing)
+    while chunk:
+        yield chunk[:chunk_size]
+        chunk = chunk[chunk_size:]
+
 def scan_folder_for_files(folder_path):
     """扫描文件夹中的音频和歌词文件"""
     folder = Path(folder_path)
     if not folder.exists():
         return [], "文件夹不存在"
     
-    # 查找音频文件
-    audio_extensions = {'.mp3', '.flac', '.wav', '.m4a', '.aac'}
-    audio_files = {}
-    
-    for file in folder.rglob('*'):
-        if file.suffix.lower() in audio_extensions:
-            name = file.stem
-            audio_files[name] = file
-    
-    # 查找对应的歌词文件
     file_pairs = []
     missing_files = []
+    for entries in iter_folder_files(folder):
+        for entry in entries:
+            if entry.lrc:
+                file_pairs.append((entry.audio, entry.lrc))
+            else:
+                missing_files.append(entry.audio)
     
-    for name, audio_file in audio_files.items():
-        lrc_file = None
-        # 在同一目录查找
-        potential_lrc = audio_file.parent / f"{name}.lrc"
-        if potential_lrc.exists():
-            lrc_file = potential_lrc
-        else:
-            # 在整个文件夹查找
-            for lrc in folder.rglob(f"{name}.lrc"):
-                lrc_file = lrc
-                break
-        
-        if lrc_file:
-            file_pairs.append((audio_file, lrc_file))
-        else:
-            missing_files.append(audio_file)
-    
-    return file_pairs, missing_files
\ No newline at end of file
+    return file_pairs, missing_files
@@ -0,0 +1,300 @@
+"""
+字体索引
+读取系统字体文件的 name/cmap 表，记录字体族名、样式、文件路径和是否支持中文，
+保存到 cache/font_index.json。字体目录的修改时间都没有变化时直接使用索引，
+有变化时只重新读取新增或修改过的文件。索引在后台线程构建，不阻塞界面。
+"""
+
+import logging
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import List, NamedTuple
+
+from .json_store import JsonFileStore, LazySingleton
+
+logger = logging.getLogger(__name__)
+
+# 索引格式变化时递增
+FONT_INDEX_VERSION = 1
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc', '.otc')
+
+# 歌词常见的汉字；字体包含全部这些字符时视为支持中文
+CJK_SAMPLE = "的一是不了人我在有这中大来上个们到说你爱"
+
+# name 表中的字体族名（1: 族名，16: 排版族名）和样式名（2, 17）
+NAME_FAMILY_IDS = (1, 16)
+NAME_STYLE_IDS = (2, 17)
+
+
+class FontFace(NamedTuple):
+    """字体文件中的一个字体（.ttc 可以包含多个）"""
+    path: str
+    index: int
+    families: List[str]     # 所有语言下的族名，如 ["Microsoft YaHei", "微软雅黑"]
+    style: str
+    cjk: bool
+
+
+def system_font_dirs():
+    """当前系统的字体目录（只返回存在的）"""
+    home = Path.home()
+    if sys.platform == 'win32':
+        windir = os.environ.get('WINDIR', r'C:\Windows')
+        dirs = [Path(windir) / 'Fonts']
+        local = os.environ.get('LOCALAPPDATA')
+        if local:
+            dirs.append(Path(local) / 'Microsoft' / 'Windows' / 'Fonts')
+    elif sys.platform == 'darwin':
+        dirs = [Path('/System/Library/Fonts'), Path('/Library/Fonts'), home / 'Library' / 'Fonts']
+    else:
+        dirs = [Path('/usr/share/fonts'), Path('/usr/local/share/fonts'),
+                home / '.fonts', home / '.local' / 'share' / 'fonts']
+    return [d for d in dirs if d.is_dir()]
+
+
+def _decode_name(platform_id, raw):
+    if platform_id in (0, 3):
+        return raw.decode('utf-16-be', errors='ignore')
+    return raw.decode('latin-1')
+
+
+def _read_names(f, offset):
+    """读取 name 表，返回 (族名列表, 样式名)"""
+    f.seek(offset)
+    _, count, string_offset = struct.unpack('>HHH', f.read(6))
+    records = [struct.unpack('>HHHHHH', f.read(12)) for _ in range(count)]
+    families, styles = [], {}
+    for platform_id, encoding_id, language_id, name_id, length, str_offset in records:
+        if name_id not in NAME_FAMILY_IDS and name_id not in NAME_STYLE_IDS:
+            continue
+        if platform_id == 1 and encoding_id != 0:
+            continue  # 只接受 Mac Roman，其他旧编码的Mac名称忽略
+        f.seek(offset + string_offset + str_offset)
+        name = _decode_name(platform_id, f.read(length)).strip('\x00 ')
+        if not name:
+            continue
+        if name_id in NAME_FAMILY_IDS:
+            if name not in families:
+                families.append(name)
+        elif language_id in (0, 0x409) or name_id not in styles:
+            styles[name_id] = name
+    style = styles.get(17) or styles.get(2) or 'Regular'
+    return families, style
+
+
+def _cmap_covers(f, offset, codepoints):
+    """cmap 表中的Unicode子表是否包含全部 codepoints"""
+    f.seek(offset)
+    _, count = struct.unpack('>HH', f.read(4))
+    subtables = {}
+    for _ in range(count):
+        platform_id, encoding_id, sub_offset = struct.unpack('>HHI', f.read(8))
+        subtables[(platform_id, encoding_id)] = sub_offset
+    for key in ((3, 10), (0, 4), (3, 1), (0, 3)):
+        if key not in subtables:
+            continue
+        f.seek(offset + subtables[key])
+        fmt = struct.unpack('>H', f.read(2))[0]
+        if fmt == 12:
+            _, _, _, groups = struct.unpack('>HIII', f.read(14))
+            ranges = [struct.unpack('>III', f.read(12))[:2] for _ in range(groups)]
+        elif fmt == 4:
+            _, _, seg_x2 = struct.unpack('>HHH', f.read(6))
+            f.read(6)
+            ends = struct.unpack(f'>{seg_x2 // 2}H', f.read(seg_x2))
+            f.read(2)
+            starts = struct.unpack(f'>{seg_x2 // 2}H', f.read(seg_x2))
+            # 字形映射到0（缺字）的情况很少见，这里只看字符范围
+            ranges = list(zip(starts, ends))
+        else:
+            continue
+        return all(any(start <= cp <= end for start, end in ranges) for cp in codepoints)
+    return False
+
+
+def _read_face(f, path, index, base):
+    f.seek(base)
+    header = f.read(12)
+    if len(header) < 12:
+        return None
+    num_tables = struct.unpack('>H', header[4:6])[0]
+    tables = {}
+    for _ in range(num_tables):
+        tag, _, table_offset, _ = struct.unpack('>4sIII', f.read(16))
+        tables[tag] = table_offset
+    if b'name' not in tables:
+        return None
+    families, style = _read_names(f, tables[b'name'])
+    if not families:
+        return None
+    cjk = b'cmap' in tables and _cmap_covers(f, tables[b'cmap'], [ord(c) for c in CJK_SAMPLE])
+    return FontFace(path, index, families, style, cjk)
+
+
+def read_font_faces(path):
+    """读取字体文件的 name/cmap 表（只读取需要的表，不加载整个文件）"""
+    try:
+        with open(path, 'rb') as f:
+            tag = f.read(4)
+            if tag == b'ttcf':
+                f.read(4)
+                count = struct.unpack('>I', f.read(4))[0]
+                offsets = struct.unpack(f'>{count}I', f.read(4 * count))
+            elif tag in (b'\x00\x01\x00\x00', b'OTTO', b'true'):
+                offsets = (0,)
+            else:
+                return []
+            faces = []
+            for index, base in enumerate(offsets):
+                face = _read_face(f, path, index, base)
+                if face is not None:
+                    faces.append(face)
+            return faces
+    except (OSError, struct.error, ValueError) as e:
+        logger.debug(f"读取字体失败 {path}: {e}")
+        return []
+
+
+class FontIndex:
+    """系统字体索引（线程安全）"""
+
+    def __init__(self, index_file="cache/font_index.json", font_dirs=None):
+        self.index_file = Path(index_file)
+        self.font_dirs = font_dirs
+        self._store = JsonFileStore(self.index_file, version=FONT_INDEX_VERSION, label="字体索引")
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._faces = []
+        self._families = {}     # 小写族名 -> [FontFace]
+        self._listeners = []
+
+    @staticmethod
+    def _dirs_unchanged(dir_mtimes):
+        # 新增、删除文件或子目录都会改变所在目录的修改时间
+        for path, mtime_ns in dir_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _scan(self, font_dirs, cached_files):
+        """遍历字体目录，只读取新增或修改过的文件"""
+        dir_mtimes = {}
+        files = {}
+        reused = 0
+        for font_dir in font_dirs:
+            for dirpath, _, filenames in os.walk(font_dir):
+                try:
+                    dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+                except OSError:
+                    continue
+                for filename in filenames:
+                    if not filename.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    cached = cached_files.get(path)
+                    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                        files[path] = cached
+                        reused += 1
+                        continue
+                    faces = [[face.index, face.families, face.style, face.cjk]
+                             for face in read_font_faces(path)]
+                    files[path] = [stat.st_size, stat.st_mtime_ns, faces]
+        logger.info(f"🔤 字体索引: {len(files)} 个字体文件（{len(files) - reused} 个重新读取）")
+        return dir_mtimes, files
+
+    def build(self):
+        """构建索引（同步执行，通常由 start() 在后台线程中调用）"""
+        try:
+            font_dirs = [str(d) for d in (self.font_dirs if self.font_dirs is not None else system_font_dirs())]
+            cached = self._store.load()
+            if (cached and sorted(cached.get("roots", [])) == sorted(font_dirs)
+                    and self._dirs_unchanged(cached.get("dirs", {}))):
+                files = cached.get("files", {})
+            else:
+                dir_mtimes, files = self._scan(font_dirs, cached.get("files", {}) if cached else {})
+                # 字体目录列表也要记录，换了系统或配置后索引失效
+                self._store.save(lambda: {"roots": font_dirs, "dirs": dir_mtimes, "files": files})
+            faces = [FontFace(path, index, families, style, cjk)
+                     for path, (_, _, entries) in files.items()
+                     for index, families, style, cjk in entries]
+        except Exception as e:
+            logger.error(f"构建字体索引失败: {e}")
+            faces = []
+        families = {}
+        for face in faces:
+            for family in face.families:
+                families.setdefault(family.lower(), []).append(face)
+        with self._lock:
+            self._faces = faces
+            self._families = families
+            listeners = list(self._listeners)
+            self._listeners.clear()
+            self._ready.set()
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"字体索引回调失败: {e}")
+
+    def start(self):
+        """在后台线程构建索引（只启动一次）"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.build, name="FontIndex", daemon=True)
+                self._thread.start()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """等待索引构建完成（未开始时先启动）"""
+        self.start()
+        return self._ready.wait(timeout)
+
+    def add_listener(self, callback):
+        """索引构建完成后调用 callback（在构建线程中）；已完成时立即调用"""
+        with self._lock:
+            if not self._ready.is_set():
+                self._listeners.append(callback)
+                return
+        callback()
+
+    def faces(self):
+        self.wait()
+        with self._lock:
+            return list(self._faces)
+
+    def find_family(self, family):
+        """字体族的所有字体（常规/粗体/斜体等），找不到时返回空列表"""
+        if not family:
+            return []
+        self.wait()
+        with self._lock:
+            return list(self._families.get(family.lower(), []))
+
+    def family_names(self):
+        """已安装的字体族名（每个字体取第一个族名），按名称排序"""
+        self.wait()
+        with self._lock:
+            names = {face.families[0] for face in self._faces}
+        return sorted(names, key=str.lower)
+
+
+_font_index = LazySingleton(FontIndex)
+
+
+def get_font_index():
+    """获取全局字体索引"""
+    return _font_index.get()
@@ -0,0 +1,140 @@
+"""
+字体预解析
+在生成视频之前，把样式中的字体名（以及中日韩字符的后备字体）解析为具体的字体文件，
+放进按样式区分的小目录 cache/fonts/<哈希>，通过 subtitles 滤镜的 fontsdir 参数交给 libass。
+libass 直接使用这些字体，不必为每首歌在全部系统字体中查找匹配和后备字体。
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .font_index import get_font_index
+
+logger = logging.getLogger(__name__)
+
+# 主字体不支持中文时依次尝试的后备字体
+CJK_FALLBACK_FAMILIES = (
+    "Microsoft YaHei", "PingFang SC", "Noto Sans CJK SC", "Noto Sans SC",
+    "Source Han Sans SC", "Source Han Sans CN", "WenQuanYi Micro Hei", "WenQuanYi Zen Hei",
+    "Hiragino Sans GB", "SimHei", "SimSun", "Droid Sans Fallback", "Arial Unicode MS",
+)
+
+
+class ResolvedFonts(NamedTuple):
+    """样式的字体解析结果"""
+    fonts_dir: str
+    family: Optional[str]               # 找到的主字体族名，None 表示系统中没有
+    fallback_family: Optional[str]      # 主字体不支持中文时使用的后备字体
+
+
+class FontResolver:
+    """字体族名 -> 字体文件
+
+    字体信息来自持久化的字体索引，同一进程内的所有任务共用；
+    每种样式的字体目录只准备一次。
+    """
+
+    def __init__(self, font_index=None, cache_dir="cache/fonts"):
+        self.font_index = font_index if font_index is not None else get_font_index()
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self._staged = {}       # (族名, 后备族名) -> ResolvedFonts
+
+    def find_family(self, family):
+        """字体族的所有字体（常规/粗体/斜体等），找不到时返回空列表"""
+        return self.font_index.find_family(family)
+
+    def find_cjk_fallback(self, preferred=None):
+        """找一个支持中文的后备字体族，返回 (族名, [FontFace])"""
+        candidates = ([preferred] if preferred else []) + list(CJK_FALLBACK_FAMILIES)
+        for family in candidates:
+            faces = [face for face in self.find_family(family) if face.cjk]
+            if faces:
+                return family, self.find_family(family)
+        # 常见字体都没有时，用索引中任意一个支持中文的字体
+        for face in self.font_index.faces():
+            if face.cjk:
+                return face.families[0], self.find_family(face.families[0])
+        return None, []
+
+    def resolve(self, family, fallback=None):
+        """为样式准备字体目录
+
+        Args:
+            family: 样式中的字体名
+            fallback: 优先使用的中文后备字体名（可选）
+
+        Returns:
+            ResolvedFonts；没有找到任何字体或准备失败时返回None，
+            调用方按原方式由libass自行查找字体
+        """
+        key = (family, fallback)
+        with self._lock:
+            if key in self._staged:
+                return self._staged[key]
+
+        faces = self.find_family(family)
+        fallback_family = None
+        fallback_faces = []
+        if not any(face.cjk for face in faces):
+            fallback_family, fallback_faces = self.find_cjk_fallback(fallback)
+        if not faces:
+            logger.warning(f"⚠️ 系统中没有找到字体 {family}")
+
+        files = sorted({face.path for face in faces + fallback_faces})
+        resolved = None
+        if files:
+            try:
+                resolved = ResolvedFonts(self._stage(files), family if faces else None, fallback_family)
+            except OSError as e:
+                logger.warning(f"⚠️ 准备字体目录失败，由libass自行查找字体: {e}")
+        # 失败的结果也记住，避免每首歌重复查找和警告
+        with self._lock:
+            self._staged[key] = resolved
+        return resolved
+
+    def _stage(self, files):
+        """把字体文件链接（无法链接时复制）到以文件列表哈希命名的目录"""
+        digest = hashlib.sha1()
+        for path in files:
+            stat = os.stat(path)
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode('utf-8'))
+        target = self.cache_dir / digest.hexdigest()[:16]
+        if target.is_dir():
+            return target.as_posix()
+
+        tmp_dir = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        for i, path in enumerate(files):
+            # 加序号，避免不同目录中的同名文件冲突
+            dest = tmp_dir / f"{i:02d}_{os.path.basename(path)}"
+            try:
+                os.link(path, dest)
+            except OSError:
+                shutil.copyfile(path, dest)
+        try:
+            os.replace(tmp_dir, target)
+        except OSError:
+            # 其他任务已经准备好了同一个目录
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not target.is_dir():
+                raise
+        return target.as_posix()
+
+
+_font_resolver = None
+_font_resolver_lock = threading.Lock()
+
+
+def get_font_resolver():
+    """获取全局字体解析器"""
+    global _font_resolver
+    with _font_resolver_lock:
+        if _font_resolver is None:
+            _font_resolver = FontResolver()
+        return _font_resolver
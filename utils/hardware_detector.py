@@ -5,39 +5,24 @@
 """
 
 import subprocess
-import re
 import platform
 
-def detect_hardware_acceleration():
-    """检测系统支持的硬件加速类型"""
+from .encoder_capabilities import get_encoder_capabilities
+
+def detect_hardware_acceleration(refresh=False):
+    """检测系统可用的硬件加速类型
+
+    结果来自编码器能力检测（逐个试编码）的缓存，只在第一次或更换ffmpeg后才真正检测
+    """
     supported_hw = []
-    
     try:
-        # 检测NVIDIA NVENC
-        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], 
-                              capture_output=True, text=True, encoding='utf-8')
-        encoders = result.stdout.lower()
-        
-        if 'h264_nvenc' in encoders:
-            supported_hw.append('nvenc')
-        
-        # 检测Intel Quick Sync Video
-        if 'h264_qsv' in encoders:
-            supported_hw.append('qsv')
-            
-        # 检测AMD AMF
-        if 'h264_amf' in encoders:
-            supported_hw.append('amf')
-            
-        # 检测macOS VideoToolbox
-        if platform.system() == 'Darwin' and 'h264_videotoolbox' in encoders:
-            supported_hw.append('videotoolbox')
-            
+        supported_hw = list(get_encoder_capabilities(refresh=refresh).usable)
     except Exception as e:
         print(f"硬件检测错误: {e}")
     
     # 始终支持软件编码
-    supported_hw.append('none')
+    if 'none' not in supported_hw:
+        supported_hw.append('none')
     
     return supported_hw
 
@@ -59,13 +44,14 @@ def get_gpu_info():
         
         elif platform.system() == "Linux":
             # Linux使用lspci获取GPU信息
-            result = subprocess.run(['lspci', '|', 'grep', '-i', 'vga'], 
+            # 不经过shell，在这里过滤显示设备（独立显卡可能是 3D controller）
+            result = subprocess.run(['lspci'], 
                                   capture_output=True, text=True, encoding='utf-8')
             if result.returncode == 0:
                 lines = result.stdout.strip().split('\n')
                 for line in lines:
-                    if 'vga' in line.lower():
-                        gpu_info.append(line.split(': ')[1] if ': ' in line else line)
+                    if any(kind in line.lower() for kind in ('vga', '3d controller', 'display controller')):
+                        gpu_info.append(line.split(': ', 1)[1] if ': ' in line else line)
         
         elif platform.system() == "Darwin":
             # macOS使用system_profiler
@@ -83,13 +69,19 @@ def get_gpu_info():
     
     return gpu_info
 
-def get_recommended_settings():
-    """获取推荐的编码设置"""
-    hw_support = detect_hardware_acceleration()
+def get_recommended_settings(refresh=False):
+    """获取推荐的编码设置（使用缓存的编码器检测结果，不重复检测）"""
+    capabilities = get_encoder_capabilities(refresh=refresh)
+    hw_support = list(capabilities.usable)
+    if 'none' not in hw_support:
+        hw_support.append('none')
     gpu_info = get_gpu_info()
     
     recommendations = {
         'supported_hw': hw_support,
+        'ffmpeg_version': capabilities.ffmpeg_version,
+        'measured_fps': capabilities.fps,
+        'unavailable': capabilities.errors,
         'gpu_info': gpu_info,
         'default_preset': 'medium',
         'default_hwaccel': 'none',
@@ -106,26 +98,29 @@ def get_recommended_settings():
         }
     }
     
-    # 根据GPU类型推荐硬件加速
-    if 'nvenc' in hw_support:
+    # 推荐实测最快的可用编码器
+    fastest = capabilities.fastest('medium')
+    if fastest == 'nvenc':
         recommendations['default_hwaccel'] = 'nvenc'
         recommendations['default_preset'] = 'fast'  # NVENC使用fast预设
-    elif 'qsv' in hw_support:
+    elif fastest == 'qsv':
         recommendations['default_hwaccel'] = 'qsv'
         recommendations['default_preset'] = 'veryfast'
-    elif 'amf' in hw_support:
+    elif fastest == 'amf':
         recommendations['default_hwaccel'] = 'amf'
         recommendations['default_preset'] = 'balanced'
-    elif 'videotoolbox' in hw_support:
+    elif fastest == 'videotoolbox':
         recommendations['default_hwaccel'] = 'videotoolbox'
         recommendations['default_preset'] = 'medium'
     
     return recommendations
 
 if __name__ == "__main__":
-    # 测试硬件检测
+    # 测试硬件检测（加 --refresh 忽略缓存重新试编码）
+    import sys
+    refresh = '--refresh' in sys.argv
     print("=== 硬件加速检测 ===")
-    hw = detect_hardware_acceleration()
+    hw = detect_hardware_acceleration(refresh=refresh)
     print(f"支持的硬件加速: {hw}")
     
     print("\n=== GPU信息 ===")
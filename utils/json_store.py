@@ -0,0 +1,90 @@
+"""
+JSON缓存文件
+标题缓存、曲目信息缓存、曲库索引、字体索引、编码器检测缓存和CRF曲线缓存共用的读写逻辑：
+按版本号读取，保存时先写临时文件再替换，多个线程的保存串行执行；
+以及这些缓存的模块级单例。
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class JsonFileStore:
+    """一个JSON缓存文件
+
+    version 不为None时写入文件，读取时版本不符的文件视为不存在（格式变化后自动重建）。
+    """
+
+    def __init__(self, path, version=None, label="缓存", indent=None):
+        self.path = Path(path)
+        self.version = version
+        self.label = label
+        self.indent = indent
+        self._save_lock = threading.Lock()
+
+    def load(self):
+        """读取文件内容（字典）；不存在、损坏或版本不符时返回None"""
+        try:
+            if not self.path.exists():
+                return None
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"加载{self.label}失败，将重新创建: {e}")
+            return None
+        if not isinstance(data, dict):
+            logger.warning(f"{self.label}格式不正确，将重新创建: {self.path}")
+            return None
+        if self.version is not None and data.get("version") != self.version:
+            return None
+        return data
+
+    def save(self, snapshot):
+        """写入 snapshot() 返回的字典，返回None时不写；返回是否写入成功
+
+        snapshot 在保存锁内调用：先取快照的线程一定先写完，旧数据不会覆盖新数据，
+        也不会有两个线程同时写同一个临时文件。
+        """
+        with self._save_lock:
+            data = snapshot()
+            if data is None:
+                return False
+            if self.version is not None:
+                data = {"version": self.version, **data}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.path.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=self.indent)
+                os.replace(tmp_file, self.path)
+            except OSError as e:
+                logger.warning(f"保存{self.label}失败: {e}")
+                return False
+            return True
+
+
+class LazySingleton:
+    """模块级单例，第一次 get() 时创建（线程安全）
+
+    save_at_exit 为True时，程序退出前调用实例的 save()，把尚未写入的修改落盘。
+    """
+
+    def __init__(self, factory, save_at_exit=False):
+        self._factory = factory
+        self._save_at_exit = save_at_exit
+        self._lock = threading.Lock()
+        self._instance = None
+
+    def get(self):
+        with self._lock:
+            if self._instance is None:
+                self._instance = self._factory()
+                if self._save_at_exit:
+                    atexit.register(self._instance.save)
+            return self._instance
@@ -0,0 +1,115 @@
+"""
+曲库索引
+记录每个 音频-歌词 配对的检查结果（音频时长、歌词问题、是否可用），
+以两个文件的 (路径, 大小, 修改时间) 为签名，文件变化后对应记录自动失效。
+扫描时据此排除有问题的配对，避免它们进入渲染队列后才失败。
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from .json_store import JsonFileStore, LazySingleton
+
+logger = logging.getLogger(__name__)
+
+# 记录格式变化时递增，旧记录视为过期
+LIBRARY_INDEX_VERSION = 1
+
+
+def file_signature(path):
+    """(路径, 大小, 修改时间)；文件不存在时为None"""
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [str(path), stat.st_size, stat.st_mtime_ns]
+
+
+class LibraryIndex:
+    """曲库索引（线程安全，按歌词路径存储）"""
+
+    def __init__(self, index_file="cache/library_index.json", save_interval=5.0):
+        self.index_file = Path(index_file)
+        self.save_interval = save_interval
+        self._store = JsonFileStore(self.index_file, version=LIBRARY_INDEX_VERSION, label="曲库索引")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    def _load(self):
+        data = self._store.load()
+        if data is not None:
+            self._entries = data.get("entries", {})
+
+    @staticmethod
+    def make_signature(audio_path, lrc_path):
+        return [file_signature(audio_path), file_signature(lrc_path)]
+
+    def get(self, audio_path, lrc_path):
+        """获取仍然有效的记录；文件已变化或没有记录时返回None"""
+        with self._lock:
+            entry = self._entries.get(str(lrc_path))
+        if entry is None or entry.get("signature") != self.make_signature(audio_path, lrc_path):
+            return None
+        return entry
+
+    def set(self, audio_path, lrc_path, record):
+        """写入记录（record 为可JSON序列化的字典）"""
+        entry = dict(record)
+        entry["audio"] = str(audio_path)
+        entry["signature"] = self.make_signature(audio_path, lrc_path)
+        entry["checked_at"] = time.time()
+        with self._lock:
+            self._entries[str(lrc_path)] = entry
+            self._dirty = True
+            should_save = time.time() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def is_broken(self, audio_path, lrc_path):
+        entry = self.get(audio_path, lrc_path)
+        return bool(entry and entry.get("broken"))
+
+    def split_pairs(self, file_pairs):
+        """把配对分成 (可用的, 有问题的)，没有记录的视为可用"""
+        usable, broken = [], []
+        for pair in file_pairs:
+            (broken if self.is_broken(*pair) else usable).append(pair)
+        return usable, broken
+
+    def prune(self):
+        """删除歌词文件已不存在的记录，返回删除数"""
+        with self._lock:
+            stale = [key for key in self._entries if not os.path.exists(key)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            self._last_save = time.time()
+            return {"entries": dict(self._entries)}
+
+    def save(self):
+        """有修改时写入磁盘"""
+        self._store.save(self._snapshot)
+
+
+_library_index = LazySingleton(LibraryIndex, save_at_exit=True)
+
+
+def get_library_index():
+    """获取全局曲库索引"""
+    return _library_index.get()
@@ -0,0 +1,271 @@
+"""
+LRC歌词检查与修复
+在渲染之前批量检查歌词文件：编码、时间戳顺序、同一时间的重叠行、超出音频时长的歌词等，
+可选自动修复（统一转为UTF-8、排序、合并重叠行、去掉超出音频的行）。
+检查结果写入曲库索引，扫描时有问题的配对不会进入渲染队列。
+"""
+
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from .library_index import get_library_index
+from .lrc_parser import LINE_PATTERN, _to_ms, decode_lrc_bytes, parse_lrc_text
+from .media_probe import probe_audio_duration
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+# 修复后不再写回的标签：offset 已经计算进时间戳
+DROPPED_TAGS = ('offset',)
+
+# 少于这个数量时直接在当前进程检查，不启动进程池
+MIN_POOL_SIZE = 64
+
+
+class LintIssue(NamedTuple):
+    """一条检查结果；fixable 表示 --fix 可以自动修复"""
+    code: str
+    severity: str
+    message: str
+    fixable: bool = False
+
+
+class LintResult(NamedTuple):
+    """一个歌词文件的检查结果"""
+    lrc: str
+    audio: Optional[str]
+    issues: List[LintIssue]
+    encoding: Optional[str] = None
+    line_count: int = 0
+    duration: Optional[float] = None
+    fixed: bool = False
+
+    @property
+    def broken(self):
+        """有错误级别的问题，不能用于生成视频"""
+        return any(issue.severity == SEVERITY_ERROR for issue in self.issues)
+
+    @property
+    def fixable(self):
+        return any(issue.fixable for issue in self.issues)
+
+    def to_record(self):
+        """转换为曲库索引中保存的记录"""
+        return {
+            "broken": self.broken,
+            "issues": [list(issue) for issue in self.issues],
+            "encoding": self.encoding,
+            "lines": self.line_count,
+            "duration": self.duration,
+            "audio_checked": self.duration is not None,
+        }
+
+    @classmethod
+    def from_record(cls, lrc, audio, record):
+        return cls(str(lrc), str(audio) if audio else None,
+                   [LintIssue(*issue) for issue in record.get("issues", [])],
+                   record.get("encoding"), record.get("lines", 0), record.get("duration"))
+
+
+def format_lrc_time(ms):
+    """毫秒 -> [mm:ss.xx]，不是整厘秒时保留三位毫秒"""
+    minutes, ms = divmod(int(ms), 60000)
+    seconds, ms = divmod(ms, 1000)
+    if ms % 10:
+        return f"[{minutes:02d}:{seconds:02d}.{ms:03d}]"
+    return f"[{minutes:02d}:{seconds:02d}.{ms // 10:02d}]"
+
+
+def _merge_same_start(lines):
+    """合并开始时间相同的行（如原文和翻译），完全相同的歌词只保留一次"""
+    merged = []
+    for start, text in lines:
+        if merged and merged[-1][0] == start:
+            if text not in merged[-1][1]:
+                merged[-1][1].append(text)
+        else:
+            merged.append((start, [text]))
+    return [(start, " ".join(texts)) for start, texts in merged]
+
+
+def build_fixed_lrc(tags, lines, duration_ms=None):
+    """生成修复后的LRC文本：保留头部标签，时间戳已排序并应用offset"""
+    if duration_ms is not None:
+        lines = [(start, text) for start, text in lines if start < duration_ms]
+    rows = [f"[{name}:{value}]" for name, value in tags.items() if name not in DROPPED_TAGS]
+    rows.extend(f"{format_lrc_time(start)}{text}" for start, text in _merge_same_start(lines))
+    return "\n".join(rows) + "\n"
+
+
+def lint_lrc_bytes(data, duration=None):
+    """检查LRC文件内容
+
+    Args:
+        data: 文件内容（字节）
+        duration: 音频时长（秒），为None时不检查是否超出音频
+
+    Returns:
+        (问题列表, 编码, 解析结果)
+    """
+    issues = []
+    text, encoding = decode_lrc_bytes(data)
+    if encoding == 'latin-1':
+        issues.append(LintIssue('encoding', SEVERITY_ERROR, "无法识别文件编码，歌词可能是乱码"))
+    elif '\ufffd' in text:
+        issues.append(LintIssue('encoding', SEVERITY_ERROR, "文件中有无法解码的字符"))
+    elif encoding != 'utf-8':
+        issues.append(LintIssue('encoding', SEVERITY_WARNING, f"文件编码为 {encoding}，建议转为UTF-8", True))
+
+    # 按文件中的原始顺序检查行首时间戳
+    previous = -1
+    unsorted = bad_stamps = 0
+    for minutes, seconds, fraction, _, _ in LINE_PATTERN.findall(text):
+        if int(seconds) >= 60:
+            bad_stamps += 1
+        start = _to_ms(minutes, seconds, fraction)
+        if start < previous:
+            unsorted += 1
+        previous = start
+    if bad_stamps:
+        issues.append(LintIssue('bad_timestamp', SEVERITY_WARNING, f"{bad_stamps} 个时间戳的秒数不小于60", True))
+    if unsorted:
+        issues.append(LintIssue('unsorted', SEVERITY_WARNING, f"{unsorted} 行时间戳比上一行早", True))
+
+    parsed = parse_lrc_text(text, encoding)
+    lines = parsed.lines
+    if not lines:
+        issues.append(LintIssue('no_lyrics', SEVERITY_ERROR, "没有带时间戳的歌词"))
+        return issues, encoding, parsed
+
+    overlaps = duplicates = 0
+    for (start, text), (next_start, next_text) in zip(lines, lines[1:]):
+        if start == next_start:
+            if text == next_text:
+                duplicates += 1
+            else:
+                overlaps += 1
+    if overlaps:
+        issues.append(LintIssue('overlap', SEVERITY_WARNING, f"{overlaps} 行与上一行时间相同，将无法显示", True))
+    if duplicates:
+        issues.append(LintIssue('duplicate', SEVERITY_WARNING, f"{duplicates} 行重复", True))
+
+    if duration is not None:
+        duration_ms = duration * 1000
+        beyond = sum(1 for start, _ in lines if start >= duration_ms)
+        if beyond == len(lines):
+            issues.append(LintIssue('beyond_audio', SEVERITY_ERROR,
+                                    f"所有歌词都在音频结束（{duration:.1f}秒）之后，可能配错了音频"))
+        elif beyond:
+            issues.append(LintIssue('beyond_audio', SEVERITY_WARNING,
+                                    f"{beyond} 行歌词在音频结束（{duration:.1f}秒）之后", True))
+    return issues, encoding, parsed
+
+
+def lint_lrc(lrc_path, audio_path=None, check_audio=True, fix=False):
+    """检查（并可选修复）一个歌词文件
+
+    修复时原文件备份为 .lrc.bak（已有备份时不覆盖），修复后重新检查一遍。
+    """
+    lrc = str(lrc_path)
+    audio = str(audio_path) if audio_path else None
+    try:
+        with open(lrc_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return LintResult(lrc, audio, [LintIssue('unreadable', SEVERITY_ERROR, f"无法读取: {e}")])
+
+    duration = probe_audio_duration(audio_path) if (check_audio and audio_path) else None
+    issues, encoding, parsed = lint_lrc_bytes(data, duration)
+    result = LintResult(lrc, audio, issues, encoding, len(parsed.lines), duration)
+    if not (fix and result.fixable) or result.broken:
+        return result
+
+    duration_ms = duration * 1000 if duration is not None else None
+    fixed_bytes = build_fixed_lrc(parsed.tags, parsed.lines, duration_ms).encode('utf-8')
+    backup = lrc + '.bak'
+    try:
+        if not os.path.exists(backup):
+            shutil.copy2(lrc_path, backup)
+        tmp_path = lrc + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(fixed_bytes)
+        os.replace(tmp_path, lrc_path)
+    except OSError as e:
+        issues.append(LintIssue('fix_failed', SEVERITY_WARNING, f"写入修复结果失败: {e}"))
+        return result
+
+    issues, encoding, parsed = lint_lrc_bytes(fixed_bytes, duration)
+    return LintResult(lrc, audio, issues, encoding, len(parsed.lines), duration, fixed=True)
+
+
+def _lint_task(task):
+    # 进程池任务，需要是模块级函数才能被pickle
+    audio_path, lrc_path, check_audio, fix = task
+    return lint_lrc(lrc_path, audio_path, check_audio, fix)
+
+
+def lint_pairs(file_pairs, check_audio=True, fix=False, workers=None, force=False,
+               index=None, progress=None, should_stop=None):
+    """批量检查 音频-歌词 配对，结果写入曲库索引
+
+    索引中已有且文件未变化的记录直接复用（需要检查音频时长或修复时例外）。
+
+    Args:
+        file_pairs: [(音频路径, 歌词路径), ...]
+        check_audio: 是否用ffprobe检查歌词是否超出音频时长
+        fix: 是否自动修复可修复的问题
+        workers: 进程数，None为CPU核数，1为在当前进程中检查
+        force: 忽略索引中的记录，全部重新检查
+        index: 曲库索引，默认为全局索引
+        progress: 可选回调 progress(已完成数, 总数)
+        should_stop: 可选，返回True时提前结束
+
+    Returns:
+        list: 与 file_pairs 顺序一致的 LintResult（提前结束时只包含已完成的部分）
+    """
+    index = index if index is not None else get_library_index()
+    results = [None] * len(file_pairs)
+    todo = []
+    for i, (audio_path, lrc_path) in enumerate(file_pairs):
+        record = None if force else index.get(audio_path, lrc_path)
+        if record is not None:
+            cached = LintResult.from_record(lrc_path, audio_path, record)
+            needs_audio = check_audio and not record.get("audio_checked")
+            if not needs_audio and not (fix and cached.fixable):
+                results[i] = cached
+                continue
+        todo.append(i)
+
+    total = len(file_pairs)
+    done = total - len(todo)
+    if progress:
+        progress(done, total)
+
+    tasks = [(file_pairs[i][0], file_pairs[i][1], check_audio, fix) for i in todo]
+    if workers == 1 or len(tasks) < MIN_POOL_SIZE:
+        executor = None
+        outputs = map(_lint_task, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        outputs = executor.map(_lint_task, tasks, chunksize=max(1, min(64, len(tasks) // 32)))
+    try:
+        for i, result in zip(todo, outputs):
+            results[i] = result
+            audio_path, lrc_path = file_pairs[i]
+            if not any(issue.code in ('unreadable', 'fix_failed') for issue in result.issues):
+                index.set(audio_path, lrc_path, result.to_record())
+            done += 1
+            if progress:
+                progress(done, total)
+            if should_stop is not None and should_stop():
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        index.save()
+    return [result for result in results if result is not None]
@@ -0,0 +1,172 @@
+"""
+LRC歌词解析器
+一次读取文件字节并识别编码（BOM、UTF-8、GBK/GB18030、Big5，后两者按常用字比例区分），
+单遍扫描所有行：展开一行中的多个时间戳、按位数处理毫秒、应用 [offset:]，
+返回按时间排序的紧凑时间轴。
+"""
+
+import re
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, NamedTuple, Tuple
+
+# 整段文本一次扫描：行首第一个时间戳拆成分组，其后连续的时间戳和歌词整体捕获，
+# 如 [00:12.00][01:30.00]副歌 -> ('00', '12', '00', '[01:30.00]', '副歌')
+LINE_PATTERN = re.compile(
+    r'^[ \t]*\[(\d{1,3}):(\d{1,2})(?:[.:](\d{1,3}))?\]'
+    r'((?:\[\d{1,3}:\d{1,2}(?:[.:]\d{1,3})?\])*)([^\r\n]*)',
+    re.MULTILINE)
+TIMESTAMP_PATTERN = re.compile(r'\[(\d{1,3}):(\d{1,2})(?:[.:](\d{1,3}))?\]')
+# 头部标签，如 [ti:晴天] [offset:+500]
+TAG_PATTERN = re.compile(r'^[ \t]*\[([A-Za-z#]+):([^\]\r\n]*)\][ \t]*$', re.MULTILINE)
+
+# 小数部分按位数换算成毫秒：.5 -> 500, .50 -> 500, .500 -> 500
+FRACTION_SCALE = (1, 100, 10, 1)
+
+# 不带BOM且不是UTF-8时尝试的编码；gb18030 兼容 gbk/gb2312
+# gb18030 几乎能解码任何字节，Big5 文件也能“成功”解码成乱码，所以两种都解码后按常用字比例选择
+FALLBACK_ENCODINGS = ('gb18030', 'big5')
+
+# 常用字的码位范围：GB2312 一级汉字（按拼音排列的3755个常用简体字）、Big5 常用字（5401个常用繁体字）
+GB2312_COMMON_RANGE = (0xB0A1, 0xD7FE)
+BIG5_COMMON_RANGE = (0xA440, 0xC67E)
+
+BOMS = (
+    (b'\xef\xbb\xbf', 'utf-8'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be'),
+)
+
+
+class LrcParseResult(NamedTuple):
+    """解析结果：头部标签、(开始毫秒, 歌词) 时间轴、识别出的编码"""
+    tags: Dict[str, str]
+    lines: List[Tuple[int, str]]
+    encoding: str
+
+
+def decode_lrc_bytes(data, partial=False):
+    """识别编码并解码LRC字节内容，返回 (文本, 编码)
+
+    Args:
+        data: 文件内容
+        partial: data 只是文件开头的一段时为True，允许末尾的多字节字符被截断
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return data[len(bom):].decode(encoding, errors='replace'), encoding
+    text = _try_decode(data, 'utf-8', partial)
+    if text is not None:
+        return text, 'utf-8'
+    candidates = []
+    for encoding in FALLBACK_ENCODINGS:
+        text = _try_decode(data, encoding, partial)
+        if text is not None:
+            candidates.append((text, encoding))
+    if candidates:
+        # 得分相同时取靠前的编码（gb18030）
+        return max(candidates, key=lambda candidate: _common_hanzi_ratio(candidate[0]))
+    return data.decode('latin-1'), 'latin-1'
+
+
+def _try_decode(data, encoding, partial):
+    """解码失败时返回None"""
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError as e:
+        # 只截断了末尾一个多字节字符时，丢掉这几个字节即可
+        if partial and e.start >= len(data) - 3 and e.end == len(data):
+            return data[:e.start].decode(encoding)
+    return None
+
+
+@lru_cache(maxsize=8192)
+def _is_common_char(char):
+    """常用简体/繁体汉字或全角标点"""
+    if '\u3000' <= char <= '\u303f' or '\uff00' <= char <= '\uffef':
+        return True
+    for encoding, (low, high) in (('gb2312', GB2312_COMMON_RANGE), ('big5', BIG5_COMMON_RANGE)):
+        try:
+            encoded = char.encode(encoding)
+        except UnicodeEncodeError:
+            continue
+        if len(encoded) == 2 and low <= int.from_bytes(encoded, 'big') <= high:
+            return True
+    return False
+
+
+def _common_hanzi_ratio(text):
+    """非ASCII字符中常用字的比例
+
+    用错编码解码出的文字大多落在生僻字、假名、制表符或私用区，
+    例如 Big5 的“晴天”按 gb18030 解码为“锤ぱ”，GBK 的“晴天”按 Big5 解码为“ю毞”
+    """
+    total = common = 0
+    for char in text:
+        if char < '\x80':
+            continue
+        total += 1
+        if _is_common_char(char):
+            common += 1
+    return common / total if total else 0.0
+
+
+def detect_encoding(data, partial=False):
+    """识别LRC字节内容的编码"""
+    return decode_lrc_bytes(data, partial)[1]
+
+
+def parse_offset(value):
+    """[offset:] 的值（毫秒），无法解析时为0"""
+    try:
+        return int(value.strip().replace('+', '') or 0)
+    except ValueError:
+        return 0
+
+
+def _to_ms(minutes, seconds, fraction):
+    start = (int(minutes) * 60 + int(seconds)) * 1000
+    if fraction:
+        start += int(fraction) * FRACTION_SCALE[len(fraction)]
+    return start
+
+
+def parse_lrc_text(text, encoding='utf-8'):
+    """解析LRC文本"""
+    tags = {}
+    for name, value in TAG_PATTERN.findall(text):
+        tags.setdefault(name.lower(), value.strip())
+
+    lines = []
+    append = lines.append
+    for minutes, seconds, fraction, extra, lyric in LINE_PATTERN.findall(text):
+        if '[' in lyric:
+            # 时间戳不在行首的少见写法
+            lyric = TIMESTAMP_PATTERN.sub('', lyric)
+        lyric = lyric.strip()
+        if not lyric:
+            continue
+        append((_to_ms(minutes, seconds, fraction), lyric))
+        if extra:
+            for stamp in TIMESTAMP_PATTERN.findall(extra):
+                append((_to_ms(*stamp), lyric))
+
+    # 正的offset表示歌词整体提前显示
+    offset = parse_offset(tags.get('offset', '0'))
+    if offset:
+        lines = [(max(0, start - offset), lyric) for start, lyric in lines]
+    # 多时间戳展开后顺序会乱，按开始时间稳定排序
+    lines.sort(key=itemgetter(0))
+    return LrcParseResult(tags, lines, encoding)
+
+
+def parse_lrc_bytes(data):
+    """解析LRC文件内容（字节）"""
+    text, encoding = decode_lrc_bytes(data)
+    return parse_lrc_text(text, encoding)
+
+
+def parse_lrc_file(lrc_path):
+    """读取并解析LRC文件"""
+    with open(lrc_path, 'rb') as f:
+        return parse_lrc_bytes(f.read())
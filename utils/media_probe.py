@@ -0,0 +1,211 @@
+"""
+曲目元数据读取
+从LRC头部标签（[ti:] [ar:]）和音频文件标签中获取歌名和歌手，
+结果按文件路径、大小和修改时间缓存到磁盘，重新扫描时不再重复读取。
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .ffmpeg_tools import get_ffprobe_cmd
+from .json_store import JsonFileStore, LazySingleton
+from .lrc_parser import decode_lrc_bytes
+
+logger = logging.getLogger(__name__)
+
+# LRC头部标签，如 [ti:晴天] [ar:周杰伦]
+LRC_TAG_PATTERN = re.compile(r'\[(ti|ar):([^\]\r\n]*)\]', re.IGNORECASE)
+
+# 标签通常都在文件开头，只读取前面一小段
+LRC_HEADER_BYTES = 4096
+
+LRC_TAG_FIELDS = {'ti': 'title', 'ar': 'artist'}
+
+
+class TrackInfo(NamedTuple):
+    """曲目信息；title 没有标签时为音频文件名"""
+    title: str
+    artist: Optional[str] = None
+
+
+def read_lrc_tags(lrc_path):
+    """读取LRC头部标签，返回 {'title': ..., 'artist': ...} 中存在的项"""
+    try:
+        with open(lrc_path, 'rb') as f:
+            text, _ = decode_lrc_bytes(f.read(LRC_HEADER_BYTES), partial=True)
+    except OSError:
+        return {}
+    tags = {}
+    for match in LRC_TAG_PATTERN.finditer(text):
+        value = match.group(2).strip()
+        field = LRC_TAG_FIELDS[match.group(1).lower()]
+        if value and field not in tags:
+            tags[field] = value
+    return tags
+
+
+def probe_audio_tags(audio_path):
+    """用ffprobe读取音频文件的 title/artist 标签"""
+    try:
+        result = subprocess.run(get_ffprobe_cmd() + [
+            '-v', 'error',
+            '-show_entries', 'format_tags=title,artist,album_artist',
+            '-of', 'json', str(audio_path)
+        ], capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=30)
+        if result.returncode != 0:
+            return {}
+        raw_tags = json.loads(result.stdout or '{}').get('format', {}).get('tags', {})
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return {}
+    # 不同容器的标签名大小写不一致
+    raw_tags = {key.lower(): str(value).strip() for key, value in raw_tags.items()}
+    tags = {}
+    for field in ('title', 'artist'):
+        if raw_tags.get(field):
+            tags[field] = raw_tags[field]
+    if 'artist' not in tags and raw_tags.get('album_artist'):
+        tags['artist'] = raw_tags['album_artist']
+    return tags
+
+
+def probe_audio_duration(audio_path):
+    """用ffprobe读取音频时长（秒），失败时返回None"""
+    try:
+        result = subprocess.run(get_ffprobe_cmd() + [
+            '-v', 'error', '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)
+        ], capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            return None
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def _file_signature(path):
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [str(path), stat.st_size, stat.st_mtime_ns]
+
+
+class TrackInfoCache:
+    """曲目信息磁盘缓存
+
+    以音频和歌词文件的 (路径, 大小, 修改时间) 为键，文件变化后自动失效；
+    条目数超过上限时淘汰最久未使用的。
+    """
+
+    def __init__(self, cache_file="cache/track_info.json", max_entries=50000, save_interval=5.0):
+        self.cache_file = Path(cache_file)
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self._store = JsonFileStore(self.cache_file, label="曲目信息缓存")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    @staticmethod
+    def make_key(audio_path, lrc_path=None):
+        return json.dumps([_file_signature(audio_path), _file_signature(lrc_path)], ensure_ascii=False)
+
+    def _load(self):
+        data = self._store.load()
+        if data is not None:
+            self._entries = OrderedDict(data.get("entries", []))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, tags):
+        with self._lock:
+            self._entries[key] = tags
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            should_save = time.time() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            self._last_save = time.time()
+            return {"entries": list(self._entries.items())}
+
+    def save(self):
+        """有修改时写入磁盘"""
+        self._store.save(self._snapshot)
+
+
+_track_info_cache = LazySingleton(TrackInfoCache, save_at_exit=True)
+
+
+def get_track_info_cache():
+    """获取全局曲目信息缓存"""
+    return _track_info_cache.get()
+
+
+def get_track_info(audio_path, lrc_path=None, probe_audio=True):
+    """获取曲目信息
+
+    先读LRC标签（不需要启动子进程），缺少歌名或歌手时再用ffprobe读取音频标签；
+    LRC标签优先，因为歌词文件通常是用户手动整理的。
+    """
+    audio_path = Path(audio_path)
+    cache = get_track_info_cache()
+    key = TrackInfoCache.make_key(audio_path, lrc_path)
+    tags = cache.get(key)
+    if tags is None:
+        tags = read_lrc_tags(lrc_path) if lrc_path else {}
+        if probe_audio and ('title' not in tags or 'artist' not in tags):
+            for field, value in probe_audio_tags(audio_path).items():
+                tags.setdefault(field, value)
+        cache.set(key, tags)
+    return TrackInfo(title=tags.get('title') or audio_path.stem,
+                     artist=tags.get('artist'))
+
+
+def probe_tracks(file_pairs, max_workers=4, should_stop=None):
+    """并行读取多首歌的曲目信息
+
+    Args:
+        file_pairs: [(音频路径, 歌词路径), ...]
+        should_stop: 可选，返回True时提前结束（例如开始了新的扫描）
+
+    Returns:
+        dict: {音频路径: TrackInfo}
+    """
+    results = {}
+
+    def probe(pair):
+        if should_stop is not None and should_stop():
+            return None
+        return pair[0], get_track_info(*pair)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for item in executor.map(probe, file_pairs):
+            if item is not None:
+                results[item[0]] = item[1]
+    return results
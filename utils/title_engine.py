@@ -0,0 +1,154 @@
+"""
+离线标题引擎
+关键词表和标题模板从 title_rules.json 加载一次并预编译，
+一次正则扫描同时匹配版本关键词和情感关键词，
+按歌曲名和歌手的CRC32从加权模板中确定性地选出标题。
+AI关闭或不可用时作为默认标题，也为AI提示词提供风格特征。
+"""
+
+import json
+import logging
+import re
+import threading
+import zlib
+from bisect import bisect_right
+from itertools import accumulate
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_FILE = Path(__file__).parent / "title_rules.json"
+
+# 匹配类别，决定风格特征的先后顺序
+CATEGORY_SONG = 0
+CATEGORY_EMOTION = 1
+
+
+class TitleEngine:
+    """基于规则和模板的离线标题生成器"""
+
+    def __init__(self, rules):
+        self.artists = rules.get("artists", {})
+        defaults = rules.get("default_styles", {})
+        self._default_short = defaults.get("short", "华语经典、情感共鸣")
+        self._default_pop = defaults.get("pop", "华语流行、情感表达")
+        self._default_other = defaults.get("other", "音乐MV、情感共鸣")
+        self._short_max_length = defaults.get("short_max_length", 4)
+        self._pop_chars = frozenset(defaults.get("pop_chars", "的了我你"))
+
+        # 关键词 -> (类别, 优先级, 风格, 情绪)；优先级即在表中的顺序，越小越优先
+        self._keywords = {}
+        for category, key in ((CATEGORY_SONG, "song_keywords"), (CATEGORY_EMOTION, "emotion_keywords")):
+            for priority, item in enumerate(rules.get(key, [])):
+                self._keywords.setdefault(item["keyword"].lower(),
+                                          (category, priority, item["style"], item.get("mood")))
+        # 长关键词在前，保证 "live版" 优先于 "live" 被整体匹配
+        alternatives = sorted(self._keywords, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, alternatives)), re.IGNORECASE) if alternatives else None
+
+        # 模板按情绪分组，有歌手/无歌手各自预先算好累积权重
+        self._templates = {}
+        for mood, items in rules.get("templates", {}).items():
+            with_artist = [(item["text"], item.get("weight", 1)) for item in items]
+            without_artist = [entry for entry in with_artist if "{artist}" not in entry[0]]
+            self._templates[mood] = (self._build_choices(with_artist),
+                                     self._build_choices(without_artist))
+
+    @staticmethod
+    def _build_choices(entries):
+        if not entries:
+            return None
+        texts = [text for text, _ in entries]
+        cumulative = list(accumulate(max(1, int(weight)) for _, weight in entries))
+        return texts, cumulative
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def analyze(self, song_name, artist=None):
+        """分析风格特征
+
+        Returns:
+            (风格特征列表, 情绪)；情绪用于选择标题模板
+        """
+        song = str(song_name)
+        styles = []
+        artist_info = self.artists.get(artist) if artist else None
+        if artist_info:
+            styles.append(artist_info["style"])
+
+        # 一次扫描，每个类别保留优先级最高的关键词
+        best = {}
+        if self._pattern is not None:
+            for match in self._pattern.finditer(song):
+                info = self._keywords[match.group(0).lower()]
+                current = best.get(info[0])
+                if current is None or info[1] < current[1]:
+                    best[info[0]] = info
+        for category in (CATEGORY_SONG, CATEGORY_EMOTION):
+            if category in best:
+                styles.append(best[category][2])
+
+        if not styles:
+            if len(song) <= self._short_max_length:
+                styles.append(self._default_short)
+            elif any(char in self._pop_chars for char in song):
+                styles.append(self._default_pop)
+            else:
+                styles.append(self._default_other)
+
+        # 版本关键词最能决定标题风格，其次是情感，最后是歌手
+        mood = None
+        for category in (CATEGORY_SONG, CATEGORY_EMOTION):
+            if category in best and best[category][3]:
+                mood = best[category][3]
+                break
+        if mood is None and artist_info:
+            mood = artist_info.get("mood")
+        return styles, mood or "default"
+
+    def style_context(self, song_name, artist=None):
+        """风格特征描述（用于AI提示词）"""
+        styles, _ = self.analyze(song_name, artist)
+        # 去重并保持顺序
+        return "、".join(dict.fromkeys(styles))
+
+    def generate(self, song_name, artist=None):
+        """生成离线标题，同一首歌每次结果相同"""
+        _, mood = self.analyze(song_name, artist)
+        choices = self._pick_choices(mood, artist)
+        if choices is None:
+            return f"【{song_name}】{artist}的封神现场！" if artist else f"【{song_name}】听完直接破防的音乐MV"
+        texts, cumulative = choices
+        seed = zlib.crc32(f"{song_name}\0{artist or ''}".encode("utf-8"))
+        index = bisect_right(cumulative, seed % cumulative[-1])
+        return texts[index].format(song=song_name, artist=artist or "")
+
+    def _pick_choices(self, mood, artist):
+        for name in (mood, "default"):
+            groups = self._templates.get(name)
+            if groups is None:
+                continue
+            choices = groups[0] if artist else groups[1]
+            if choices is not None:
+                return choices
+        return None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_title_engine():
+    """获取全局标题引擎（首次调用时加载规则文件）"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            try:
+                _engine = TitleEngine.from_file()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"加载标题规则失败，使用内置默认标题: {e}")
+                _engine = TitleEngine({})
+        return _engine
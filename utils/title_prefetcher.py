@@ -0,0 +1,101 @@
+"""
+标题预取 - 在编码开始前并行生成每首歌的视频标题
+
+扫描完成后即可提交，标题生成在独立的I/O线程池中进行，
+与编码完全重叠；编码线程命名输出文件时直接取结果。
+未缓存的歌曲按批合并成一次AI请求。
+"""
+
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from .config_manager import get_config
+
+logger = logging.getLogger(__name__)
+
+
+def _generate_titles(tracks):
+    # AI模块在第一次生成标题时才导入，不拖慢界面启动
+    from .ai_title_generator import generate_video_titles
+    return generate_video_titles(tracks)
+
+
+class TitlePrefetcher:
+    """按 (歌曲名, 歌手) 去重的标题预取器"""
+
+    def __init__(self, max_workers=None, batch_func=None, batch_size=None):
+        # 线程只是等待共享AI客户端的结果，数量与AI并发上限一致
+        self.max_workers = max_workers or get_config().get("ai.concurrency", 8)
+        self.batch_func = batch_func or _generate_titles
+        self.batch_size = batch_size or get_config().get("ai.batch_size", 10)
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='title')
+        return self._executor
+
+    def _run_batch(self, batch):
+        """生成一批标题并写回各自的Future；已被reset取消的跳过"""
+        batch = [(key, future) for key, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            titles = self.batch_func([key for key, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), title in zip(batch, titles):
+            future.set_result(title)
+
+    def _submit(self, tracks):
+        # 调用方需持有锁；返回每个track对应的Future
+        futures = []
+        new_items = []
+        for song_name, artist in tracks:
+            key = (song_name, artist)
+            future = self._futures.get(key)
+            if future is None:
+                future = Future()
+                self._futures[key] = future
+                new_items.append((key, future))
+            futures.append(future)
+        executor = self._get_executor()
+        for i in range(0, len(new_items), self.batch_size):
+            executor.submit(self._run_batch, new_items[i:i + self.batch_size])
+        return futures
+
+    def prefetch(self, tracks):
+        """提交一批 (歌曲名, 歌手)，已提交过的不会重复生成"""
+        with self._lock:
+            self._submit(tracks)
+        logger.info(f"🤖 已提交 {len(self._futures)} 个标题预生成任务")
+
+    def get(self, song_name, artist=None, timeout=None):
+        """获取标题；尚未提交的会立即提交并等待"""
+        while True:
+            with self._lock:
+                future = self._submit([(song_name, artist)])[0]
+            try:
+                return future.result(timeout=timeout)
+            except CancelledError:
+                # 等待期间被reset取消，重新提交
+                continue
+
+    def reset(self):
+        """丢弃所有结果，取消尚未开始的任务（例如重新扫描时）"""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    def shutdown(self):
+        self.reset()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None